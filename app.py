@@ -1,76 +1,321 @@
 import streamlit as st
 import pandas as pd
-import akshare as st_ak
+import numpy as np
 import os
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+import re
+import time
+import hashlib
+import threading
+import collections
+from stock_query import StockQueryEngine
+import delta_store
+import news_store
+import etf_classes
+import links
 
 # 1. 基础配置
 st.set_page_config(page_title="Chilam Club - 投资驾驶舱", page_icon="🚀", layout="wide")
 
 # 2. 辅助函数
-def load_data(path):
-    if not os.path.exists(path): return None
+# 紧凑类型：数值列降为 float32 / int16，重复度高的文本列转成 category
+FLOAT32_COLS = ['price_now', 'RPS_50', 'rps_50_chg', 'RPS_120', 'RPS_250', 'pe_ttm', 'mv_亿', 'turnover_rate']
+CATEGORY_COLS = ['细分行业', '更新日期', '初次入选']
+
+def compact_dtypes(df):
+    for c in FLOAT32_COLS:
+        if c in df.columns: df[c] = pd.to_numeric(df[c], errors='coerce').astype('float32')
+    if '连续天数' in df.columns:
+        df['连续天数'] = pd.to_numeric(df['连续天数'], errors='coerce').fillna(0).astype('int16')
+    for c in CATEGORY_COLS:
+        if c in df.columns: df[c] = df[c].astype('category')
+    return df
+
+# 看板用到的列：历史分区 (Parquet) 只读这些列
+VIEW_COLS = ['ts_code', 'name', '细分行业', '资产类别', 'price_now', 'RPS_50', 'rps_50_chg', 'RPS_120', 'RPS_250',
+             '连续天数', 'pe_ttm', 'mv_亿', 'turnover_rate', 'xueqiu_url', '更新日期']
+
+@st.cache_resource(max_entries=24, show_spinner=False)
+def load_data_version(path, mtime, sort_col=None):
+    """
+    按 (路径, 修改时间) 缓存一个数据版本，所有会话共享：
+    解析、压缩类型、RPS 展示列、排序和行业选项都只在文件更新后算一次。
+    回看的历史日也走这里 (每天一个 Parquet 分区)，最近看过的若干天按 LRU 常驻。
+    返回的 DataFrame 是共享只读的，使用方需要先切片/copy 再修改。
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        names = pq.read_schema(path).names
+        df = pd.read_parquet(path, columns=[c for c in VIEW_COLS if c in names])
+    else:
+        df = pd.read_csv(path)
+    if sort_col and sort_col in df.columns:
+        df = df.sort_values(sort_col, ascending=False, ignore_index=True)
+    if 'RPS_50' in df.columns:
+        # 展示列要在降精度之前生成，否则 97.95 这类值会被 float32 舍成 97.9
+        df = format_rps_show(df, 'RPS_50', 'rps_50_chg')
+    df = compact_dtypes(df)
+    opts = ["全部"]
+    if '细分行业' in df.columns:
+        opts += sorted(x for x in df['细分行业'].dropna().unique() if x != '-')
+    return df, opts, StockQueryEngine(df)
+
+# 仓库里只有 data/deltas 下的增量日志，CSV 在本地按需物化
+DELTA_OUTPUTS = {"stocks": "data/strong_stocks.csv", "etfs": "data/strong_etfs.csv"}
+
+def load_data(path, sort_col=None):
+    if not path or not os.path.exists(path): return None
+    try:
+        return load_data_version(path, os.path.getmtime(path), sort_col)[0]
+    except: return None
+
+# ================= 历史回看 =================
+TREND_POINTS = 60
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def history_days(kind, stamp):
+    """日志里的交易日 (新的在前)，stamp 是日志最新修改时间"""
+    return delta_store.dates(kind)[::-1]
+
+def pick_day(kind):
+    """交易日选择器；选中最新一天返回 None (走当前 CSV)"""
+    days = history_days(kind, delta_store.last_modified(kind))
+    if len(days) < 2: return None
+    day = st.selectbox("📅 交易日", days, key=f"day_{kind}")
+    return None if day == days[0] else day
+
+def day_path(kind, day):
+    """当前列表或某个历史日的分区 (第一次看这天时从增量日志物化)"""
+    return DELTA_OUTPUTS[kind] if day is None else delta_store.day_partition(kind, day)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_trajectory_index(kind, stamp):
+    path = delta_store.update_trajectory_index(kind)
+    return delta_store.TrajectoryIndex(path) if path else None
+
+def trend_of(kind, day):
+    """返回 codes -> 每只截至 day 的 RPS_50 轨迹，供表格里的走势小图用"""
+    try: index = load_trajectory_index(kind, delta_store.last_modified(kind))
+    except Exception: return None
+    if index is None: return None
+    return lambda codes: index.series(codes, end=day, n=TREND_POINTS)
+
+def load_industry_options(path, sort_col=None):
+    if not path or not os.path.exists(path): return ["全部"]
     try:
-        return pd.read_csv(path)
+        return load_data_version(path, os.path.getmtime(path), sort_col)[1]
+    except: return ["全部"]
+
+def load_query_engine(path, sort_col=None):
+    if not path or not os.path.exists(path): return None
+    try:
+        return load_data_version(path, os.path.getmtime(path), sort_col)[2]
     except: return None
 
-# 美化 RPS (生成带箭头的列)
+# 美化 RPS (生成带箭头的列)，整列向量化拼接
 def format_rps_show(df, rps_col='RPS_50', chg_col='rps_50_chg'):
     if df is None or df.empty: return df
+    val = df[rps_col].map(lambda x: f"{x:.1f}")
     if chg_col not in df.columns:
-        df[f'{rps_col}_Show'] = df[rps_col].map(lambda x: f"{x:.1f}")
+        df[f'{rps_col}_Show'] = val
         return df
 
-    def _fmt(row):
-        val = row[rps_col]
-        chg = row[chg_col]
-        if chg == 999: return f"{val:.1f} 🆕"
-        elif chg > 0: return f"{val:.1f} 🔺{abs(chg):.1f}"
-        elif chg < 0: return f"{val:.1f} 🔻{abs(chg):.1f}"
-        return f"{val:.1f} -"
-    
-    df[f'{rps_col}_Show'] = df.apply(_fmt, axis=1)
+    chg = df[chg_col]
+    delta = chg.abs().map(lambda x: f"{x:.1f}")
+    df[f'{rps_col}_Show'] = np.select(
+        [chg == 999, chg > 0, chg < 0],
+        [val + " 🆕", val + " 🔺" + delta, val + " 🔻" + delta],
+        default=val + " -",
+    )
     return df
 
-# ================= 新闻模块 =================
-@st.cache_data(ttl=300)
-def get_news_data():
+# 全市场排名：列式 Parquet，只读需要的列，分页渲染
+UNIVERSE_PATH = "data/universe_stocks.parquet"
+UNIVERSE_COLS = ['ts_code', 'name', '细分行业', 'price_now', 'RPS_50', 'RPS_120', 'RPS_250',
+                 'pe_ttm', 'mv_亿', 'turnover_rate', 'strong', '更新日期']
+PAGE_SIZE = 100
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_universe_version(path, mtime):
+    import pyarrow.parquet as pq
+    names = pq.read_schema(path).names
+    df = pd.read_parquet(path, columns=[c for c in UNIVERSE_COLS if c in names])
+    if 'RPS_50' in df.columns:
+        df = df.sort_values('RPS_50', ascending=False, ignore_index=True)
+    df['全市场排名'] = np.arange(1, len(df) + 1, dtype='int32')
+    opts = ["全部"]
+    if '细分行业' in df.columns:
+        opts += sorted(x for x in df['细分行业'].dropna().unique() if x != '-')
+    return df, opts, StockQueryEngine(df)
+
+def load_universe(path=UNIVERSE_PATH):
+    if not os.path.exists(path): return None
+    try:
+        return load_universe_version(path, os.path.getmtime(path))
+    except: return None
+
+# 板块强度：每晚按 行业 / 细分行业 汇总好的小表，看板只读不算
+SECTOR_PATH = "data/sectors.parquet"
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_sectors_version(path, mtime):
+    return pd.read_parquet(path)
+
+def load_sectors(path=SECTOR_PATH):
+    if not os.path.exists(path): return None
     try:
-        return st_ak.stock_info_global_cls()
-    except: return pd.DataFrame({"标题": ["接口繁忙"], "发布日期": ["-"], "内容": ["请稍后..."]})
+        return load_sectors_version(path, os.path.getmtime(path))
+    except: return None
+
+# ================= 新闻模块 =================
+# 大模型配置 (任何 OpenAI 兼容接口都可以，本地压测可指向 benchmarks/fake_llm_server.py)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://open.bigmodel.cn/api/paas/v4/")
+LLM_MODEL = os.getenv("LLM_MODEL", "glm-4-flash")
+# 同一条新闻的分析结果在进程内共享：保留多久 (秒)、最多多少条
+ANALYSIS_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+ANALYSIS_MAX_ENTRIES = int(os.getenv("LLM_CACHE_SIZE", "256"))
+
+NEWS_LIST_SIZE = 30
+CODE_RE = re.compile(r'^(\d{6})(\.[a-z]{2})?$', re.I)
+
+@st.cache_resource(show_spinner=False)
+def get_news_store():
+    """每个进程一份本地新闻库 + 一个后台拉取线程，页面请求不再联网"""
+    store = news_store.NewsStore()
+    ingester = news_store.Ingester(store)
+    # 库完全为空 (首次部署) 时先同步拉一次，之后全部由后台线程增量更新
+    if len(store) == 0: ingester.run_once()
+    ingester.start()
+    return store, ingester
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_stock_names(path, mtime):
+    names = pd.read_parquet(path, columns=['ts_code', 'name']) if path.endswith('.parquet') else pd.read_csv(path, usecols=['ts_code', 'name'])
+    return dict(zip(names['ts_code'].astype(str).str[:6], names['name'].astype(str)))
+
+def stock_name_of(code6):
+    for path in (UNIVERSE_PATH, "data/strong_stocks.csv"):
+        if os.path.exists(path):
+            try: return load_stock_names(path, os.path.getmtime(path)).get(code6)
+            except Exception: continue
+    return None
+
+def search_news(store, query, limit=NEWS_LIST_SIZE):
+    """关键词检索；输入股票代码时同时按代码和股票名搜"""
+    m = CODE_RE.match(query.strip())
+    if not m: return store.search(query, limit)
+    hits = set(store.search(m.group(1), limit))
+    name = stock_name_of(m.group(1))
+    if name: hits.update(store.search(name, limit))
+    return sorted(hits, reverse=True)[:limit]
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_chain(api_key, base_url=LLM_BASE_URL, model=LLM_MODEL):
+    """客户端和 chain 每个进程只建一次，所有会话共用；LLM 依赖 (约 1.5s) 到第一次点 AI 分析才导入"""
+    from langchain_openai import ChatOpenAI
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    llm = ChatOpenAI(api_key=api_key, base_url=base_url, model=model, streaming=True)
+    return ChatPromptTemplate.from_messages([("user", "分析新闻：{t}\n{c}\n给出利好/利空及相关A股龙头。")]) | llm | StrOutputParser()
+
+class AnalysisCache:
+    """带 TTL 的有界 LRU：key 是标题 + 内容的哈希，跨会话共享"""
+
+    def __init__(self, ttl=ANALYSIS_TTL, max_entries=ANALYSIS_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(title, content, model=LLM_MODEL):
+        return hashlib.sha1(f"{model}|{title}|{content}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit is None: return None
+            text, stored = hit
+            if time.time() - stored > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        with self.lock:
+            self.entries[key] = (text, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries: self.entries.popitem(last=False)
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_cache():
+    return AnalysisCache()
+
+def render_analysis(api_key, title, content):
+    cache = get_analysis_cache()
+    key = AnalysisCache.key(title, content)
+    text = cache.get(key)
+    if text is not None:
+        st.markdown(text)
+        st.caption("⚡ 缓存结果")
+        return
+    chain = get_analysis_chain(api_key)
+    # 边生成边输出，首个 token 到达即可显示
+    text = st.write_stream(chain.stream({"t": title, "c": content}))
+    if text: cache.put(key, text)
 
 def render_news_page():
     st.header("📰 实时新闻挖掘")
-    if "ZHIPU_API_KEY" in st.secrets: api_key = st.secrets["ZHIPU_API_KEY"]
-    else: api_key = os.getenv("ZHIPU_API_KEY", "")
+    # 没有 secrets.toml 时 st.secrets 会直接抛异常，回退到环境变量
+    try: api_key = st.secrets.get("ZHIPU_API_KEY", "")
+    except Exception: api_key = ""
+    api_key = api_key or os.getenv("ZHIPU_API_KEY", "")
 
-    with st.spinner('加载中...'): news_df = get_news_data()
-    if 'selected_idx' not in st.session_state: st.session_state.selected_idx = 0
-    
+    with st.spinner('加载中...'): store, ingester = get_news_store()
+    render_news_browser(store, ingester, api_key)
+
+# 搜索放进 fragment：换搜索词只重跑这一块，不再整页 st.rerun
+@st.fragment
+def render_news_browser(store, ingester, api_key):
+    query = st.text_input("🔍 搜新闻 (关键词 / 股票代码，空格分隔多个词)", key="news_q").strip()
+    positions = search_news(store, query) if query else store.latest(NEWS_LIST_SIZE)
+    # 选中项只占一个固定的 key，换一次搜索词就回到第一条
+    if st.session_state.get('news_sel_q') != query:
+        st.session_state['news_sel_q'] = query
+        st.session_state.pop('news_sel', None)
+    caption = f"本地库 {len(store)} 条" + (f"，后台拉取失败: {ingester.last_error}" if ingester.last_error else "")
+    render_news_pane(store.frame(positions), "检索结果" if query else "实时流", caption, api_key)
+
+# 列表 + 详情单独一个 fragment：切换新闻只重画这一块，不重新检索
+@st.fragment
+def render_news_pane(news_df, heading, caption, api_key):
     c1, c2 = st.columns([3, 7])
     with c1:
-        st.subheader("实时流")
-        for idx, row in news_df.head(30).iterrows():
-            if st.button(f"📄 {str(row['标题'])[:18]}...", key=f"n_{idx}", use_container_width=True, type="primary" if idx==st.session_state.selected_idx else "secondary"):
-                st.session_state.selected_idx = idx
-                st.rerun()
+        st.subheader(heading)
+        st.caption(caption)
+        if news_df.empty: st.info("没有匹配的新闻"); return
+        # 单个 radio 代替 30 个按钮：选中状态由控件自己保存
+        titles = news_df['标题'].astype(str).tolist()
+        times = news_df['发布时间'].astype(str).str[:5].tolist()
+        if st.session_state.get('news_sel', 0) >= len(news_df): st.session_state.pop('news_sel')
+        selected = st.radio("新闻列表", range(len(news_df)), key="news_sel",
+                            format_func=lambda i: f"📄 {times[i]} {titles[i][:18]}", label_visibility="collapsed")
     with c2:
-        if not news_df.empty:
-            cur = news_df.iloc[st.session_state.selected_idx]
-            st.markdown(f"### {cur['标题']}")
-            st.caption(f"{cur['发布日期']}")
-            st.info(cur['内容'])
-            if st.button("✨ AI 分析", type="primary"):
-                if not api_key: st.error("缺 API Key"); return
-                with st.spinner("分析中..."):
-                    llm = ChatOpenAI(api_key=api_key, base_url="https://open.bigmodel.cn/api/paas/v4/", model="glm-4-flash")
-                    chain = ChatPromptTemplate.from_messages([("user", "分析新闻：{t}\n{c}\n给出利好/利空及相关A股龙头。")]) | llm | StrOutputParser()
-                    st.markdown(chain.invoke({"t": cur['标题'], "c": cur['内容']}))
+        cur = news_df.iloc[selected]
+        render_news_detail(str(cur['标题']), str(cur['发布日期']), str(cur['内容']), api_key)
+
+# AI 分析按钮只重跑详情区
+@st.fragment
+def render_news_detail(title, date, content, api_key):
+    st.markdown(f"### {title}")
+    st.caption(date)
+    st.info(content)
+    if st.button("✨ AI 分析", type="primary"):
+        if not api_key: st.error("缺 API Key"); return
+        render_analysis(api_key, title, content)
 
 # ================= 个股页面 =================
-def render_stock_content(df):
+def render_stock_content(df, industry_opts=None, engine=None, trend=None):
     if df is None or df.empty: st.info("暂无数据"); return
     
     c1, c2, c3 = st.columns(3)
@@ -96,29 +341,29 @@ def render_stock_content(df):
         if 'pe_ttm' in df.columns:
             max_pe = sc3.slider("最大 PE(TTM)", 0, 200, 100)
             
-        opts = ["全部"] + sorted([x for x in df['细分行业'].dropna().unique() if x != '-']) if '细分行业' in df.columns else ["全部"]
+        # 行业选项随数据版本预先算好，这里只在未传入时兜底
+        opts = industry_opts or (["全部"] + sorted([x for x in df['细分行业'].dropna().unique() if x != '-']) if '细分行业' in df.columns else ["全部"])
         ind = sc4.selectbox("题材/行业", opts)
         kw = st.text_input("搜索代码/名称", placeholder="输入代码或名称...")
 
-    mask = (df['连续天数'] >= min_d) & (df['RPS_50'] >= min_rps)
-    
-    if 'pe_ttm' in df.columns:
-        mask &= (df['pe_ttm'] <= max_pe) & (df['pe_ttm'] > 0)
-        
-    if ind != "全部": 
-        mask &= (df['细分行业'] == ind)
-        
-    if kw: 
-        mask &= (df['ts_code'].astype(str).str.contains(kw) | df['name'].str.contains(kw))
-    
-    show_df = df[mask].sort_values('RPS_50', ascending=False).copy()
-    show_df = format_rps_show(show_df, 'RPS_50', 'rps_50_chg')
+    # 筛选走预建索引：区间二分 + 行业位图 + 代码/名称 n-gram，结果已按 RPS_50 排序
+    engine = engine or StockQueryEngine(df)
+    rows = engine.query(
+        min_days=min_d, min_rps=min_rps,
+        max_pe=max_pe if 'pe_ttm' in df.columns else None,
+        industry=ind if ind != "全部" else None,
+        keyword=kw,
+    )
+    show_df = df.iloc[rows]
+    if trend:
+        show_df = show_df.copy()
+        show_df['rps_trend'] = trend(show_df['ts_code'].astype(str))
 
     # 显示列
     cols = [
         'ts_code', 'name', '细分行业', 'price_now', 
         'pe_ttm', 'mv_亿', 'turnover_rate', 
-        'RPS_50_Show', 'RPS_120', 'RPS_250', '连续天数', 'xueqiu_url'
+        'RPS_50_Show', 'rps_trend', 'RPS_120', 'RPS_250', '连续天数', 'xueqiu_url'
     ]
     final_cols = [c for c in cols if c in show_df.columns]
 
@@ -128,8 +373,51 @@ def render_stock_content(df):
             "ts_code": st.column_config.TextColumn("代码"),
             "xueqiu_url": st.column_config.LinkColumn("雪球", display_text="❄️"),
             "RPS_50_Show": st.column_config.TextColumn("RPS 50 (变化)"),
+            "rps_trend": st.column_config.LineChartColumn("RPS 50 走势", y_min=0, y_max=100),
+            "RPS_120": st.column_config.NumberColumn("RPS_120", format="%.2f"),
+            "RPS_250": st.column_config.NumberColumn("RPS_250", format="%.2f"),
+            "细分行业": st.column_config.TextColumn("题材"),
+            "price_now": st.column_config.NumberColumn("现价", format="%.2f"),
+            "pe_ttm": st.column_config.NumberColumn("PE(TTM)", format="%.1f"),
+            "mv_亿": st.column_config.NumberColumn("市值(亿)", format="%.1f"),
+            "turnover_rate": st.column_config.NumberColumn("换手%", format="%.1f"),
+        },
+        use_container_width=True, hide_index=True, height=800
+    )
+
+# ================= 全市场页面 =================
+def render_universe_content(bundle):
+    if bundle is None: st.info("暂无全市场数据"); return
+    df, opts, engine = bundle
+    st.caption(f"共 {len(df)} 只，按 RPS 50 排名，更新: {df['更新日期'].iloc[0] if '更新日期' in df.columns else '-'}")
+
+    uc1, uc2, uc3 = st.columns([1, 1, 1.5])
+    min_rps = uc1.slider("最低 RPS 50", 0, 99, 0, key="u_rps")
+    ind = uc2.selectbox("行业", opts, key="u_ind")
+    kw = uc3.text_input("搜索代码/名称", placeholder="输入代码或名称...", key="u_kw")
+
+    rows = engine.query(min_rps=min_rps or None, industry=ind if ind != "全部" else None, keyword=kw)
+    n_pages = max(1, -(-len(rows) // PAGE_SIZE))
+    page = st.number_input(f"页码 (共 {n_pages} 页 / {len(rows)} 只)", 1, n_pages, 1, key="u_page")
+
+    # 只把当前页交给 st.dataframe，内存和渲染时间不随全市场规模增长
+    page_df = df.iloc[rows[(page - 1) * PAGE_SIZE: page * PAGE_SIZE]].copy()
+    page_df['xueqiu_url'] = links.xueqiu_urls(page_df['ts_code'])
+    cols = ['全市场排名', 'ts_code', 'name', '细分行业', 'price_now', 'RPS_50', 'RPS_120', 'RPS_250',
+            'pe_ttm', 'mv_亿', 'turnover_rate', 'strong', 'xueqiu_url']
+    final_cols = [c for c in cols if c in page_df.columns]
+
+    st.dataframe(
+        page_df[final_cols],
+        column_config={
+            "ts_code": st.column_config.TextColumn("代码"),
+            "xueqiu_url": st.column_config.LinkColumn("雪球", display_text="❄️"),
             "细分行业": st.column_config.TextColumn("题材"),
+            "strong": st.column_config.CheckboxColumn("强势"),
             "price_now": st.column_config.NumberColumn("现价", format="%.2f"),
+            "RPS_50": st.column_config.NumberColumn("RPS_50", format="%.2f"),
+            "RPS_120": st.column_config.NumberColumn("RPS_120", format="%.2f"),
+            "RPS_250": st.column_config.NumberColumn("RPS_250", format="%.2f"),
             "pe_ttm": st.column_config.NumberColumn("PE(TTM)", format="%.1f"),
             "mv_亿": st.column_config.NumberColumn("市值(亿)", format="%.1f"),
             "turnover_rate": st.column_config.NumberColumn("换手%", format="%.1f"),
@@ -137,18 +425,59 @@ def render_stock_content(df):
         use_container_width=True, hide_index=True, height=800
     )
 
+# ================= 板块页面 =================
+def render_sector_content(df):
+    if df is None or df.empty: st.info("暂无板块数据"); return
+    sc1, sc2, sc3 = st.columns([1, 1, 1.5])
+    level = sc1.radio("口径", ["行业", "细分行业"], horizontal=True, key="sec_level")
+    min_members = sc2.slider("最少成员数", 1, 50, 5, key="sec_min")
+    sort_by = sc3.selectbox("排序", ["RPS_50_median", "RPS_50_above", "breadth_chg", "strong"],
+                            format_func={"RPS_50_median": "RPS 50 中位数", "RPS_50_above": "RPS 50 强势占比",
+                                         "breadth_chg": "强势占比变化", "strong": "强势股数"}.get, key="sec_sort")
+    show = df[(df['level'] == level) & (df['members'] >= min_members)]
+    show = show.sort_values(sort_by, ascending=False, na_position='last')
+    note = "，细分行业只统计已抓到题材的股票" if level == "细分行业" else ""
+    st.caption(f"{len(show)} 个板块，共 {int(show['members'].sum())} 只{note}，更新: {df['更新日期'].iloc[0]}")
+
+    cols = ['sector', 'members', 'strong', 'RPS_50_median', 'RPS_50_mean', 'RPS_50_above', 'breadth_chg',
+            'RPS_120_median', 'RPS_120_above', 'RPS_250_median', 'RPS_250_above']
+    st.dataframe(
+        show[[c for c in cols if c in show.columns]],
+        column_config={
+            "sector": st.column_config.TextColumn("板块"),
+            "members": st.column_config.NumberColumn("成员数"),
+            "strong": st.column_config.NumberColumn("强势股"),
+            "RPS_50_median": st.column_config.NumberColumn("RPS 50 中位", format="%.1f"),
+            "RPS_50_mean": st.column_config.NumberColumn("RPS 50 均值", format="%.1f"),
+            "RPS_50_above": st.column_config.ProgressColumn("RPS 50 强势占比", format="%.0f%%", min_value=0, max_value=100),
+            "breadth_chg": st.column_config.NumberColumn("占比变化", format="%+.1f"),
+            "RPS_120_median": st.column_config.NumberColumn("RPS 120 中位", format="%.1f"),
+            "RPS_120_above": st.column_config.NumberColumn("RPS 120 占比%", format="%.0f"),
+            "RPS_250_median": st.column_config.NumberColumn("RPS 250 中位", format="%.1f"),
+            "RPS_250_above": st.column_config.NumberColumn("RPS 250 占比%", format="%.0f"),
+        },
+        use_container_width=True, hide_index=True, height=800
+    )
+
 # ================= ETF 页面 =================
-def render_etf_content(df):
+def render_etf_content(df, trend=None):
     if df is None or df.empty: st.info("暂无数据"); return
     
     st.success(f"📈 捕捉到 {len(df)} 只强势 ETF")
-    kw = st.text_input("🔍 搜 ETF")
-    show_df = df.copy()
+    ec1, ec2 = st.columns([1, 2])
+    # 资产类别由每晚的任务按名称分好 (etf_classes.py)，结果里有全部类别，默认只勾 KEEP_CLASSES；全不勾 = 全部
+    present = set(df['资产类别'].dropna()) if '资产类别' in df.columns else set()
+    classes = [c for c in etf_classes.CATEGORIES if c in present]
+    picked = ec1.multiselect("资产类别", classes, default=[c for c in etf_classes.KEEP_CLASSES if c in present], key="etf_cls")
+    kw = ec2.text_input("🔍 搜 ETF")
+    show_df = df
+    if picked: show_df = show_df[show_df['资产类别'].isin(picked)]
     if kw: show_df = show_df[show_df['name'].str.contains(kw) | show_df['ts_code'].str.contains(kw)]
+    if trend:
+        show_df = show_df.copy()
+        show_df['rps_trend'] = trend(show_df['ts_code'].astype(str))
     
-    show_df = format_rps_show(show_df, 'RPS_50', 'rps_50_chg')
-    
-    target_cols = ['ts_code', 'name', 'price_now', 'RPS_50_Show', 'RPS_120', 'RPS_250', 'xueqiu_url']
+    target_cols = ['ts_code', 'name', '资产类别', 'price_now', 'RPS_50_Show', 'rps_trend', 'RPS_120', 'RPS_250', 'xueqiu_url']
     final_cols = [c for c in target_cols if c in show_df.columns]
 
     st.dataframe(
@@ -157,12 +486,103 @@ def render_etf_content(df):
             "ts_code": st.column_config.TextColumn("代码"),
             "xueqiu_url": st.column_config.LinkColumn("雪球", display_text="❄️"),
             "RPS_50_Show": st.column_config.TextColumn("RPS 50 (变化)"),
+            "rps_trend": st.column_config.LineChartColumn("RPS 50 走势", y_min=0, y_max=100),
+            "RPS_120": st.column_config.NumberColumn("RPS_120", format="%.2f"),
+            "RPS_250": st.column_config.NumberColumn("RPS_250", format="%.2f"),
             "price_now": st.column_config.NumberColumn("现价", format="%.3f"),
         },
         use_container_width=True, hide_index=True, height=800
     )
 
+# ================= 盘中实时页面 =================
+# 临时排名：历史基准常驻内存，每隔 LIVE_REFRESH_SEC 拉一次全市场快照重排
+LIVE_REFRESH_SEC = int(os.getenv("LIVE_REFRESH_SEC", "30"))
+
+@st.cache_resource(show_spinner=False)
+def get_live_rps():
+    """每个进程一份：基准一天只建一次，快照拉取在所有会话之间节流"""
+    import intraday_rps  # 会初始化 tushare 客户端，只有打开实时开关才导入
+    return intraday_rps.LiveRPS(refresh_sec=LIVE_REFRESH_SEC)
+
+@st.fragment(run_every=LIVE_REFRESH_SEC)
+def render_live_content():
+    try:
+        with st.spinner("计算盘中排名..."): strong, updated = get_live_rps().strong()
+    except Exception as e:
+        st.warning(f"盘中数据暂不可用: {e}"); return
+    st.caption(f"⚡ 临时排名，收盘后以 18:00 结果为准 | 强势 {len(strong)} 只 | "
+               f"快照时间 {time.strftime('%H:%M:%S', time.localtime(updated))}，每 {LIVE_REFRESH_SEC} 秒刷新")
+    show_df = strong.copy()
+    show_df['xueqiu_url'] = links.xueqiu_urls(show_df['ts_code'])
+    cols = ['ts_code', 'name', 'industry', 'price_now', 'RPS_50', 'RPS_120', 'RPS_250', 'xueqiu_url']
+    st.dataframe(
+        show_df[[c for c in cols if c in show_df.columns]],
+        column_config={
+            "ts_code": st.column_config.TextColumn("代码"),
+            "xueqiu_url": st.column_config.LinkColumn("雪球", display_text="❄️"),
+            "industry": st.column_config.TextColumn("行业"),
+            "price_now": st.column_config.NumberColumn("现价", format="%.2f"),
+            "RPS_50": st.column_config.NumberColumn("RPS_50", format="%.2f"),
+            "RPS_120": st.column_config.NumberColumn("RPS_120", format="%.2f"),
+            "RPS_250": st.column_config.NumberColumn("RPS_250", format="%.2f"),
+        },
+        use_container_width=True, hide_index=True, height=800
+    )
+
+# ================= 运维页面 (隐藏，?page=ops 进入) =================
+REPORT_PATH = "data/run_reports.jsonl"
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_run_reports(path, mtime):
+    """按文件修改时间缓存：每行一次运行 (run_report.py 写入)"""
+    runs = pd.read_json(path, lines=True)
+    runs['started'] = pd.to_datetime(runs['started'])
+    return runs
+
+def render_ops_page():
+    st.header("🛠️ 运行报告")
+    if not os.path.exists(REPORT_PATH): st.info("暂无运行报告"); return
+    runs = load_run_reports(REPORT_PATH, os.path.getmtime(REPORT_PATH))
+    if runs.empty: st.info("暂无运行报告"); return
+
+    jobs = sorted(runs['job'].unique())
+    job = st.selectbox("任务", jobs, index=jobs.index('pipeline') if 'pipeline' in jobs else 0)
+    runs = runs[runs['job'] == job]
+    last = runs.iloc[-1]
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("最近一次", last['started'].strftime('%m-%d %H:%M'), last['status'])
+    c2.metric("总用时", f"{last['wall']:.1f}s")
+    c3.metric("接口调用", sum(a['calls'] for a in last['api'].values()))
+    c4.metric("峰值内存", f"{last['peak_rss_mb']:.0f} MB" if pd.notna(last['peak_rss_mb']) else "-")
+    if last['errors']: st.warning("；".join(last['errors']))
+
+    st.subheader("📈 历次运行")
+    trend = runs.set_index('started')[['wall', 'peak_rss_mb']].rename(columns={'wall': '总用时 (s)', 'peak_rss_mb': '峰值内存 (MB)'})
+    st.line_chart(trend)
+
+    st.subheader("⏱️ 最近一次各阶段耗时")
+    stages = pd.DataFrame(last['stages'])
+    if not stages.empty:
+        st.bar_chart(stages.groupby('name', sort=False)['seconds'].sum())
+
+    st.subheader("🌐 接口调用统计")
+    api = pd.DataFrame.from_dict(last['api'], orient='index')
+    if not api.empty:
+        api['avg_latency'] = api['seconds'] / api['calls'].where(api['calls'] > 0)
+        api['MB'] = api['bytes'] / 1024 / 1024
+        st.dataframe(api[['calls', 'errors', 'retries', 'avg_latency', 'max_latency', 'rows', 'MB']],
+                     column_config={
+                         "avg_latency": st.column_config.NumberColumn("平均延迟 (s)", format="%.3f"),
+                         "max_latency": st.column_config.NumberColumn("最大延迟 (s)", format="%.3f"),
+                         "MB": st.column_config.NumberColumn("MB", format="%.1f"),
+                     }, use_container_width=True)
+
 def main():
+    if st.query_params.get('page') == 'ops':
+        render_ops_page()
+        return
+
     with st.sidebar:
         st.title("Chilam.Club")
         page = st.radio("导航", ["📰 新闻挖掘", "🔥 强势股 (VIP)"], index=1)
@@ -177,14 +597,25 @@ def main():
 
     if page == "📰 新闻挖掘": render_news_page()
     else:
-        df_stock = load_data("data/strong_stocks.csv")
-        df_etf = load_data("data/strong_etfs.csv")
-        
+        # 只有日志比 CSV 新 (如 git pull 之后) 才重建，之后仍按文件修改时间命中缓存
+        for kind, path in DELTA_OUTPUTS.items(): delta_store.ensure_csv(kind, path)
         # ★★★ 修复需求 1：Tab 标签注明时间 ★★★
-        t1, t2 = st.tabs(["🐉 个股 (每天18:00更新)", "💰 ETF"])
+        t1, t2, t3, t4, t5 = st.tabs(["🐉 个股 (每天18:00更新)", "💰 ETF", "🌐 全市场排名", "🧭 板块强度", "⚡ 盘中实时"])
         
-        with t1: render_stock_content(df_stock)
-        with t2: render_etf_content(df_etf)
+        # 回看历史：只读选中那天的分区，切换日期命中 LRU 时不碰磁盘
+        with t1:
+            day = pick_day("stocks")
+            path = day_path("stocks", day)
+            render_stock_content(load_data(path, sort_col='RPS_50'), load_industry_options(path, sort_col='RPS_50'),
+                                 load_query_engine(path, sort_col='RPS_50'), trend_of("stocks", day))
+        with t2:
+            day = pick_day("etfs")
+            render_etf_content(load_data(day_path("etfs", day)), trend_of("etfs", day))
+        with t3: render_universe_content(load_universe())
+        with t4: render_sector_content(load_sectors())
+        with t5:
+            # 打开开关才开始拉实时快照和定时刷新，不看这个页签时不占资源
+            if st.toggle("开启盘中实时排名", key="live_on"): render_live_content()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,187 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import rps_backfill
+import ref_data
+import etf_classes
+
+# ================= 配置区 =================
+# 与 daily_rps_pro / daily_etf_pro 的 main_job 保持一致的默认规则
+THRESHOLD = 87
+ETF_RPS_120_MIN = 80
+RPS_N = [50, 120, 250]
+# 持有期 (交易日)
+HORIZONS = [5, 20]
+SWEEP_PATH = "data/cache/backtest_sweep.csv"
+
+# ================= 选股规则 =================
+# 规则统一写成 “入选分数”：某天 score > 阈值 即入选，NaN 永不入选
+# 这样一组阈值可以在同一次排序里全部算完
+
+def stock_rule_score(rps, windows):
+    """个股：所有窗口 RPS 都大于阈值 ⇔ 最小的那个 RPS 大于阈值"""
+    return np.min(np.stack([rps[n] for n in windows]), axis=0)
+
+def etf_rule_score(rps, windows, second_min=ETF_RPS_120_MIN):
+    """ETF：RPS_短 > 阈值 且 RPS_中 > second_min"""
+    short, mid = windows[0], windows[1]
+    return np.where(rps[mid] > second_min, rps[short], np.nan)
+
+# ================= 向量化指标 =================
+
+def forward_returns(close, horizon):
+    """t 日收盘买入、持有 horizon 天后的收益，末尾不足的为 NaN"""
+    fwd = np.full_like(close, np.nan)
+    if horizon < len(close):
+        fwd[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return fwd
+
+def etf_keep_mask(codes, classes=etf_classes.KEEP_CLASSES):
+    """
+    候选池：场内基金列表里有、且资产类别在 classes 内的才可入选 (默认与看板 ETF 页的默认类别一致)
+    RPS 仍按全部基金排名 (和实盘一致)，过滤只作用在入选和对比的候选池上
+    """
+    basic = ref_data.fund_basic()[['ts_code', 'name']].drop_duplicates('ts_code', keep='last')
+    labels = pd.Series(etf_classes.asset_classes(basic).to_numpy(), index=basic['ts_code'].to_numpy())
+    return labels.reindex(codes).isin(classes).to_numpy()
+
+def _count_above(score, thresholds):
+    """
+    对每个交易日、每个阈值，数出 score > 阈值 的只数，同时返回降序排列下标
+    分数都在 0~100，给每行加上 行号*1000 的偏移后摊平，就能用一次 searchsorted 完成二维查找
+    """
+    filled = np.where(np.isnan(score), -1.0, score).astype(np.float64)
+    order = np.argsort(-filled, axis=1, kind='stable')
+    asc = np.sort(filled, axis=1)
+    n_days, n_codes = filled.shape
+    offset = (np.arange(n_days) * 1000.0)[:, None]
+    flat = (asc + offset).ravel()
+    keys = (np.asarray(thresholds, dtype=np.float64)[None, :] + offset).ravel()
+    pos = np.searchsorted(flat, keys, side='right').reshape(n_days, -1)
+    counts = (np.arange(1, n_days + 1) * n_codes)[:, None] - pos
+    return counts, order
+
+def _take_prefix(cum, counts):
+    """cum 是按分数降序的累计和，取前 counts 个的合计 (counts 为 0 时取 0)"""
+    padded = np.concatenate([np.zeros((len(cum), 1)), cum], axis=1)
+    return np.take_along_axis(padded, counts, axis=1)
+
+def sweep(score, fwd, thresholds):
+    """
+    一次性评估一组阈值：平均入选数、篮子平均收益、相对全市场超额、胜率、换手率
+    返回 DataFrame，每个阈值一行
+    """
+    counts, order = _count_above(score, thresholds)
+    fwd_sorted = np.take_along_axis(fwd, order, axis=1)
+    valid = ~np.isnan(fwd_sorted)
+    ret_sum = _take_prefix(np.cumsum(np.where(valid, fwd_sorted, 0), axis=1), counts)
+    ret_n = _take_prefix(np.cumsum(valid, axis=1), counts)
+    hits = _take_prefix(np.cumsum(valid & (fwd_sorted > 0), axis=1), counts)
+
+    # 换手：昨天和今天都入选 ⇔ 两天分数的较小值也大于阈值
+    both = np.full_like(score, np.nan)
+    both[1:] = np.minimum(score[1:], score[:-1])
+    overlap, _ = _count_above(both, thresholds)
+
+    # 没有任何入选/全市场都没有远期收益的日子会产生全 NaN 切片，这里静默忽略
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        basket_ret = np.where(ret_n > 0, ret_sum / ret_n, np.nan)
+        market_ret = np.nanmean(fwd, axis=1)[:, None]
+        turnover = np.where(counts[1:] > 0, 1 - overlap[1:] / counts[1:], np.nan)
+        total_n = ret_n.sum(axis=0)
+        return pd.DataFrame({
+            'threshold': thresholds,
+            'avg_picks': counts.mean(axis=0),
+            'mean_fwd_ret': np.nanmean(basket_ret, axis=0),
+            'excess_ret': np.nanmean(basket_ret - market_ret, axis=0),
+            'hit_rate': np.where(total_n > 0, hits.sum(axis=0) / total_n, np.nan),
+            'turnover': np.nanmean(turnover, axis=0),
+            'active_days': (counts > 0).sum(axis=0),
+        })
+
+# ================= 并行参数扫描 =================
+
+_CLOSE = None
+_KEEP = None
+
+def _init_worker(close, keep=None):
+    global _CLOSE, _KEEP
+    _CLOSE, _KEEP = close, keep
+
+def run_config(task):
+    """子进程：算出该窗口组合的 RPS，再对所有阈值 × 持有期一次性回测"""
+    rule, windows, second_mins, thresholds, horizons = task
+    rps = rps_backfill.compute_rps_matrix(_CLOSE, sorted(set(windows)))
+    fwds = {h: forward_returns(_CLOSE, h) for h in horizons}
+    if _KEEP is not None:
+        rps = {n: r[:, _KEEP] for n, r in rps.items()}
+        fwds = {h: f[:, _KEEP] for h, f in fwds.items()}
+    frames = []
+    for second_min in (second_mins if rule == 'etf' else [np.nan]):
+        score = stock_rule_score(rps, windows) if rule == 'stock' else etf_rule_score(rps, windows, second_min)
+        for h in horizons:
+            res = sweep(score, fwds[h], thresholds)
+            res.insert(0, 'horizon', h)
+            res.insert(0, 'second_min', second_min)
+            res.insert(0, 'windows', ','.join(map(str, windows)))
+            frames.append(res)
+    return pd.concat(frames, ignore_index=True)
+
+def run_sweep(close, rule, window_sets, thresholds, horizons, second_mins=(ETF_RPS_120_MIN,), workers=None, keep=None):
+    """
+    按窗口组合分发到多个进程，阈值 / 持有期 / ETF 第二阈值在进程内向量化
+    keep: 可入选列的布尔掩码 (ETF 的资产类别过滤)，None 为全部
+    """
+    tasks = [(rule, tuple(ws), list(second_mins), list(thresholds), list(horizons)) for ws in window_sets]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(close, keep)) as executor:
+        results = list(executor.map(run_config, tasks))
+    return pd.concat(results, ignore_index=True)
+
+def _int_list(text):
+    return [int(x) for x in text.split(',') if x]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RPS 强势筛选规则回测 / 参数扫描")
+    parser.add_argument('--rule', default='stock', choices=['stock', 'etf'])
+    parser.add_argument('--window-sets', default=','.join(map(str, RPS_N)),
+                        help="分号分隔多组窗口，如 '50,120,250;20,60,120'")
+    parser.add_argument('--thresholds', default=str(THRESHOLD), help="逗号分隔或 起:止:步长，如 70:99:1")
+    parser.add_argument('--second-mins', default=str(ETF_RPS_120_MIN), help="ETF 规则中 RPS_中 的下限，可多个")
+    parser.add_argument('--horizons', default=','.join(map(str, HORIZONS)))
+    parser.add_argument('--classes', default=','.join(etf_classes.KEEP_CLASSES), help="ETF 候选池的资产类别，逗号分隔")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=SWEEP_PATH)
+    args = parser.parse_args(argv)
+
+    if ':' in args.thresholds:
+        lo, hi, step = (float(x) for x in args.thresholds.split(':'))
+        thresholds = list(np.arange(lo, hi + step / 2, step))
+    else:
+        thresholds = [float(x) for x in args.thresholds.split(',')]
+    window_sets = [_int_list(ws) for ws in args.window_sets.split(';')]
+
+    dates, codes, close = rps_backfill.load_close_matrix('stock' if args.rule == 'stock' else 'etf')
+    if not dates:
+        print("⚠️ 本地行情仓库为空，请先运行 rps_backfill.py --fetch-years")
+        return
+    keep = etf_keep_mask(codes, args.classes.split(',')) if args.rule == 'etf' else None
+    if keep is not None:
+        print(f"🏷️ 资产类别过滤 ({args.classes})：{int(keep.sum())}/{len(codes)} 只可入选")
+    print(f"🧪 回测 {len(dates)} 天 × {len(codes)} 只，{len(window_sets)} 组窗口 × {len(thresholds)} 个阈值...")
+    t0 = time.perf_counter()
+    res = run_sweep(close, args.rule, window_sets, thresholds, _int_list(args.horizons),
+                    [float(x) for x in args.second_mins.split(',')], args.workers, keep)
+    print(f"✅ {len(res)} 组结果，用时 {time.perf_counter() - t0:.1f}s")
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    res.round(4).to_csv(args.out, index=False)
+    print(res.sort_values('excess_ret', ascending=False).head(10).round(4).to_string(index=False))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
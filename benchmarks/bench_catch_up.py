@@ -0,0 +1,76 @@
+"""
+补跑基准：合成市场上漏了 N 个交易日，对比
+  - 补跑模式 (main_job 自动发现缺口，并发拉取 + 按日期顺序接连榜)
+  - 逐天补 (每天单独跑一遍)
+  - 一次正常的单日运行
+并检查两种补法最终的 strong_stocks.csv 完全一致 (连续天数、rps_50_chg 都对得上)；
+另有周末场景：上次停在倒数第二个交易日，周末由 pipeline (带锚点) 启动，最新交易日也要补上
+
+用法 (仓库根目录): python benchmarks/bench_catch_up.py [漏掉的天数]
+每种方式在独立的临时目录 + 子进程里跑，本地行情仓库和行业缓存都是冷的
+"""
+import os
+import sys
+import tempfile
+import subprocess
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = r'''
+import sys, time, types, datetime
+sys.path.insert(0, {repo!r})
+import daily_rps_pro as m
+mode, missed = sys.argv[1], int(sys.argv[2])
+today = datetime.datetime.now().strftime('%Y%m%d')
+cal = sorted(m.pro.trade_cal(exchange='', is_open='1', start_date='20000101', end_date=today)['cal_date'], reverse=True)
+if mode != 'single':
+    m.catch_up_job([cal[missed]], cal)   # 漏跑之前最后一次成功的结果
+if mode == 'weekend':
+    # 系统日期挪到最新交易日的第二天 (非交易日)，像 pipeline 一样先取好锚点再传进去
+    class Weekend(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None): return datetime.datetime.now(tz) + datetime.timedelta(days=1)
+    m.datetime = types.SimpleNamespace(datetime=Weekend, timedelta=datetime.timedelta)
+    dates = m.get_trading_dates(Weekend.now().strftime('%Y%m%d'))
+    print('LATEST', m.to_fmt(cal[0]))
+t0 = time.perf_counter()
+if mode == 'catch-up': m.main_job()
+elif mode == 'weekend': m.main_job(dates)
+elif mode == 'daily':
+    for d in sorted(cal[:missed]): m.catch_up_job([d], cal)
+else: m.main_job()
+print('ELAPSED', time.perf_counter() - t0)
+'''
+
+def run(mode, missed, workdir):
+    os.makedirs(os.path.join(workdir, 'data'))
+    env = dict(os.environ, CHILAM_DATA_SOURCE='synthetic')
+    env.setdefault('CHILAM_FAKE_LATENCY_MS', '150')
+    env.setdefault('TUSHARE_CALLS_PER_MIN', '100000')
+    out = subprocess.run([sys.executable, '-c', SCRIPT.format(repo=REPO), mode, str(missed)],
+                         cwd=workdir, env=env, capture_output=True, text=True, check=True).stdout
+    tags = dict(line.split(' ', 1) for line in out.splitlines() if line.startswith(('ELAPSED', 'LATEST')))
+    return float(tags['ELAPSED']) if mode != 'weekend' else tags['LATEST']
+
+def check_weekend(workdir):
+    """周末启动时只差最新一个交易日，也必须补上 (不能因为 上次 == prev 就跳过)"""
+    latest = run('weekend', 1, workdir)
+    got = pd.read_csv(os.path.join(workdir, 'data', 'strong_stocks.csv'))['更新日期'].astype(str)
+    assert (got == latest).all(), f"周末启动没有补上 {latest}: {sorted(got.unique())}"
+    return latest
+
+def main(missed=5):
+    print(f"🩹 漏掉 {missed} 个交易日 (延迟 {os.environ.get('CHILAM_FAKE_LATENCY_MS', '150')} ms/请求)")
+    with tempfile.TemporaryDirectory() as tmp:
+        times = {mode: run(mode, missed, os.path.join(tmp, mode)) for mode in ('single', 'daily', 'catch-up')}
+        a = pd.read_csv(os.path.join(tmp, 'catch-up', 'data', 'strong_stocks.csv'))
+        b = pd.read_csv(os.path.join(tmp, 'daily', 'data', 'strong_stocks.csv'))
+        pd.testing.assert_frame_equal(a, b)
+    print(f"   一次正常运行 {times['single']:.1f}s | 逐天补 {times['daily']:.1f}s | 补跑模式 {times['catch-up']:.1f}s")
+    print(f"   补跑结果与逐天补一致 ({len(a)} 只，最长连榜 {a['连续天数'].max()} 天)")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"   周末由 pipeline 启动：补上最新交易日 {check_weekend(os.path.join(tmp, 'weekend'))} ✅")
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
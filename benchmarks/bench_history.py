@@ -0,0 +1,200 @@
+"""
+历史合并基准：iterrows 旧版 vs 向量化新版 (5,000 行)
+
+用法 (仓库根目录): python benchmarks/bench_history.py [行数]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import daily_rps_pro
+import daily_etf_pro
+
+# ================= 旧版实现 (逐行 iterrows，仅作对照) =================
+
+def legacy_process_history_and_change(new_df, file_path, date_str):
+    """
+    date_str: 这里必须传入【真实的交易日期】，而不是系统日期
+    """
+    history_map = {}
+    yesterday_rps_map = {}
+    today_change_map = {}
+    
+    if os.path.exists(file_path):
+        try:
+            old_df = pd.read_csv(file_path)
+            old_df['更新日期'] = old_df['更新日期'].astype(str)
+            
+            for _, row in old_df.iterrows():
+                code = row['ts_code']
+                last_update = row.get('更新日期', '')
+                
+                history_map[code] = {
+                    'first': row.get('初次入选', date_str),
+                    'days': row.get('连续天数', 0),
+                    'last_update': last_update
+                }
+
+                # 智能继承变动值逻辑
+                if last_update == date_str:
+                    if 'rps_50_chg' in row:
+                        today_change_map[code] = row['rps_50_chg']
+                else:
+                    if 'RPS_50' in row:
+                        yesterday_rps_map[code] = row['RPS_50']
+                        
+        except Exception as e:
+            print(f"⚠️ 读取历史文件微瑕: {e}")
+
+    res = []
+    for _, row in new_df.iterrows():
+        code = row['ts_code']
+        first_date = date_str
+        days_count = 1
+        
+        # 连板逻辑
+        if code in history_map:
+            hist = history_map[code]
+            # 如果上次更新日期 == 今天的交易日期 -> 说明今天已经跑过一次了，天数不加
+            # 如果上次更新日期 != 今天的交易日期 -> 说明是新的一天交易日，天数+1
+            if hist['last_update'] == date_str:
+                days_count = hist['days']
+                first_date = hist['first']
+            else:
+                days_count = hist['days'] + 1
+                first_date = hist['first']
+        
+        row['初次入选'] = first_date
+        row['连续天数'] = days_count
+        
+        # 变动值逻辑
+        if code in today_change_map:
+            row['rps_50_chg'] = today_change_map[code]
+        elif code in yesterday_rps_map:
+            row['rps_50_chg'] = row['RPS_50'] - yesterday_rps_map[code]
+        else:
+            row['rps_50_chg'] = 999 
+            
+        # 雪球链接
+        if '.' in code:
+            num, suffix = code.split('.')
+            link_code = suffix.upper() + num 
+            row['xueqiu_url'] = f"https://xueqiu.com/S/{link_code}"
+        else:
+            row['xueqiu_url'] = ""
+            
+        res.append(row)
+    return pd.DataFrame(res)
+
+def legacy_process_etf_history_and_links(new_df, file_path):
+    """
+    1. 读取旧文件，计算 RPS 50 的变动值
+    2. 生成雪球 (Xueqiu) 跳转链接
+    """
+    rps_prev_map = {}
+    
+    # --- 1. 读取旧数据 (如果存在) ---
+    if os.path.exists(file_path):
+        try:
+            old_df = pd.read_csv(file_path)
+            for _, row in old_df.iterrows():
+                # 记录昨天的 RPS_50
+                if 'RPS_50' in row:
+                    rps_prev_map[row['ts_code']] = row['RPS_50']
+        except Exception as e:
+            print(f"⚠️ 读取旧文件失败，跳过对比: {e}")
+
+    # --- 2. 处理新数据 ---
+    res = []
+    for _, row in new_df.iterrows():
+        code = row['ts_code']
+        
+        # ★ 计算 RPS 变动 (今天 - 昨天)
+        if code in rps_prev_map:
+            change = row['RPS_50'] - rps_prev_map[code]
+            row['rps_50_chg'] = change
+        else:
+            # 999 代表新上榜 (New)
+            row['rps_50_chg'] = 999 
+            
+        # ★ 生成雪球链接
+        # Tushare 格式: 510050.SH -> 雪球格式: SH510050
+        if '.' in code:
+            num, suffix = code.split('.')
+            link_code = suffix.upper() + num 
+            row['xueqiu_url'] = f"https://xueqiu.com/S/{link_code}"
+        else:
+            row['xueqiu_url'] = ""
+            
+        res.append(row)
+        
+    return pd.DataFrame(res)
+
+# ================= 合成数据 =================
+
+def make_frames(n_rows, date_str, seed=0):
+    """新表 n_rows 行；旧表一半与新表重叠，其中一部分是同日重跑的记录"""
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"{i:06d}.{'SH' if i % 2 else 'SZ'}" for i in range(n_rows * 3 // 2)])
+    new_codes = codes[:n_rows]
+    new_df = pd.DataFrame({
+        'ts_code': new_codes,
+        'name': [f"股票{i}" for i in range(n_rows)],
+        'RPS_50': rng.uniform(87, 100, n_rows).round(2),
+        'RPS_120': rng.uniform(87, 100, n_rows).round(2),
+        'RPS_250': rng.uniform(87, 100, n_rows).round(2),
+        '更新日期': date_str,
+    })
+    old_codes = codes[n_rows // 2:]
+    n_old = len(old_codes)
+    old_df = pd.DataFrame({
+        'ts_code': old_codes,
+        'RPS_50': rng.uniform(87, 100, n_old).round(2),
+        'rps_50_chg': rng.uniform(-5, 5, n_old).round(2),
+        '连续天数': rng.integers(1, 30, n_old),
+        '更新日期': np.where(rng.random(n_old) < 0.2, date_str, '2026-01-30'),
+        '初次入选': '2026-01-02',
+    })
+    return new_df, old_df
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def same_output(a, b):
+    cols = list(a.columns)
+    a = a[cols].reset_index(drop=True).round(2).to_csv(index=False)
+    b = b[cols].reset_index(drop=True).round(2).to_csv(index=False)
+    return a == b
+
+def main(n_rows=5000):
+    date_str = '2026-02-02'
+    new_df, old_df = make_frames(n_rows, date_str)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'old.csv')
+        old_df.to_csv(path, index=False)
+
+        cases = [
+            ('个股 process_history_and_change', legacy_process_history_and_change,
+             daily_rps_pro.process_history_and_change, (new_df, path, date_str)),
+            ('ETF process_etf_history_and_links', legacy_process_etf_history_and_links,
+             daily_etf_pro.process_etf_history_and_links, (new_df, path)),
+        ]
+        print(f"📏 {n_rows} 行基准")
+        for label, old_fn, new_fn, args in cases:
+            t_old, out_old = timed(old_fn, *args, repeat=1)
+            t_new, out_new = timed(new_fn, *args)
+            ok = "✅ 结果一致" if same_output(out_old, out_new) else "❌ 结果不一致"
+            print(f"   {label}: 旧版 {t_old * 1000:.1f} ms, 新版 {t_new * 1000:.2f} ms, "
+                  f"加速 {t_old / t_new:.0f}x  {ok}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
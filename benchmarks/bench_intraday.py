@@ -0,0 +1,52 @@
+"""
+盘中实时 RPS 基准：合成全市场上每次刷新的 快照对齐 + 涨幅 + 截面排名 耗时，
+并用收盘价当「实时价」和 calculate_rps_logic 的日终结果逐只对比
+
+用法 (仓库根目录): python benchmarks/bench_intraday.py [刷新次数]
+"""
+import os
+import sys
+import time
+import datetime
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('CHILAM_DATA_SOURCE', 'synthetic')
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+def main(ticks=50):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CHILAM_HISTORY_DIR'] = os.path.join(tmp, 'history')
+        import daily_rps_pro
+        import intraday_rps
+
+        dates = daily_rps_pro.get_trading_dates(datetime.datetime.now().strftime('%Y%m%d'))
+        t0 = time.perf_counter()
+        bases = intraday_rps.build_bases(dict(dates, prev=None))
+        print(f"📏 {len(bases)} 只，窗口 {bases.windows}，建基准 {time.perf_counter() - t0:.2f}s (只在开盘前一次)")
+
+        # 对照：实时价 = 当天收盘价，结果应与日终计算一致
+        now = daily_rps_pro.get_snapshot(dates['now'])
+        spot = pd.DataFrame({'代码': now['ts_code'].str[:6], '最新价': now['display_val']})
+        live = intraday_rps.compute_live_rps(bases, intraday_rps.spot_prices(bases, spot)).set_index('ts_code')
+        ref = daily_rps_pro.calculate_rps_logic(dates).set_index('ts_code')
+        worst = max(float(np.nanmax(np.abs(live[f'RPS_{n}'] - ref[f'RPS_{n}'].reindex(live.index))))
+                    for n in bases.windows)
+        print(f"   与日终 RPS 最大偏差: {worst:.4f} 分 (float32 精度内)")
+
+        # 每次刷新：在收盘价上加扰动模拟盘中价格
+        rng = np.random.default_rng(0)
+        wall = []
+        for _ in range(ticks):
+            spot['最新价'] = (now['display_val'] * (1 + rng.normal(0, 0.01, len(now)))).round(2)
+            t0 = time.perf_counter()
+            df = intraday_rps.compute_live_rps(bases, intraday_rps.spot_prices(bases, spot))
+            wall.append(time.perf_counter() - t0)
+        print(f"   每次刷新 中位 {statistics.median(wall) * 1000:.1f} ms，"
+              f"最慢 {max(wall) * 1000:.1f} ms，强势 {int(df['strong'].sum())} 只")
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,84 @@
+"""
+新闻页 AI 分析基准：对着本地假大模型比较
+  - 旧写法：每次点击新建 ChatOpenAI + chain，invoke 等完整回答
+  - 新写法：进程内共享 chain，stream 首 token 即显示，结果按标题+内容缓存
+并用 AppTest 验证两个会话分析同一条新闻只请求一次大模型。
+
+用法 (仓库根目录): python benchmarks/bench_llm.py
+"""
+import os
+import sys
+import time
+import json
+import urllib.request
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.join(REPO, 'benchmarks'))
+import fake_llm_server
+
+server, llm = fake_llm_server.serve()
+BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+os.environ['LLM_BASE_URL'] = BASE_URL
+os.environ['ZHIPU_API_KEY'] = 'fake'
+os.environ.setdefault('CHILAM_DATA_SOURCE', 'synthetic')
+
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+PROMPT = [("user", "分析新闻：{t}\n{c}\n给出利好/利空及相关A股龙头。")]
+NEWS = {"t": "【合成快讯】半导体板块异动", "c": "半导体板块午后走强。"}
+
+def old_click():
+    """原 render_news_page 的写法"""
+    t0 = time.perf_counter()
+    llm_client = ChatOpenAI(api_key='fake', base_url=BASE_URL, model="glm-4-flash")
+    chain = ChatPromptTemplate.from_messages(PROMPT) | llm_client | StrOutputParser()
+    chain.invoke(NEWS)
+    total = time.perf_counter() - t0
+    return total, total
+
+def new_click(chain):
+    t0 = time.perf_counter()
+    first = None
+    for _ in chain.stream(NEWS):
+        if first is None: first = time.perf_counter() - t0
+    return first, time.perf_counter() - t0
+
+def server_requests():
+    with urllib.request.urlopen(f"{BASE_URL}/stats") as r:
+        return json.load(r)['requests']
+
+def bench_latency(repeat=5):
+    chain = ChatPromptTemplate.from_messages(PROMPT) | ChatOpenAI(
+        api_key='fake', base_url=BASE_URL, model="glm-4-flash", streaming=True) | StrOutputParser()
+    for label, fn in [("旧: 新建 + invoke", old_click), ("新: 共享 + stream", lambda: new_click(chain))]:
+        runs = [fn() for _ in range(repeat)]
+        first = min(r[0] for r in runs)
+        total = min(r[1] for r in runs)
+        print(f"   {label:<16} 首字 {first * 1000:7.0f} ms   完整 {total * 1000:7.0f} ms")
+
+def bench_cache():
+    from streamlit.testing.v1 import AppTest
+    before = server_requests()
+    timings = []
+    for session in range(2):
+        at = AppTest.from_file(os.path.join(REPO, 'app.py'), default_timeout=60)
+        at.run()
+        at.sidebar.radio[0].set_value("📰 新闻挖掘").run()
+        t0 = time.perf_counter()
+        next(b for b in at.button if b.label == "✨ AI 分析").click().run()
+        timings.append(time.perf_counter() - t0)
+        assert not at.exception, at.exception
+    calls = server_requests() - before
+    ok = "✅" if calls == 1 else "❌"
+    print(f"   两个会话分析同一条新闻：大模型请求 {calls} 次 {ok}，"
+          f"首次 {timings[0] * 1000:.0f} ms，命中缓存 {timings[1] * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    print(f"🤖 假大模型 {BASE_URL} (首 token {fake_llm_server.FIRST_TOKEN_MS:.0f} ms, "
+          f"{fake_llm_server.N_TOKENS} tokens x {fake_llm_server.TOKEN_MS:.0f} ms)")
+    bench_latency()
+    bench_cache()
+    server.shutdown()
@@ -0,0 +1,67 @@
+"""
+新闻检索基准：pandas str.contains 全表扫描 vs NewsStore 倒排索引 (单字 + 二字)
+
+用法 (仓库根目录): python benchmarks/bench_news.py [条数]
+"""
+import os
+import sys
+import time
+import tempfile
+import datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import news_store
+
+INDUSTRIES = ['半导体', '通信设备', '有色金属', '化肥行业', '电力', '黄金', '软件开发', '医疗器械']
+QUERIES = ['半导体', '涨停', '600519', '合成股1234', '电力 涨停', '不存在的词']
+
+def make_feed(n, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime.now() - datetime.timedelta(days=40)
+    rows = []
+    for k in range(n):
+        t = start + datetime.timedelta(minutes=3 * k)
+        ind = INDUSTRIES[rng.integers(len(INDUSTRIES))]
+        stock = rng.integers(0, 5000)
+        rows.append({'标题': f"【快讯{k}】{ind}板块异动", '内容': f"{ind}板块午后走强，合成股{stock} ({600000 + stock}) 涨停，成交额放大至{rng.integers(1, 99)}亿元。",
+                     '发布日期': t.strftime('%Y-%m-%d'), '发布时间': t.strftime('%H:%M:%S')})
+    return pd.DataFrame(rows)
+
+def pandas_search(df, query):
+    mask = pd.Series(True, index=df.index)
+    text = df['标题'] + '\n' + df['内容']
+    for term in query.lower().split():
+        mask &= text.str.lower().str.contains(term, regex=False)
+    return df.index[mask][::-1]
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main(n=20000):
+    feed = make_feed(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = news_store.NewsStore(root=tmp)
+        t0 = time.perf_counter()
+        added = store.ingest(feed)
+        t_ingest = time.perf_counter() - t0
+        again = store.ingest(feed.head(300))
+        t0 = time.perf_counter()
+        reloaded = news_store.NewsStore(root=tmp)
+        t_load = time.perf_counter() - t0
+    print(f"📰 {n} 条：入库 {t_ingest:.2f}s (新增 {added}，重复拉取再入库新增 {again})，"
+          f"冷启动重建索引 {t_load:.2f}s ({len(reloaded)} 条)")
+    for q in QUERIES:
+        t_old, ref = best_of(lambda: pandas_search(feed, q))
+        t_new, out = best_of(lambda: reloaded.search(q, limit=n))
+        ok = "✅" if list(ref) == out else "❌"
+        print(f"   '{q}': pandas {t_old * 1000:7.2f} ms, 索引 {t_new * 1000:6.2f} ms, 命中 {len(out)} 条 {ok}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,160 @@
+"""
+新闻页交互基准：起一个真实的 streamlit 服务，用 websocket 按前端协议脚本化点击，
+测量「切换一条新闻」从发出到服务端跑完的耗时，以及服务端推回的元素增量条数/字节数。
+
+AppTest 不区分整页重跑和 fragment 重跑，所以这里直接走 /_stcore/stream (需要额外 pip install websockets)。
+
+用法 (仓库根目录):
+    python benchmarks/bench_news_page.py                 # 只测当前 app.py
+    python benchmarks/bench_news_page.py --baseline REV  # 同时测 git 某个版本的 app.py 作对比
+"""
+import os
+import sys
+import time
+import asyncio
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAV_LABEL = "导航"
+NEWS_PAGE = "📰 新闻挖掘"
+LIST_LABEL = "新闻列表"
+
+DONE = {ForwardMsg.ScriptFinishedStatus.FINISHED_SUCCESSFULLY,
+        ForwardMsg.ScriptFinishedStatus.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+        ForwardMsg.ScriptFinishedStatus.FINISHED_WITH_COMPILE_ERROR}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class Session:
+    """最小化的 streamlit 前端：维护控件状态，发送重跑请求并收集返回的增量"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.widgets = {}      # id -> (label, 元素类型, 元素 proto, fragment_id)
+        self.states = {}       # id -> WidgetState，每次重跑都全量带上 (和浏览器一致)
+
+    async def rerun(self, fragment_id='', trigger=None):
+        msg = BackMsg()
+        states = list(self.states.values()) + ([trigger] if trigger else [])
+        msg.rerun_script.widget_states.widgets.extend(states)
+        msg.rerun_script.fragment_id = fragment_id
+        t0 = time.perf_counter()
+        await self.conn.send(msg.SerializeToString())
+        deltas, nbytes = 0, 0
+        while True:
+            raw = await self.conn.recv()
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            nbytes += len(raw)
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta':
+                deltas += 1
+                self._track(fwd.delta)
+            elif kind == 'script_finished' and fwd.script_finished in DONE:
+                return time.perf_counter() - t0, deltas, nbytes
+
+    def _track(self, delta):
+        if delta.WhichOneof('type') != 'new_element': return
+        el = delta.new_element
+        kind = el.WhichOneof('type')
+        proto = getattr(el, kind)
+        if hasattr(proto, 'id') and proto.id:
+            self.widgets[proto.id] = (getattr(proto, 'label', ''), kind, proto, delta.fragment_id)
+
+    def find(self, kind, label=None, prefix=None):
+        for wid, (lab, k, proto, frag) in self.widgets.items():
+            if k != kind: continue
+            if label is not None and lab != label: continue
+            if prefix is not None and not lab.startswith(prefix): continue
+            return wid, proto, frag
+        return None
+
+    def set_radio(self, wid, index):
+        # radio 以选项文本回传
+        state = WidgetState(id=wid)
+        state.string_value = self.widgets[wid][2].options[index]
+        self.states[wid] = state
+
+async def drive(port, clicks):
+    conn = await websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=['streamlit'], max_size=None)
+    s = Session(conn)
+    await s.rerun()
+    nav = s.find('radio', label=NAV_LABEL)
+    s.set_radio(nav[0], list(nav[1].options).index(NEWS_PAGE))
+    cold = await s.rerun()
+    timings = []
+    for k in range(clicks):
+        target = 1 + k % 10
+        radio = s.find('radio', label=LIST_LABEL)
+        if radio:
+            # 新写法：radio 在 fragment 里，只重跑该 fragment
+            wid, _, frag = radio
+            s.set_radio(wid, target)
+            timings.append(await s.rerun(fragment_id=frag))
+        else:
+            # 旧写法：点标题按钮 -> st.rerun() 整页重跑
+            buttons = [w for w, (lab, kind, _, _) in s.widgets.items() if kind == 'button' and lab.startswith('📄')]
+            trigger = WidgetState(id=sorted(buttons)[target % len(buttons)])
+            trigger.trigger_value = True
+            timings.append(await s.rerun(trigger=trigger))
+    await conn.close()
+    return cold, timings
+
+def bench_app(app_path, workdir, clicks):
+    port = free_port()
+    env = dict(os.environ, CHILAM_DATA_SOURCE=os.environ.get('CHILAM_DATA_SOURCE', 'synthetic'),
+               PYTHONPATH=os.pathsep.join([REPO, os.environ.get('PYTHONPATH', '')]))
+    proc = subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+                             '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(200):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        return asyncio.run(asyncio.wait_for(drive(port, clicks), timeout=600))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def report(label, result):
+    (cold_t, cold_d, cold_b), runs = result
+    wall = [r[0] for r in runs]
+    print(f"   {label:<10} 进入新闻页 {cold_t * 1000:6.0f} ms / {cold_d} 个增量 | "
+          f"切换新闻 中位 {statistics.median(wall) * 1000:6.1f} ms，p90 {sorted(wall)[int(len(wall) * 0.9) - 1] * 1000:6.1f} ms，"
+          f"每次 {statistics.median(r[1] for r in runs):.0f} 个增量 / {statistics.median(r[2] for r in runs) / 1024:.1f} KB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="新闻页切换新闻的交互延迟")
+    parser.add_argument('--baseline', help="对比的 git 版本 (如 HEAD~1)")
+    parser.add_argument('--clicks', type=int, default=30)
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'data'))
+        targets = []
+        if args.baseline:
+            old = os.path.join(tmp, 'app_baseline.py')
+            with open(old, 'wb') as f:
+                f.write(subprocess.check_output(['git', 'show', f"{args.baseline}:app.py"], cwd=REPO))
+            targets.append((args.baseline, old))
+        targets.append(('当前', os.path.join(REPO, 'app.py')))
+        print(f"🖱️ 每个版本切换 {args.clicks} 次新闻")
+        for label, path in targets:
+            report(label, bench_app(path, tmp, args.clicks))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+"""
+端到端基准：在合成市场 (5000 只个股 / 1500 只 ETF) 上逐阶段计时两个 main_job，
+结果追加到 benchmarks/results.csv，并和上一个提交的数字对比。
+
+用法 (仓库根目录): python benchmarks/bench_pipeline.py
+可用环境变量调整替身：CHILAM_FAKE_LATENCY_MS / CHILAM_FAKE_CALLS_PER_MIN / CHILAM_FAKE_ERROR_RATE
+"""
+import os
+import sys
+import time
+import datetime
+import tempfile
+import functools
+import subprocess
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO, 'benchmarks', 'results.csv')
+
+# 必须在导入业务模块之前设好数据源
+os.environ.setdefault('CHILAM_DATA_SOURCE', 'synthetic')
+os.environ.setdefault('CHILAM_FAKE_LATENCY_MS', '50')
+os.environ.setdefault('TUSHARE_CALLS_PER_MIN', '500')
+sys.path.insert(0, REPO)
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+class Timer:
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, job, stage, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        self.rows.append({'job': job, 'stage': stage, 'seconds': round(elapsed, 4)})
+        print(f"   ⏱️ {job:<5} {stage:<22} {elapsed:8.3f}s")
+        return out
+
+def bench_stock(t, daily_rps_pro):
+    today = datetime.datetime.now().strftime('%Y%m%d')
+    dates = t('stock', 'calendar', daily_rps_pro.get_trading_dates, today)
+    df = t('stock', 'snapshots (cold)', daily_rps_pro.calculate_rps_logic, dates)
+    t('stock', 'snapshots (warm)', daily_rps_pro.calculate_rps_logic, dates)
+    pro = daily_rps_pro.pro
+    basic = t('stock', 'stock_basic', pro.stock_basic, exchange='', list_status='L', fields='ts_code,name,industry')
+    fina = t('stock', 'fundamentals', daily_rps_pro.get_fundamental_smart, dates['now'], dates.get('prev'))
+
+    merged, strong = t('stock', 'merge + screen', daily_rps_pro.screen_strong, df, basic, fina, '')
+    codes = strong['ts_code'].tolist()
+    industry_map = t('stock', 'industries (cold)', daily_rps_pro.fetch_detailed_industries, codes)
+    t('stock', 'industries (warm)', daily_rps_pro.fetch_detailed_industries, codes)
+    strong['细分行业'] = strong['ts_code'].map(industry_map)
+    fmt = f"{dates['now'][:4]}-{dates['now'][4:6]}-{dates['now'][6:]}"
+    strong['更新日期'] = fmt
+    final = t('stock', 'history merge', daily_rps_pro.process_history_and_change, strong, daily_rps_pro.STOCK_PATH, fmt)
+    t('stock', 'csv write', lambda: final.round(2).to_csv(daily_rps_pro.STOCK_PATH, index=False))
+    t('stock', 'main_job (warm)', daily_rps_pro.main_job, dates)
+    return dates
+
+def bench_etf(t, daily_etf_pro, dates):
+    import fetch_scheduler
+    anchors = [dates['now']] + [dates[n] for n in daily_etf_pro.RPS_N if n in dates]
+    t('etf', 'snapshots (cold)', fetch_scheduler.gather,
+      [functools.partial(daily_etf_pro.get_etf_snapshot, d) for d in anchors])
+    basic = t('etf', 'fund_basic', daily_etf_pro.pro.fund_basic, market='E')
+    t('etf', 'asset classes', daily_etf_pro.etf_classes.asset_classes, basic)
+    t('etf', 'main_job (warm)', daily_etf_pro.main_job, dates)
+
+def compare_with_previous(results, commit):
+    if not os.path.exists(RESULTS_PATH): return
+    prev = pd.read_csv(RESULTS_PATH)
+    prev = prev[prev['commit'] != commit]
+    if prev.empty: return
+    last = prev[prev['run_at'] == prev['run_at'].iloc[-1]].set_index(['job', 'stage'])['seconds']
+    cur = results.set_index(['job', 'stage'])['seconds']
+    diff = pd.DataFrame({'previous': last, 'current': cur}).dropna()
+    diff['change'] = (diff['current'] / diff['previous'] - 1).map(lambda x: f"{x:+.0%}")
+    print(f"\n📊 对比上一次 ({prev['commit'].iloc[-1]})：")
+    print(diff.to_string())
+
+def main():
+    commit = git_commit()
+    print(f"🧪 合成市场基准 (commit {commit}, 延迟 {os.environ['CHILAM_FAKE_LATENCY_MS']}ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        # 在临时目录里跑，所有缓存都从冷启动开始，不污染仓库 data/
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        os.makedirs('data', exist_ok=True)
+        try:
+            t = Timer()
+            t0 = time.perf_counter()
+            import daily_rps_pro
+            import daily_etf_pro
+            t.rows.append({'job': 'all', 'stage': 'import', 'seconds': round(time.perf_counter() - t0, 4)})
+            dates = bench_stock(t, daily_rps_pro)
+            bench_etf(t, daily_etf_pro, dates)
+            import pipeline
+            # 同样的热缓存下各跑一次并行 / 顺序，并行省下多少看这两行
+            t('all', 'pipeline (warm)', pipeline.run)
+            t('all', 'pipeline sequential (warm)', pipeline.run, True)
+        finally:
+            os.chdir(cwd)
+
+    results = pd.DataFrame(t.rows)
+    results.insert(0, 'commit', commit)
+    results.insert(0, 'run_at', datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    results['latency_ms'] = float(os.environ['CHILAM_FAKE_LATENCY_MS'])
+    compare_with_previous(results, commit)
+    results.to_csv(RESULTS_PATH, mode='a', header=not os.path.exists(RESULTS_PATH), index=False)
+    print(f"\n✅ 已追加到 {RESULTS_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+强势股筛选基准：pandas 布尔掩码 + 排序 vs 预建索引的 StockQueryEngine
+
+用法 (仓库根目录): python benchmarks/bench_query.py [行数]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stock_query import StockQueryEngine
+
+INDUSTRIES = ['半导体', '通信设备', '有色金属', '化肥行业', '电力', '黄金', '软件开发', '医疗器械']
+QUERIES = [
+    dict(min_days=1, min_rps=87, max_pe=100, industry=None, keyword=''),
+    dict(min_days=3, min_rps=95, max_pe=50, industry='半导体', keyword=''),
+    dict(min_days=1, min_rps=50, max_pe=200, industry=None, keyword='60'),
+    dict(min_days=1, min_rps=50, max_pe=200, industry=None, keyword='股份3'),
+]
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'ts_code': [f"{rng.integers(0, 700000):06d}.{'SH' if i % 2 else 'SZ'}" for i in range(n_rows)],
+        'name': [f"股份{i}" for i in range(n_rows)],
+        '细分行业': pd.Categorical(rng.choice(INDUSTRIES, n_rows)),
+        'RPS_50': rng.uniform(0, 100, n_rows).astype('float32'),
+        'pe_ttm': np.where(rng.random(n_rows) < 0.1, np.nan, rng.uniform(-50, 300, n_rows)).astype('float32'),
+        '连续天数': rng.integers(1, 30, n_rows).astype('int16'),
+    })
+    return df.sort_values('RPS_50', ascending=False, ignore_index=True)
+
+def pandas_query(df, min_days, min_rps, max_pe, industry, keyword):
+    """原 render_stock_content 的写法"""
+    mask = (df['连续天数'] >= min_days) & (df['RPS_50'] >= min_rps)
+    mask &= (df['pe_ttm'] <= max_pe) & (df['pe_ttm'] > 0)
+    if industry: mask &= (df['细分行业'] == industry)
+    if keyword: mask &= (df['ts_code'].astype(str).str.contains(keyword) | df['name'].str.contains(keyword))
+    return df[mask].sort_values('RPS_50', ascending=False)
+
+def best_of(fn, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main(n_rows=5000):
+    df = make_frame(n_rows)
+    t0 = time.perf_counter()
+    engine = StockQueryEngine(df)
+    print(f"📏 {n_rows} 行，建索引 {(time.perf_counter() - t0) * 1000:.1f} ms (每个数据版本一次)")
+    for q in QUERIES:
+        t_old, ref = best_of(lambda: pandas_query(df, **q))
+        t_new, out = best_of(lambda: df.iloc[engine.query(**q)])
+        ok = "✅" if sorted(ref['ts_code']) == sorted(out['ts_code']) else "❌"
+        print(f"   {q}: pandas {t_old * 1000:.2f} ms, 索引 {t_new * 1000:.2f} ms, 命中 {len(out)} 行 {ok}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
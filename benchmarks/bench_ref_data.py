@@ -0,0 +1,56 @@
+"""
+参考数据层基准：合成市场上连跑两次，统计交易日历 / 上市列表 / 每日指标的请求次数，
+并检查出现新代码 (Series 传入) 时列表能刷新、missing 会记下来，之后不再反复刷新
+
+用法 (仓库根目录): python benchmarks/bench_ref_data.py
+"""
+import os
+import sys
+import datetime
+import tempfile
+import pandas as pd
+
+os.environ.setdefault('CHILAM_DATA_SOURCE', 'synthetic')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = ['trade_cal', 'stock_basic', 'fund_basic', 'daily_basic']
+
+def calls():
+    import run_report
+    api = run_report.current().api
+    return {k: api.get(k, {}).get('calls', 0) for k in ENDPOINTS}
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CHILAM_REF_DIR'] = os.path.join(tmp, 'ref')
+        import ref_data
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        start = (datetime.datetime.now() - datetime.timedelta(days=400)).strftime('%Y%m%d')
+
+        def run():
+            days = ref_data.trade_dates(start, today)
+            ref_data.stock_basic()
+            ref_data.fund_basic()
+            ref_data.daily_basic(days[-1], 'ts_code,turnover_rate,pe_ttm,pb,circ_mv')
+
+        before = calls()
+        run()
+        first = calls()
+        run()
+        second = calls()
+        print("📇 请求次数 (第一次 / 第二次):")
+        for k in ENDPOINTS:
+            print(f"   {k:<12} {first[k] - before[k]} / {second[k] - first[k]}")
+        assert all(second[k] == first[k] for k in ENDPOINTS), "第二次运行不应再请求参考数据"
+
+        # 回归：调用方传的是 Series，出现列表里没有的代码时要能刷新并记下 missing
+        codes = pd.concat([ref_data.stock_basic()['ts_code'], pd.Series(['999999.SZ'])], ignore_index=True)
+        ref_data.stock_basic(codes)
+        assert ref_data._read_meta()['stock_basic']['missing'] == ['999999.SZ']
+        refreshed = calls()['stock_basic']
+        ref_data.stock_basic(codes)
+        assert calls()['stock_basic'] == refreshed, "查不到的代码不应每次都触发刷新"
+        print("   新代码刷新 + missing 记录 ✅")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+板块强度的日环比链：模拟 Actions 的全新检出，检查 breadth_chg 第二天还能算出来
+  - 昨天在一个目录里跑完 (合成市场)
+  - 新目录只放 workflow 的 file_pattern 会提交的文件 + actions/cache 恢复的 data/cache，再跑今天
+  - 行业一级的 breadth_chg 必须有值；对照组去掉上一份板块表，应当全为 NaN
+
+用法 (仓库根目录): python benchmarks/bench_sector_chain.py
+"""
+import os
+import re
+import sys
+import glob
+import shutil
+import tempfile
+import subprocess
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKFLOW = os.path.join(REPO, '.github', 'workflows', 'daily_update.yml')
+
+SCRIPT = r'''
+import sys, datetime
+sys.path.insert(0, {repo!r})
+import daily_rps_pro as m
+today = datetime.datetime.now().strftime('%Y%m%d')
+cal = sorted(m.pro.trade_cal(exchange='', is_open='1', start_date='20000101', end_date=today)['cal_date'], reverse=True)
+if sys.argv[1] == 'yesterday': m.catch_up_job([cal[1]], cal)
+else: m.main_job()
+'''
+
+def run(step, workdir):
+    env = dict(os.environ, CHILAM_DATA_SOURCE='synthetic', CHILAM_SYNTHETIC_STOCKS='1000')
+    subprocess.run([sys.executable, '-c', SCRIPT.format(repo=REPO), step],
+                   cwd=workdir, env=env, capture_output=True, text=True, check=True)
+
+def committed_patterns():
+    with open(WORKFLOW, encoding='utf-8') as f:
+        return re.search(r'file_pattern:\s*(.+)', f.read()).group(1).split()
+
+def fresh_checkout(src, dst, drop=()):
+    """只带上会被提交的文件 + data/cache (其余本地产物都不在)"""
+    os.makedirs(os.path.join(dst, 'data'))
+    shutil.copytree(os.path.join(src, 'data', 'cache'), os.path.join(dst, 'data', 'cache'))
+    for pattern in committed_patterns():
+        for path in glob.glob(os.path.join(src, pattern)):
+            rel = os.path.relpath(path, src)
+            if rel in drop: continue
+            if os.path.isdir(path): shutil.copytree(path, os.path.join(dst, rel))
+            else: shutil.copy2(path, os.path.join(dst, rel))
+
+def breadth(workdir):
+    sectors = pd.read_parquet(os.path.join(workdir, 'data', 'sectors.parquet'))
+    return sectors.loc[sectors['level'] == '行业', 'breadth_chg']
+
+def main():
+    print(f"🧭 提交的文件: {' '.join(committed_patterns())}")
+    with tempfile.TemporaryDirectory() as tmp:
+        first = os.path.join(tmp, 'yesterday')
+        os.makedirs(os.path.join(first, 'data'))
+        run('yesterday', first)
+        for label, drop in (('全新检出', ()), ('对照 (无上一份板块表)', ('data/sectors.parquet',))):
+            work = os.path.join(tmp, label)
+            fresh_checkout(first, work, drop)
+            run('today', work)
+            chg = breadth(work)
+            print(f"   {label}: 行业 breadth_chg 有值 {int(chg.notna().sum())}/{len(chg)}")
+            if drop: assert chg.isna().all()
+            else: assert chg.notna().all(), "全新检出后 breadth_chg 断链"
+    print("   日环比链 ✅")
+
+if __name__ == "__main__":
+    main()
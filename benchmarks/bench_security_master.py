@@ -0,0 +1,104 @@
+"""
+证券主表基准：同一份合成行情 (4 个锚点快照 + stock_basic + 每日指标)，对比
+  - 原来的写法：按 ts_code 字符串逐个 pd.merge
+  - 现在的写法：各表编码一次 sid，按 sid 数组取值对齐 (calculate_rps_logic + screen_strong)
+的耗时和峰值内存 (tracemalloc)，并检查两种写法的结果完全一致；
+另外检查 join 的 dtype 与 pd.merge 一致 (int / bool / Categorical)、列名冲突时报错
+
+用法 (仓库根目录): python benchmarks/bench_security_master.py [重复次数]
+"""
+import os
+import sys
+import time
+import datetime
+import tempfile
+import statistics
+import tracemalloc
+import pandas as pd
+
+os.environ.setdefault('CHILAM_DATA_SOURCE', 'synthetic')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def merge_rps(snapshots, dates, rps_n):
+    """改造前的 calculate_rps_logic：每个窗口 merge 一次"""
+    final_df = snapshots[dates['now']].rename(columns={'close_val': 'base_now', 'display_val': 'price_now'})
+    for n in rps_n:
+        if n not in dates: continue
+        df_past = snapshots[dates[n]][['ts_code', 'close_val']].rename(columns={'close_val': 'base_past'})
+        temp = pd.merge(final_df, df_past, on='ts_code', how='left')
+        temp[f'pct_{n}'] = (temp['base_now'] - temp['base_past']) / temp['base_past']
+        temp[f'RPS_{n}'] = temp[f'pct_{n}'].rank(pct=True) * 100
+        final_df = temp.drop(columns=['base_past'])
+    return final_df
+
+def merge_screen(df_stock, basic, fina_df, threshold):
+    """改造前的 screen_strong"""
+    df_stock = pd.merge(df_stock, basic, on='ts_code', how='left')
+    df_stock = pd.merge(df_stock, fina_df, on='ts_code', how='left')
+    mask = (df_stock['RPS_50'] > threshold) & (df_stock['RPS_120'] > threshold) & (df_stock['RPS_250'] > threshold)
+    return df_stock, df_stock[mask].copy()
+
+def check_join_semantics():
+    import security_master
+    other = pd.DataFrame({'ts_code': ['A', 'B'], 'i': [1, 2], 'b': [True, False],
+                          'c': pd.Categorical(['x', 'y']), 'f': [0.5, 1.5]})
+    for codes in (['B', 'A'], ['B', 'Z', 'A']):
+        df = pd.DataFrame({'ts_code': codes})
+        df['sid'] = security_master.get().encode(df['ts_code'])
+        pd.testing.assert_frame_equal(security_master.join(df, other),
+                                      pd.merge(df, other, on='ts_code', how='left'))
+    try:
+        security_master.join(df.assign(i=0), other)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("列名冲突应当报错")
+
+def measure(fn, repeat):
+    wall = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        wall.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, statistics.median(wall), peak / 2 ** 20
+
+def main(repeat=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['CHILAM_HISTORY_DIR'] = os.path.join(tmp, 'history')
+        os.environ['CHILAM_REF_DIR'] = os.path.join(tmp, 'ref')
+        os.environ['CHILAM_SECURITY_MASTER'] = os.path.join(tmp, 'ref', 'security_master.parquet')
+        import daily_rps_pro as m
+        import ref_data
+
+        dates = m.get_trading_dates(datetime.datetime.now().strftime('%Y%m%d'))
+        anchors = [dates['now']] + [dates[n] for n in m.RPS_N if n in dates]
+        snapshots = {d: m.get_snapshot(d) for d in anchors}
+        basic = ref_data.stock_basic()
+        fina = m.get_fundamental_smart(dates['now'], dates.get('prev'))
+        # 只比较合并/对齐本身：快照从内存取，不读盘
+        m.get_snapshot = lambda d: snapshots[d].copy()
+        date_fmt = m.to_fmt(dates['now'])
+        print(f"📏 {len(snapshots[dates['now']])} 只 × {len(anchors)} 个快照，重复 {repeat} 次")
+
+        old = lambda: merge_screen(merge_rps({d: s.copy() for d, s in snapshots.items()}, dates, m.RPS_N),
+                                   basic, fina, m.THRESHOLD)
+        new = lambda: m.screen_strong(m.calculate_rps_logic(dates), basic, fina, date_fmt)
+        new()  # 首次编码会给主表追加编号并落盘，不计入
+        (old_df, old_strong), old_t, old_mem = measure(old, repeat)
+        (new_df, new_strong), new_t, new_mem = measure(new, repeat)
+
+        pd.testing.assert_frame_equal(old_df, new_df.drop(columns=['sid'])[old_df.columns])
+        pd.testing.assert_frame_equal(old_strong.reset_index(drop=True),
+                                      new_strong.drop(columns=['sid', '更新日期'])[old_strong.columns].reset_index(drop=True))
+        print(f"   字符串 merge: {old_t * 1000:6.1f} ms，峰值 {old_mem:5.1f} MB")
+        print(f"   sid 对齐   : {new_t * 1000:6.1f} ms，峰值 {new_mem:5.1f} MB")
+        print(f"   结果一致 ({len(new_strong)} 只强势股)")
+        check_join_semantics()
+        print("   join 的 dtype 与 pd.merge 一致，列名冲突报错 ✅")
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,77 @@
+"""
+历史回看基准：用增量日志合成若干年的强势股列表，测
+  - 第一次看某天 (从快照 + 增量物化分区) 和再次看 (只读 Parquet 分区) 的耗时
+  - 轨迹索引的构建 / 增量更新，以及一页代码的走势查询
+
+用法 (仓库根目录): python benchmarks/bench_time_travel.py [交易日数]
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import delta_store
+
+def make_day(universe, members, rng, date):
+    """模拟一天：少量进出，留下的 RPS 小幅波动"""
+    keep = members[rng.random(len(members)) > 0.04]
+    fresh = universe.sample(12, random_state=int(rng.integers(1 << 30)))
+    df = pd.concat([keep, fresh[~fresh['ts_code'].isin(keep['ts_code'])]], ignore_index=True)
+    df['RPS_50'] = (df['RPS_50'] + rng.normal(0, 1, len(df))).clip(87, 100).round(2)
+    df['连续天数'] = df['连续天数'] + 1
+    df['更新日期'] = date
+    return df
+
+def main(n_days=500):
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}.SZ" for i in range(5000)]
+    universe = pd.DataFrame({'ts_code': codes, 'name': [f"股票{i}" for i in range(5000)],
+                             '细分行业': rng.choice(['半导体', '电力', '证券', '白酒'], 5000),
+                             'price_now': rng.uniform(3, 80, 5000).round(2), 'RPS_50': rng.uniform(87, 100, 5000).round(2),
+                             '连续天数': 1, '更新日期': ''})
+    days = pd.bdate_range(end=pd.Timestamp.today(), periods=n_days).strftime('%Y-%m-%d')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        delta_store.DELTA_DIR = os.path.join(tmp, 'deltas')
+        delta_store.INDEX_DIR = os.path.join(tmp, 'index')
+        print(f"📏 合成 {n_days} 个交易日的增量日志...")
+        members = universe.sample(300, random_state=0)
+        t0 = time.perf_counter()
+        for d in days:
+            members = make_day(universe, members, rng, d)
+            delta_store.record('stocks', d, members)
+        print(f"   写日志 {(time.perf_counter() - t0) / n_days * 1000:.0f} ms/天")
+
+        picks = [days[int(i)] for i in rng.integers(0, n_days, 20)]
+        first, again = [], []
+        for d in picks:
+            t0 = time.perf_counter()
+            pd.read_parquet(delta_store.day_partition('stocks', d))
+            first.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            pd.read_parquet(delta_store.day_partition('stocks', d))
+            again.append(time.perf_counter() - t0)
+        print(f"   切换日期：首次 {statistics.median(first) * 1000:.0f} ms (物化分区)，"
+              f"再次 {statistics.median(again) * 1000:.1f} ms (只读分区)")
+
+        t0 = time.perf_counter()
+        delta_store.update_trajectory_index('stocks')
+        print(f"   轨迹索引全量构建 {time.perf_counter() - t0:.2f}s")
+        members = make_day(universe, members, rng, days[-1])
+        delta_store.record('stocks', days[-1], members)
+        t0 = time.perf_counter()
+        path = delta_store.update_trajectory_index('stocks')
+        print(f"   同日重跑后增量更新 {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        index = delta_store.TrajectoryIndex(path)
+        page = members['ts_code'].tolist()
+        t0 = time.perf_counter()
+        index.series(page, end=days[n_days // 2])
+        print(f"   {len(page)} 只走势查询 {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
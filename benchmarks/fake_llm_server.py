@@ -0,0 +1,102 @@
+"""
+本地假的 OpenAI 兼容大模型接口，用于压测新闻页的 AI 分析 (不消耗真实额度)
+
+    python benchmarks/fake_llm_server.py [端口]
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 ZHIPU_API_KEY=fake streamlit run app.py
+
+可调：FAKE_LLM_FIRST_TOKEN_MS (首 token 延迟) / FAKE_LLM_TOKEN_MS (后续每个 token 间隔) / FAKE_LLM_TOKENS (回答长度)
+GET /stats 返回已收到的补全请求数
+"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIRST_TOKEN_MS = float(os.getenv('FAKE_LLM_FIRST_TOKEN_MS', '300'))
+TOKEN_MS = float(os.getenv('FAKE_LLM_TOKEN_MS', '20'))
+N_TOKENS = int(os.getenv('FAKE_LLM_TOKENS', '120'))
+
+class FakeLLM:
+    def __init__(self):
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def tokens(self, prompt):
+        words = ['利好', '：', '板块', '龙头', '有望', '受益', '，', '关注', '订单', '业绩', '。']
+        return [f"[{len(prompt)}]"] + [words[i % len(words)] for i in range(N_TOKENS - 1)]
+
+def make_handler(llm):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, payload, code=200):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/stats'):
+                self._json({'requests': llm.requests})
+            else:
+                self._json({'error': 'not found'}, 404)
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            with llm.lock: llm.requests += 1
+            prompt = ''.join(str(m.get('content', '')) for m in req.get('messages', []))
+            tokens = llm.tokens(prompt)
+            model = req.get('model', 'fake')
+            time.sleep(FIRST_TOKEN_MS / 1000)
+            if not req.get('stream'):
+                time.sleep(TOKEN_MS / 1000 * (len(tokens) - 1))
+                self._json({
+                    'id': 'fake', 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': ''.join(tokens)}}],
+                    'usage': {'prompt_tokens': len(prompt), 'completion_tokens': len(tokens), 'total_tokens': len(prompt) + len(tokens)},
+                })
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            def send(data):
+                chunk = f"data: {data}\n\n".encode('utf-8')
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+
+            for i, tok in enumerate(tokens):
+                if i: time.sleep(TOKEN_MS / 1000)
+                send(json.dumps({'id': 'fake', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                                 'choices': [{'index': 0, 'delta': {'content': tok}, 'finish_reason': None}]}, ensure_ascii=False))
+            send(json.dumps({'id': 'fake', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                             'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}))
+            send('[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+    return Handler
+
+def serve(port=0):
+    """后台线程启动，返回 (server, llm)；port=0 时自动选空闲端口"""
+    llm = FakeLLM()
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(llm))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, llm
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server, _ = serve(port)
+    print(f"🤖 假大模型已启动: http://127.0.0.1:{server.server_address[1]}/v1 (Ctrl+C 退出)")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,13 +1,21 @@
-import tushare as ts
 import pandas as pd
 import datetime
 import os
 import time
+import functools
+import concurrent.futures
+import history_store
+import fetch_scheduler
+import delta_store
+import ref_data
+import security_master
+import etf_classes
+import links
+import datasource
+import run_report
 
 # ================= 配置区 =================
-# 优先读取环境变量，本地测试时可填写 LOCAL_TOKEN
-LOCAL_TOKEN = '' 
-MY_TOKEN = os.getenv('TUSHARE_TOKEN', LOCAL_TOKEN)
+# Token 读取环境变量 TUSHARE_TOKEN，本地测试可在 datasource.py 填写 LOCAL_TOKEN
 
 # RPS 时间窗口
 RPS_N = [50, 120, 250] 
@@ -15,20 +23,11 @@ RPS_N = [50, 120, 250]
 THRESHOLD = 87
 # 结果保存路径
 ETF_PATH = "data/strong_etfs.csv"
+# 提交到 git 的是 data/deltas/ 下的增量日志，CSV 只是本地物化的最新一天
+DELTA_KIND = "etfs"
 
-# 排除关键词：过滤掉债券、货币、理财以及部分跨境ETF，聚焦A股资产
-EXCLUDE_WORDS = ['债', '货币', '理财', '黄金', '石油', '标普', '纳指', '道琼斯', '德国', '法国', '日经', '恒生']
-
-# 初始化 Tushare
-try:
-    if MY_TOKEN:
-        ts.set_token(MY_TOKEN)
-        pro = ts.pro_api()
-    else:
-        # 尝试匿名初始化 (通常会失败，需配置 Token)
-        pro = ts.pro_api('')
-except Exception as e:
-    print(f"❌ Token 设置异常: {e}")
+# 初始化 Tushare (CHILAM_DATA_SOURCE 可切换为录制回放 / 合成市场)
+pro = datasource.get_pro()
 
 # ================= 核心逻辑 =================
 
@@ -38,7 +37,8 @@ def get_trading_dates(end_date):
     # 向前多取一些日子以防假期
     start_date = (datetime.datetime.now() - datetime.timedelta(days=400)).strftime('%Y%m%d')
     try:
-        df = pro.trade_cal(exchange='', is_open='1', end_date=end_date, start_date=start_date)
+        # 与个股共用本地交易日历
+        df = pd.DataFrame({'cal_date': ref_data.trade_dates(start_date, end_date)})
         df = df.sort_values('cal_date', ascending=False).reset_index(drop=True)
         if df.empty: return None
         
@@ -57,11 +57,17 @@ def get_trading_dates(end_date):
 
 def get_etf_snapshot(date_str):
     """获取某日全市场场内基金行情"""
-    print(f"   正在获取 {date_str} 的 ETF 行情...")
     try:
-        # Tushare 接口：fund_daily 获取场内基金日线
-        df = pro.fund_daily(trade_date=date_str)
-        if df.empty: return pd.DataFrame()
+        # 优先读本地行情仓库，只有缺失的交易日才联网
+        df = history_store.load_snapshot('etf', date_str)
+        if df is None:
+            print(f"   正在获取 {date_str} 的 ETF 行情...")
+            # Tushare 接口：fund_daily 获取场内基金日线
+            df = fetch_scheduler.call(pro.fund_daily, trade_date=date_str)
+            if df.empty: return pd.DataFrame()
+            history_store.save_snapshot('etf', date_str, df)
+        else:
+            print(f"   ♻️ {date_str} ETF 行情命中本地仓库")
         
         # 仅保留代码和收盘价
         return df[['ts_code', 'close']].rename(columns={'close': 'close_val'})
@@ -74,101 +80,104 @@ def process_etf_history_and_links(new_df, file_path):
     1. 读取旧文件，计算 RPS 50 的变动值
     2. 生成雪球 (Xueqiu) 跳转链接
     """
-    rps_prev_map = {}
+    res = new_df.copy()
+    # 999 代表新上榜 (New)
+    changes = pd.Series(999, index=res.index)
     
-    # --- 1. 读取旧数据 (如果存在) ---
+    # --- 1. 读取旧数据 (如果存在)，按代码对齐昨天的 RPS_50 ---
     if os.path.exists(file_path):
         try:
             old_df = pd.read_csv(file_path)
-            for _, row in old_df.iterrows():
-                # 记录昨天的 RPS_50
-                if 'RPS_50' in row:
-                    rps_prev_map[row['ts_code']] = row['RPS_50']
+            if 'RPS_50' in old_df.columns:
+                prev_rps = old_df.drop_duplicates('ts_code', keep='last').set_index('ts_code')['RPS_50']
+                found = pd.Series(prev_rps.index.get_indexer(res['ts_code']) >= 0, index=res.index)
+                # ★ 计算 RPS 变动 (今天 - 昨天)
+                prev = pd.Series(prev_rps.reindex(res['ts_code']).to_numpy(), index=res.index)
+                changes = changes.mask(found, res['RPS_50'] - prev)
         except Exception as e:
             print(f"⚠️ 读取旧文件失败，跳过对比: {e}")
 
     # --- 2. 处理新数据 ---
-    res = []
-    for _, row in new_df.iterrows():
-        code = row['ts_code']
-        
-        # ★ 计算 RPS 变动 (今天 - 昨天)
-        if code in rps_prev_map:
-            change = row['RPS_50'] - rps_prev_map[code]
-            row['rps_50_chg'] = change
-        else:
-            # 999 代表新上榜 (New)
-            row['rps_50_chg'] = 999 
-            
-        # ★ 生成雪球链接
-        # Tushare 格式: 510050.SH -> 雪球格式: SH510050
-        if '.' in code:
-            num, suffix = code.split('.')
-            link_code = suffix.upper() + num 
-            row['xueqiu_url'] = f"https://xueqiu.com/S/{link_code}"
-        else:
-            row['xueqiu_url'] = ""
-            
-        res.append(row)
-        
-    return pd.DataFrame(res)
+    res['rps_50_chg'] = changes
+    # ★ 生成雪球链接
+    res['xueqiu_url'] = links.xueqiu_urls(res['ts_code'])
+    return res
 
-def main_job():
+def main_job(dates=None):
+    """dates: 可由 pipeline.py 传入已取好的交易日锚点，避免重复拉日历"""
     print("🚀 启动 ETF 策略更新 (V2.0)...")
+    report = run_report.current()
+    clock = run_report.StageClock('etf')
     today_str = datetime.datetime.now().strftime('%Y%m%d')
     today_fmt = datetime.datetime.now().strftime('%Y-%m-%d')
     
     # 1. 准备日期
-    dates = get_trading_dates(today_str)
-    if not dates: return
+    if dates is None:
+        dates = get_trading_dates(today_str)
+    if not dates:
+        report.fail("无法获取交易日历")
+        return
+    clock.lap('calendar')
     
     # 确保 data 目录存在
     os.makedirs("data", exist_ok=True)
 
-    # 2. 获取今日行情作为基准
-    df_now = get_etf_snapshot(dates['now'])
+    # ETF 基础信息与行情互不依赖，提前在后台拉取
+    prefetch = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    basic_future = prefetch.submit(ref_data.fund_basic)
+    prefetch.shutdown(wait=False)
+
+    # 2. 今日 + 各 N 日锚点行情并发拉取
+    anchor_dates = [dates['now']] + [dates[n] for n in RPS_N if n in dates]
+    snapshots = dict(zip(anchor_dates, fetch_scheduler.gather(
+        [functools.partial(run_report.timed, f"etf/snapshot {d}", get_etf_snapshot, d) for d in anchor_dates])))
+
+    # 今日行情作为基准
+    df_now = snapshots[dates['now']]
     if df_now.empty: 
         print("⚠️ 今日无行情数据，停止运行")
+        report.fail("今日无 ETF 行情数据")
         return
 
-    final_df = df_now.copy()
-    final_df.rename(columns={'close_val': 'price_now'}, inplace=True)
+    # 各快照只编码一次 sid，之后按 sid 数组取值对齐，不再 merge 字符串代码
+    master = security_master.get()
+    sids = master.encode(df_now['ts_code'])
+    final_df = pd.DataFrame({'ts_code': df_now['ts_code'].array, 'sid': sids,
+                             'price_now': df_now['close_val'].to_numpy()})
     # ETF 这里简单处理，暂不复权 (ETF复权数据较难获取，且短期影响小)
     final_df['base_now'] = final_df['price_now']
+    base_now = final_df['base_now'].to_numpy()
 
     # 3. 循环计算 RPS (50, 120, 250)
     for n in RPS_N:
         if n not in dates: continue
-        # 获取 N 天前的行情
-        df_past = get_etf_snapshot(dates[n])
+        # 取 N 天前的行情
+        df_past = snapshots[dates[n]]
         if df_past.empty: continue
         
-        # 合并数据
-        temp = pd.merge(final_df, df_past, on='ts_code', how='left', suffixes=('', '_past'))
+        # 按 sid 取 N 天前的收盘价
+        base_past = security_master.lookup(sids, master.encode(df_past['ts_code']), df_past['close_val'].to_numpy())
         
         # 计算 N 日涨幅
-        temp[f'pct_{n}'] = (temp['base_now'] - temp['close_val']) / temp['close_val']
+        final_df[f'pct_{n}'] = (base_now - base_past) / base_past
         
         # 计算 RPS (排名)
         # pct=True 表示返回百分比排名 (0.0~1.0)，乘以 100 变成 0~100 分
-        temp[f'RPS_{n}'] = temp[f'pct_{n}'].rank(pct=True) * 100
-        
-        # 清理临时列，保留 final_df
-        final_df = temp.drop(columns=['close_val'])
+        final_df[f'RPS_{n}'] = final_df[f'pct_{n}'].rank(pct=True) * 100
+    clock.lap('rps', rows=len(final_df))
 
     # 4. 获取 ETF 基础信息 (用于筛选名称)
     try:
         print("   获取 ETF 基础信息并过滤...")
         # market='E' 代表交易所基金
-        basic = pro.fund_basic(market='E') 
-        basic = basic[['ts_code', 'name']]
-        
-        # 合并名称
-        df_merged = pd.merge(final_df, basic, on='ts_code', how='inner')
+        basic_future.result()
+        # 本地列表里没有的代码 (新上市的 ETF) 会触发一次整表刷新
+        basic = ref_data.fund_basic(final_df['ts_code'])
+        basic = basic[['ts_code', 'name']].assign(资产类别=lambda b: etf_classes.asset_classes(b))
         
-        # ★ 过滤逻辑：排除不需要的类型
-        mask_name = df_merged['name'].apply(lambda x: not any(w in x for w in EXCLUDE_WORDS))
-        df_stock_etf = df_merged[mask_name].copy()
+        # 按 sid 贴上名称和资产类别 (列表里没有的代码丢掉)
+        # 所有资产类别都参与筛选并写进结果，看板按 etf_classes.KEEP_CLASSES 默认只显示其中几类
+        df_stock_etf = security_master.join(final_df, basic, how='inner')
         
         # 5. 筛选强势品种
         # 规则：RPS_50 > 87 且 RPS_120 > 80 (确保中期也够强)
@@ -178,22 +187,34 @@ def main_job():
         ].copy()
         
         strong_etf['更新日期'] = today_fmt
+        clock.lap('screen', rows=len(strong_etf))
 
-        # 6. ★ 处理历史变动和链接 (新功能核心)
+        # 6. ★ 处理历史变动和链接 (新功能核心)；CSV 不在仓库里，先从增量日志还原上一次的结果
+        delta_store.ensure_csv(DELTA_KIND, ETF_PATH)
         final_etf = process_etf_history_and_links(strong_etf, ETF_PATH)
+        clock.lap('history merge')
 
         # 7. 保存结果
         # 指定列顺序，保持 CSV 整洁
-        cols = ['ts_code', 'name', 'price_now', 'RPS_50', 'rps_50_chg', 'RPS_120', 'RPS_250', 'xueqiu_url', '更新日期']
+        cols = ['ts_code', 'name', '资产类别', 'price_now', 'RPS_50', 'rps_50_chg', 'RPS_120', 'RPS_250', 'xueqiu_url', '更新日期']
         save_cols = [c for c in cols if c in final_etf.columns]
         
-        final_etf[save_cols].round(2).to_csv(ETF_PATH, index=False)
+        final_etf = final_etf[save_cols].round(2)
+        final_etf.to_csv(ETF_PATH, index=False)
         print(f"✅ ETF 更新成功！共筛选出 {len(final_etf)} 只，文件已保存至 {ETF_PATH}")
+        clock.lap('csv write')
+        delta_store.record(DELTA_KIND, today_fmt, final_etf)
+        clock.lap('delta write')
 
     except Exception as e:
         print(f"❌ 处理 ETF 数据出错: {e}")
+        report.fail(e)
         import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main_job()
+    run_report.start('etf')
+    try:
+        main_job()
+    finally:
+        run_report.finish()
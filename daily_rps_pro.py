@@ -1,28 +1,45 @@
-import tushare as ts
 import pandas as pd
+import numpy as np
 import datetime
 import os
 import time
-import akshare as ak
 import concurrent.futures
+import functools
+import history_store
+import fetch_scheduler
+import industry_cache
+import delta_store
+import ref_data
+import security_master
+import links
+import datasource
+import run_report
 
 # ================= 配置区 =================
-LOCAL_TOKEN = '' 
-MY_TOKEN = os.getenv('TUSHARE_TOKEN', LOCAL_TOKEN)
+# Token 读取环境变量 TUSHARE_TOKEN，本地测试可在 datasource.py 填写 LOCAL_TOKEN
 
 RPS_N = [50, 120, 250] 
 THRESHOLD = 87
 STOCK_PATH = "data/strong_stocks.csv"
+# 提交到 git 的是 data/deltas/ 下的增量日志，CSV 只是本地物化的最新一天
+DELTA_KIND = "stocks"
+# 全市场输出：每只上市股票的 RPS 和基本面 (列式 Parquet，float32 + 分类列)
+# 每晚整表覆盖并提交到仓库，只留看板用到的列、数值按显示精度取整，控制每天的提交体积
+WRITE_FULL_UNIVERSE = os.getenv('WRITE_FULL_UNIVERSE', '1') == '1'
+UNIVERSE_PATH = "data/universe_stocks.parquet"
+# 板块强度：按 tushare 行业 / 细分行业 汇总的全市场 RPS，看板的板块页直接读
+WRITE_SECTORS = os.getenv('WRITE_SECTORS', '1') == '1'
+# 上一份板块表同时是 breadth_chg 的基准，随 data/*.parquet 提交，Actions 全新检出后也在 (见 benchmarks/bench_sector_chain.py)
+SECTOR_PATH = "data/sectors.parquet"
+# 细分行业只有抓过的股票才知道：每晚顺带给这么多只还没缓存的非强势股补抓，约一个缓存周期 (30 天) 覆盖全市场
+SECTOR_WARMUP_PER_RUN = int(os.getenv('SECTOR_WARMUP_PER_RUN', '300'))
+# 补跑：发现上次 更新日期 之后漏了交易日 (Actions 失败/跳过) 时自动补齐，一次最多补这么多天
+CATCH_UP = os.getenv('CATCH_UP', '1') == '1'
+CATCH_UP_MAX_DAYS = int(os.getenv('CATCH_UP_MAX_DAYS', '30'))
 
-# 初始化
-try:
-    if MY_TOKEN:
-        ts.set_token(MY_TOKEN)
-        pro = ts.pro_api()
-    else:
-        pro = ts.pro_api('')
-except Exception as e:
-    print(f"❌ Token 设置异常: {e}")
+# 初始化 (CHILAM_DATA_SOURCE 可切换为录制回放 / 合成市场)
+pro = datasource.get_pro()
+ak = datasource.get_ak()
 
 # ================= 工具函数 =================
 
@@ -31,32 +48,46 @@ def get_trading_dates(end_date):
     # 向前多取一些日子，确保能覆盖到 RPS_N 的最大值
     start_date = (datetime.datetime.now() - datetime.timedelta(days=400)).strftime('%Y%m%d')
     try:
-        # 获取交易日历
-        df = pro.trade_cal(exchange='', is_open='1', end_date=end_date, start_date=start_date)
-        df = df.sort_values('cal_date', ascending=False).reset_index(drop=True)
-        if df.empty: return None
-        
-        dates = {
-            'now': df.loc[0, 'cal_date'],  # 最近的一个交易日
-            'prev': df.loc[1, 'cal_date'] if len(df) > 1 else None
-        }
-        for n in RPS_N:
-            if len(df) > n:
-                dates[n] = df.loc[n, 'cal_date']
-        return dates
+        # 获取交易日历 (本地日历只补上次之后的几天)
+        cal = sorted(ref_data.trade_dates(start_date, end_date), reverse=True)
+        if not cal: return None
+        return anchors_from_calendar(cal, 0)
     except Exception as e:
         print(f"❌ 获取日历失败: {e}")
         return None
 
+def anchors_from_calendar(cal, i):
+    """cal: 降序的交易日列表；返回以 cal[i] 为“今天”的锚点 (与 get_trading_dates 同结构)"""
+    dates = {
+        'now': cal[i],  # 最近的一个交易日
+        'prev': cal[i + 1] if len(cal) > i + 1 else None
+    }
+    for n in RPS_N:
+        if len(cal) > i + n:
+            dates[n] = cal[i + n]
+    return dates
+
 def get_snapshot(date_str):
-    print(f"   正在获取 {date_str} 的行情...")
     try:
-        df_daily = pro.daily(trade_date=date_str, fields='ts_code,close')
-        df_adj = pro.adj_factor(trade_date=date_str, fields='ts_code,adj_factor')
-        
-        if df_daily.empty or df_adj.empty: return pd.DataFrame()
+        # 优先读本地行情仓库，历史锚点日只在第一次用到时下载
+        df = history_store.load_snapshot('stock', date_str)
+        if df is None:
+            print(f"   正在获取 {date_str} 的行情...")
+            # 行情和复权因子两个请求同时发出
+            df_daily, df_adj = fetch_scheduler.fetch_all([
+                (pro.daily, {'trade_date': date_str, 'fields': 'ts_code,close'}),
+                (pro.adj_factor, {'trade_date': date_str, 'fields': 'ts_code,adj_factor'}),
+            ])
+            
+            if df_daily.empty or df_adj.empty: return pd.DataFrame()
+            
+            # 按 sid 对齐 (只保留两边都有的代码)
+            df = security_master.join(df_daily.assign(sid=security_master.get().encode(df_daily['ts_code'])),
+                                      df_adj[['ts_code', 'adj_factor']], how='inner').drop(columns=['sid'])
+            history_store.save_snapshot('stock', date_str, df)
+        else:
+            print(f"   ♻️ {date_str} 行情命中本地仓库")
         
-        df = pd.merge(df_daily, df_adj, on='ts_code')
         df['close_val'] = df['close'] * df['adj_factor'] 
         df['display_val'] = df['close'] 
         
@@ -68,11 +99,12 @@ def get_snapshot(date_str):
 def get_fundamental_smart(date_str, backup_date_str=None):
     print(f"📊 正在获取基本面数据...")
     fields = 'ts_code,turnover_rate,pe_ttm,pb,circ_mv'
-    df = pro.daily_basic(trade_date=date_str, fields=fields)
+    # 按交易日落在本地：回退到昨日时读的是昨晚存下的那份，不再重复请求
+    df = ref_data.daily_basic(date_str, fields)
     
     if df.empty and backup_date_str:
         print(f"   ⚠️ {date_str} 数据未出，切换至昨日 {backup_date_str}...")
-        df = pro.daily_basic(trade_date=backup_date_str, fields=fields)
+        df = ref_data.daily_basic(backup_date_str, fields)
         
     if df.empty: return pd.DataFrame()
     
@@ -80,146 +112,398 @@ def get_fundamental_smart(date_str, backup_date_str=None):
     return df[['ts_code', 'pe_ttm', 'pb', 'turnover_rate', 'mv_亿']]
 
 def calculate_rps_logic(dates):
-    df_now = get_snapshot(dates['now'])
-    if df_now.empty: return None
+    # 今天 + 各 N 日锚点的行情并发拉取，而不是一天一天排队
+    anchor_dates = [dates['now']] + [dates[n] for n in RPS_N if n in dates]
+    snapshots = dict(zip(anchor_dates, fetch_scheduler.gather(
+        [functools.partial(run_report.timed, f"stock/snapshot {d}", get_snapshot, d) for d in anchor_dates])))
     
-    df_now.rename(columns={'close_val': 'base_now', 'display_val': 'price_now'}, inplace=True)
+    df_now = snapshots[dates['now']]
+    if df_now.empty: return None
     
-    final_df = df_now.copy()
+    # 各快照只编码一次 sid，N 日前的价格按 sid 数组取值对齐，不再逐窗口 merge 字符串代码
+    master = security_master.get()
+    sids = master.encode(df_now['ts_code'])
+    base_now = df_now['close_val'].to_numpy()
+    cols = {'ts_code': df_now['ts_code'].array, 'sid': sids,
+            'base_now': base_now, 'price_now': df_now['display_val'].to_numpy()}
     for n in RPS_N:
         if n not in dates: continue
-        df_past = get_snapshot(dates[n])
+        df_past = snapshots[dates[n]]
         if df_past.empty: continue
         
-        df_past = df_past[['ts_code', 'close_val']].rename(columns={'close_val': 'base_past'})
-        temp = pd.merge(final_df, df_past, on='ts_code', how='left')
-        
-        temp[f'pct_{n}'] = (temp['base_now'] - temp['base_past']) / temp['base_past']
-        temp[f'RPS_{n}'] = temp[f'pct_{n}'].rank(pct=True) * 100
+        base_past = security_master.lookup(sids, master.encode(df_past['ts_code']), df_past['close_val'].to_numpy())
+        pct = pd.Series((base_now - base_past) / base_past)
+        cols[f'pct_{n}'] = pct
+        cols[f'RPS_{n}'] = pct.rank(pct=True) * 100
         
-        final_df = temp.drop(columns=['base_past'])
-        
-    return final_df
+    return pd.DataFrame(cols)
 
 # ================= 行业获取 =================
 
 def get_industry_worker(code):
-    try:
-        symbol = code.split('.')[0] 
-        df = ak.stock_individual_info_em(symbol=symbol)
-        row = df[df['item'] == '行业']
-        if not row.empty:
-            return code, row['value'].values[0]
-    except:
-        pass
-    return code, "-"
+    """返回细分行业；接口正常但没有行业字段时返回 "-"，网络/限流异常直接抛出交给调度器"""
+    symbol = code.split('.')[0]
+    df = ak.stock_individual_info_em(symbol=symbol)
+    row = df[df['item'] == '行业']
+    if not row.empty:
+        return row['value'].values[0]
+    return industry_cache.MISSING
 
 def fetch_detailed_industries(ts_codes):
-    total = len(ts_codes)
-    print(f"🏭 [Akshare] 启动多线程加速，正在抓取 {total} 只个股的细分题材...")
+    # 先查本地缓存，只有未命中/已过期的才去 akshare
+    cache = industry_cache.IndustryCache()
     industry_map = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-        future_to_code = {executor.submit(get_industry_worker, code): code for code in ts_codes}
-        count = 0
-        for future in concurrent.futures.as_completed(future_to_code):
-            code, industry = future.result()
-            industry_map[code] = industry
-            count += 1
+    todo = []
+    for code in ts_codes:
+        cached = cache.get(code)
+        if cached is None: todo.append(code)
+        else: industry_map[code] = cached
+    
+    total = len(todo)
+    print(f"🏭 [Akshare] 缓存命中 {len(industry_map)} 只，自适应并发抓取剩余 {total} 只个股的细分题材...")
+    if todo:
+        def progress(count):
             if count % 50 == 0: print(f"   🚀 进度: {count}/{total}...")
+        fetched, failed, breaker = fetch_scheduler.adaptive_map(get_industry_worker, todo, progress=progress)
+        for code, industry in fetched.items():
+            industry_map[code] = industry
+            # 确实没有行业的 "-" 也写入缓存，但只保留很短时间
+            cache.put(code, industry)
+        # 抓取失败的不进缓存、不进结果，下次运行再抓，本次由 tushare 行业兜底；尝试时间照记，补抓时排到后面
+        cache.attempted(failed)
+        if breaker:
+            print(f"⛔ [Akshare] 熔断 ({breaker})，{len(failed)} 只改用 tushare 行业")
+            run_report.current().degrade(f"细分行业熔断: {breaker}，{len(failed)} 只未抓到")
+        elif failed:
+            print(f"⚠️ [Akshare] {len(failed)} 只重试后仍失败，改用 tushare 行业")
+            run_report.current().degrade(f"细分行业 {len(failed)} 只抓取失败")
+        cache.save()
     return industry_map
 
+def sector_warmup_codes(df_stock, strong_codes):
+    """
+    细分行业缓存里还没有 (或已过期) 的非强势股，取 SECTOR_WARMUP_PER_RUN 只
+    按上次尝试时间排 (从没试过的最先)，一直失败的代码不会每晚占住名额、挡住新代码
+    """
+    if not WRITE_SECTORS or SECTOR_WARMUP_PER_RUN <= 0: return []
+    cache = industry_cache.IndustryCache()
+    strong = set(strong_codes)
+    todo = [c for c in sorted(df_stock['ts_code']) if c not in strong and cache.get(c) is None]
+    todo.sort(key=cache.last_attempt)
+    return todo[:SECTOR_WARMUP_PER_RUN]
+
 def process_history_and_change(new_df, file_path, date_str):
     """
     date_str: 这里必须传入【真实的交易日期】，而不是系统日期
     """
-    history_map = {}
-    yesterday_rps_map = {}
-    today_change_map = {}
+    res = new_df.copy()
+    codes = res['ts_code']
+    
+    # 默认值：新上榜
+    first_dates = pd.Series(date_str, index=res.index, dtype=object)
+    days = pd.Series(1, index=res.index)
+    changes = pd.Series(999, index=res.index)
     
     if os.path.exists(file_path):
         try:
             old_df = pd.read_csv(file_path)
             old_df['更新日期'] = old_df['更新日期'].astype(str)
+            if '初次入选' not in old_df.columns: old_df['初次入选'] = date_str
+            if '连续天数' not in old_df.columns: old_df['连续天数'] = 0
+            
+            # 同一代码出现多次时以最后一行为准，然后按新表顺序对齐
+            old_df = old_df.drop_duplicates('ts_code', keep='last').set_index('ts_code')
+            found = pd.Series(old_df.index.get_indexer(codes) >= 0, index=res.index)
+            hist = old_df.reindex(codes)
+            hist.index = res.index
+            
+            # 连板逻辑
+            # 如果上次更新日期 == 今天的交易日期 -> 说明今天已经跑过一次了，天数不加
+            # 如果上次更新日期 != 今天的交易日期 -> 说明是新的一天交易日，天数+1
+            same_day = found & (hist['更新日期'] == date_str)
+            hist_days = hist['连续天数'].fillna(0).astype(int)
+            days = days.mask(found, hist_days + (~same_day).astype(int))
+            first_dates = first_dates.mask(found, hist['初次入选'])
             
-            for _, row in old_df.iterrows():
-                code = row['ts_code']
-                last_update = row.get('更新日期', '')
+            # 智能继承变动值逻辑：同日重跑沿用旧变动值，否则与昨日 RPS_50 作差
+            if 'rps_50_chg' in hist.columns:
+                changes = changes.mask(same_day, hist['rps_50_chg'])
+            if 'RPS_50' in hist.columns:
+                changes = changes.mask(found & ~same_day, res['RPS_50'] - hist['RPS_50'])
                 
-                history_map[code] = {
-                    'first': row.get('初次入选', date_str),
-                    'days': row.get('连续天数', 0),
-                    'last_update': last_update
-                }
-
-                # 智能继承变动值逻辑
-                if last_update == date_str:
-                    if 'rps_50_chg' in row:
-                        today_change_map[code] = row['rps_50_chg']
-                else:
-                    if 'RPS_50' in row:
-                        yesterday_rps_map[code] = row['RPS_50']
-                        
         except Exception as e:
             print(f"⚠️ 读取历史文件微瑕: {e}")
+    
+    res['初次入选'] = first_dates
+    res['连续天数'] = days
+    res['rps_50_chg'] = changes
+    # 雪球链接
+    res['xueqiu_url'] = links.xueqiu_urls(codes)
+    return res
 
-    res = []
-    for _, row in new_df.iterrows():
-        code = row['ts_code']
-        first_date = date_str
-        days_count = 1
-        
-        # 连板逻辑
-        if code in history_map:
-            hist = history_map[code]
-            # 如果上次更新日期 == 今天的交易日期 -> 说明今天已经跑过一次了，天数不加
-            # 如果上次更新日期 != 今天的交易日期 -> 说明是新的一天交易日，天数+1
-            if hist['last_update'] == date_str:
-                days_count = hist['days']
-                first_date = hist['first']
+# 全市场表的列及保存精度 (小数位)，和看板 UNIVERSE_COLS 对应
+UNIVERSE_DECIMALS = {'price_now': 2, **{f'RPS_{n}': 1 for n in RPS_N}, 'pe_ttm': 1, 'turnover_rate': 2, 'mv_亿': 1}
+
+def save_full_universe(df_stock, strong_stock, date_fmt, path=UNIVERSE_PATH):
+    """
+    保存全市场结果，供看板查看非强势股的排名
+    细分行业只有强势股抓过，其余沿用 tushare 的 industry (与强势股缺题材时的修补逻辑一致)
+    """
+    cols = ['ts_code', 'name', 'industry', *UNIVERSE_DECIMALS]
+    uni = df_stock[[c for c in cols if c in df_stock.columns]].copy()
+    
+    detail = strong_stock.set_index('ts_code')['细分行业'] if '细分行业' in strong_stock.columns else pd.Series(dtype=object)
+    uni['细分行业'] = uni['ts_code'].map(detail)
+    if 'industry' in uni.columns:
+        uni['细分行业'] = uni['细分行业'].fillna(uni['industry'])
+    uni['strong'] = uni['ts_code'].isin(strong_stock['ts_code'])
+    uni['更新日期'] = date_fmt
+    uni = uni.drop(columns=['industry'], errors='ignore')
+    
+    for c in uni.columns:
+        if c in ('ts_code', 'name', 'strong'): continue
+        if c in UNIVERSE_DECIMALS: uni[c] = uni[c].astype('float64').round(UNIVERSE_DECIMALS[c]).astype('float32')
+        else: uni[c] = uni[c].astype('category')
+    
+    uni = uni.sort_values('RPS_50', ascending=False, ignore_index=True) if 'RPS_50' in uni.columns else uni
+    uni.to_parquet(path, index=False, compression='zstd')
+    print(f"🌐 全市场 {len(uni)} 只已保存至 {path}")
+
+def sector_strength(df_stock, strong_stock):
+    """
+    全市场按 行业 (tushare) 和 细分行业 两级汇总：成员数、强势股数、各窗口 RPS 中位数/均值、高于 THRESHOLD 的占比 (%)
+    两级摞成一张长表，一次 groupby 算完
+    细分行业只认行业缓存里真正从 akshare 抓到的值 (强势股和补抓的非强势股同一口径)，
+    抓取失败后 fill_industries 补上的 tushare 行业不算，没抓到的不计入细分行业这一级
+    """
+    windows = [f'RPS_{n}' for n in RPS_N if f'RPS_{n}' in df_stock.columns]
+    cache = industry_cache.IndustryCache()
+    cached = pd.Series({code: e['value'] for code, e in cache.entries.items() if e['value'] != industry_cache.MISSING}, dtype=object)
+    sub = df_stock['ts_code'].map(cached)
+    
+    base = df_stock[windows].copy()
+    for c in windows:
+        # 没有该窗口数据的 (上市不满 N 天) 不参与占比
+        base[f'{c}_above'] = base[c].gt(THRESHOLD).astype('float64').where(base[c].notna()) * 100
+    base['strong'] = df_stock['ts_code'].isin(strong_stock['ts_code'])
+    industry = df_stock['industry'] if 'industry' in df_stock.columns else pd.Series(index=df_stock.index, dtype=object)
+    long = pd.concat([base.assign(level='行业', sector=industry), base.assign(level='细分行业', sector=sub)], ignore_index=True)
+    long = long[long['sector'].notna() & (long['sector'] != '-')]
+    
+    agg = {'members': ('strong', 'size'), 'strong': ('strong', 'sum')}
+    for c in windows:
+        agg[f'{c}_median'] = (c, 'median')
+        agg[f'{c}_mean'] = (c, 'mean')
+        agg[f'{c}_above'] = (f'{c}_above', 'mean')
+    return long.groupby(['level', 'sector'], sort=False).agg(**agg).reset_index()
+
+def save_sector_strength(df_stock, strong_stock, date_fmt, path=SECTOR_PATH):
+    """
+    写板块强度表，breadth_chg = 今天与上一个交易日 RPS_50 高于阈值占比之差 (同日重跑沿用旧值)
+    细分行业的成员随补抓覆盖面变化，成员数和昨天不同的板块不给 breadth_chg (否则反映的是覆盖面而不是强弱)
+    """
+    sectors = sector_strength(df_stock, strong_stock)
+    sectors['breadth_chg'] = np.nan
+    if os.path.exists(path) and 'RPS_50_above' in sectors.columns:
+        try:
+            old = pd.read_parquet(path)
+            old_key = old['level'].astype(str) + '|' + old['sector'].astype(str)
+            key = sectors['level'] + '|' + sectors['sector'].astype(str)
+            if (old['更新日期'] == date_fmt).all():
+                sectors['breadth_chg'] = key.map(pd.Series(old['breadth_chg'].to_numpy(), index=old_key))
             else:
-                days_count = hist['days'] + 1
-                first_date = hist['first']
-        
-        row['初次入选'] = first_date
-        row['连续天数'] = days_count
-        
-        # 变动值逻辑
-        if code in today_change_map:
-            row['rps_50_chg'] = today_change_map[code]
-        elif code in yesterday_rps_map:
-            row['rps_50_chg'] = row['RPS_50'] - yesterday_rps_map[code]
-        else:
-            row['rps_50_chg'] = 999 
-            
-        # 雪球链接
-        if '.' in code:
-            num, suffix = code.split('.')
-            link_code = suffix.upper() + num 
-            row['xueqiu_url'] = f"https://xueqiu.com/S/{link_code}"
-        else:
-            row['xueqiu_url'] = ""
-            
-        res.append(row)
-    return pd.DataFrame(res)
+                prev = pd.Series(old['RPS_50_above'].to_numpy(), index=old_key)
+                prev_members = key.map(pd.Series(old['members'].to_numpy(), index=old_key))
+                chg = sectors['RPS_50_above'] - key.map(prev).astype('float64')
+                sectors['breadth_chg'] = chg.where((sectors['level'] != '细分行业') | (sectors['members'] == prev_members))
+        except Exception as e:
+            print(f"⚠️ 读取上一份板块强度失败，跳过变化: {e}")
+    sectors['更新日期'] = date_fmt
+    
+    for c in sectors.columns:
+        if c in ('members', 'strong'): sectors[c] = sectors[c].astype('int32')
+        elif pd.api.types.is_float_dtype(sectors[c]): sectors[c] = sectors[c].astype('float32')
+        else: sectors[c] = sectors[c].astype('category')
+    sort_col = 'RPS_50_median' if 'RPS_50_median' in sectors.columns else 'members'
+    sectors = sectors.sort_values(['level', sort_col], ascending=[True, False], ignore_index=True)
+    sectors.to_parquet(path, index=False)
+    print(f"🧭 板块强度 {len(sectors)} 个板块已保存至 {path}")
+
+def screen_strong(df_stock, basic, fina_df, date_fmt):
+    """按 sid 贴上基础信息和基本面，按三个窗口的阈值筛出强势股"""
+    df_stock = security_master.join(df_stock, basic)
+    if not fina_df.empty:
+        df_stock = security_master.join(df_stock, fina_df)
+    mask = (df_stock['RPS_50'] > THRESHOLD) & (df_stock['RPS_120'] > THRESHOLD) & (df_stock['RPS_250'] > THRESHOLD)
+    strong_stock = df_stock[mask].copy()
+    # ★ 这里的更新日期，一定要用【交易日期】，而不是系统日期
+    strong_stock['更新日期'] = date_fmt
+    return df_stock, strong_stock
+
+def fill_industries(strong_stock, industry_map):
+    strong_stock['细分行业'] = strong_stock['ts_code'].map(industry_map)
+    strong_stock['细分行业'] = strong_stock['细分行业'].fillna('-')
+    mask_missing = strong_stock['细分行业'] == '-'
+    if 'industry' in strong_stock.columns:
+        strong_stock.loc[mask_missing, '细分行业'] = strong_stock.loc[mask_missing, 'industry']
+    return strong_stock
+
+def save_day(strong_stock, date_fmt, clock):
+    """接上连榜/变动 (以当前 CSV 为昨天)，写 CSV 并记一笔增量"""
+    # CSV 不在仓库里，先从增量日志还原上一次的结果
+    delta_store.ensure_csv(DELTA_KIND, STOCK_PATH)
+    final_stock = process_history_and_change(strong_stock, STOCK_PATH, date_fmt)
+    clock.lap('history merge')
+    
+    base_cols = ['ts_code', 'name', '细分行业', 'price_now', 'RPS_50', 'rps_50_chg', 'RPS_120', 'RPS_250', '连续天数']
+    extra_cols = ['pe_ttm', 'mv_亿', 'turnover_rate', 'xueqiu_url', '更新日期', '初次入选']
+    save_cols = [c for c in base_cols + extra_cols if c in final_stock.columns]
+    
+    final_stock = final_stock[save_cols].round(2)
+    final_stock.to_csv(STOCK_PATH, index=False)
+    clock.lap('csv write')
+    delta_store.record(DELTA_KIND, date_fmt, final_stock)
+    clock.lap('delta write')
+    return final_stock
+
+def to_fmt(date_str):
+    """YYYYMMDD -> YYYY-MM-DD (CSV 里的 更新日期 格式)"""
+    return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+
+def last_update_date():
+    """上一次成功写入的交易日 (YYYYMMDD)，没有历史时返回 None"""
+    delta_store.ensure_csv(DELTA_KIND, STOCK_PATH)
+    if not os.path.exists(STOCK_PATH): return None
+    try:
+        last = pd.read_csv(STOCK_PATH, usecols=['更新日期'])['更新日期'].dropna().astype(str).max()
+        return last.replace('-', '') if isinstance(last, str) else None
+    except Exception as e:
+        print(f"⚠️ 读取上次更新日期失败: {e}")
+        return None
+
+def missing_trading_days(today_sys, dates=None):
+    """
+    上次 更新日期 之后、截至今天的所有交易日 (升序) 和降序日历
+    只漏了今天 (或什么都没漏) 时返回空列表，走正常的单日流程
+    """
+    last = last_update_date()
+    if not last: return [], None
+    # 已有锚点且什么都没漏：上次就是最新交易日，或今天是交易日且上次是上一个交易日 (只差今天)，不用再拉日历
+    # 非交易日 (周末) 上次停在 prev 时，最新交易日 now 还没跑，不能走这条捷径
+    if dates and (last == dates['now'] or (today_sys == dates['now'] and last == dates.get('prev'))): return [], None
+    start_date = (datetime.datetime.strptime(last, '%Y%m%d') - datetime.timedelta(days=400)).strftime('%Y%m%d')
+    cal = sorted(ref_data.trade_dates(start_date, today_sys), reverse=True)
+    missing = sorted(d for d in cal if last < d <= today_sys)
+    if missing in ([], [today_sys]): return [], cal
+    return missing, cal
+
+def catch_up_job(days, cal):
+    """
+    补跑漏掉的交易日：所有锚点行情、基本面一次性并发拉取，各天 RPS 并行计算，
+    细分行业按所有天的强势股并集只抓一次，最后按日期顺序逐天接上连榜天数和 rps_50_chg
+    """
+    report = run_report.current()
+    clock = run_report.StageClock('stock')
+    if len(days) > CATCH_UP_MAX_DAYS:
+        print(f"⚠️ 漏了 {len(days)} 个交易日，本次先补最早的 {CATCH_UP_MAX_DAYS} 个")
+        days = days[:CATCH_UP_MAX_DAYS]
+    print(f"🩹 补跑 {len(days)} 个交易日: {days[0]} ~ {days[-1]}")
+    report.trade_date = days[-1]
+    os.makedirs("data", exist_ok=True)
+    
+    anchors = {d: anchors_from_calendar(cal, cal.index(d)) for d in days}
+    need = sorted({v for a in anchors.values() for k, v in a.items() if k != 'prev' and v})
+    prefetch = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    basic_future = prefetch.submit(ref_data.stock_basic)
+    fina_futures = {d: prefetch.submit(get_fundamental_smart, d, anchors[d].get('prev')) for d in days}
+    prefetch.shutdown(wait=False)
+    # 先把所有天要用的快照并发落进本地行情仓库，之后各天计算只读本地
+    fetch_scheduler.gather([functools.partial(get_snapshot, d) for d in need])
+    clock.lap('snapshots', rows=len(need))
+    
+    rps_by_day = dict(zip(days, fetch_scheduler.gather(
+        [functools.partial(calculate_rps_logic, anchors[d]) for d in days])))
+    clock.lap('rps')
+    
+    basic_future.result()
+    done = []
+    for d in days:
+        if rps_by_day[d] is None:
+            # 行情还没出 (通常是盘后数据延迟的当天)，后面的天也无法接上，留到下次
+            print(f"⚠️ {d} 无行情数据，补跑到此为止")
+            report.degrade(f"补跑停在 {d}: 无行情数据")
+            break
+        done.append(d)
+    # 列表里没有的代码 (新股) 会触发一次整表刷新
+    basic = ref_data.stock_basic(set().union(*(rps_by_day[d]['ts_code'] for d in done))) if done else None
+    strong_by_day, universe_by_day = {}, {}
+    for d in done:
+        universe_by_day[d], strong_by_day[d] = screen_strong(rps_by_day[d], basic, fina_futures[d].result(), to_fmt(d))
+    clock.lap('screen', rows=sum(len(x) for x in strong_by_day.values()))
+    
+    codes = sorted(set().union(*(x['ts_code'] for x in strong_by_day.values()))) if strong_by_day else []
+    if done: codes += sector_warmup_codes(universe_by_day[done[-1]], codes)
+    industry_map = fetch_detailed_industries(codes) if codes else {}
+    clock.lap('industries')
+    
+    # 连榜天数和 rps_50_chg 依赖前一天的结果，必须按日期顺序串行接
+    for d in done:
+        strong_stock = fill_industries(strong_by_day[d], industry_map)
+        save_day(strong_stock, to_fmt(d), clock)
+        if WRITE_SECTORS:
+            # 逐天写，breadth_chg 才能按日期一天天接上
+            save_sector_strength(universe_by_day[d], strong_stock, to_fmt(d))
+        print(f"   ✅ {d} 已补齐 ({len(strong_stock)} 只)")
+    
+    if done and WRITE_FULL_UNIVERSE:
+        # 全市场只保留最新一天
+        save_full_universe(universe_by_day[done[-1]], strong_by_day[done[-1]], to_fmt(done[-1]))
+        clock.lap('universe write')
+    print(f"✅ 补跑完成：{len(done)}/{len(days)} 个交易日")
 
-def main_job():
+def main_job(dates=None):
+    """dates: 可由 pipeline.py 传入已取好的交易日锚点，避免重复拉日历"""
     print("🚀 启动 A股 RPS 更新 (V5.0 严格交易日版)...")
+    report = run_report.current()
+    clock = run_report.StageClock('stock')
     
     # 获取系统当前日期 (YYYYMMDD)
     today_sys = datetime.datetime.now().strftime('%Y%m%d')
     
+    # 先看上次之后有没有漏掉的交易日：有就并发补齐 (含今天)，连榜天数按日期顺序接上
+    if CATCH_UP:
+        try:
+            days, cal = missing_trading_days(today_sys, dates)
+        except Exception as e:
+            print(f"⚠️ 检查漏跑交易日失败，按单日流程继续: {e}")
+            days = []
+        if days:
+            try:
+                catch_up_job(days, cal)
+            except Exception as e:
+                print(f"❌ 补跑出错: {e}")
+                report.fail(e)
+                import traceback
+                traceback.print_exc()
+            return
+    
     # 获取交易所日历信息
-    dates = get_trading_dates(today_sys)
+    if dates is None:
+        dates = get_trading_dates(today_sys)
     if not dates: 
         print("❌ 无法获取交易日历，退出")
+        report.fail("无法获取交易日历")
         return
+    clock.lap('calendar')
     
     trading_date = dates['now'] # 这是交易所的最新交易日
+    report.trade_date = trading_date
     
     # ★★★ 核心门禁：如果系统日期 != 交易所最新日期，说明今天是非交易日 ★★★
     if today_sys != trading_date:
         print(f"😴 今天 ({today_sys}) 不是交易日 (最新交易日: {trading_date})。")
         print("🛑 脚本停止运行，保持数据不更新，防止连榜天数虚增。")
+        report.skip(f"{today_sys} 非交易日")
         return # 直接结束！
 
     # 如果通过门禁，说明今天是交易日，继续执行...
@@ -227,62 +511,64 @@ def main_job():
     
     # 注意：后面所有的日期引用，都必须用 trading_date (交易所日期)，而不是系统日期
     # 将 YYYYMMDD 转为 YYYY-MM-DD 格式用于 CSV 保存
-    trading_date_fmt = f"{trading_date[:4]}-{trading_date[4:6]}-{trading_date[6:]}"
+    trading_date_fmt = to_fmt(trading_date)
 
     os.makedirs("data", exist_ok=True)
 
+    # 基础信息、基本面和行情互不依赖，提前在后台发出 (列表过期时的整表刷新也在这里做)
+    prefetch = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    basic_future = prefetch.submit(ref_data.stock_basic)
+    fina_future = prefetch.submit(get_fundamental_smart, dates['now'], dates.get('prev'))
+    prefetch.shutdown(wait=False)
+
     # 1. 计算 RPS
     df_stock = calculate_rps_logic(dates)
+    clock.lap('rps', rows=None if df_stock is None else len(df_stock))
     
     if df_stock is not None:
         try:
             print("   合并基础数据...")
-            basic = pro.stock_basic(exchange='', list_status='L', fields='ts_code,name,industry')
-            df_stock = pd.merge(df_stock, basic, on='ts_code', how='left')
-            
-            fina_df = get_fundamental_smart(dates['now'], dates.get('prev'))
-            if not fina_df.empty:
-                df_stock = pd.merge(df_stock, fina_df, on='ts_code', how='left')
-            
-            # 2. 筛选
-            mask = (df_stock['RPS_50'] > THRESHOLD) & (df_stock['RPS_120'] > THRESHOLD) & (df_stock['RPS_250'] > THRESHOLD)
-            strong_stock = df_stock[mask].copy()
-            
-            # ★ 这里的更新日期，一定要用【交易日期】，而不是系统日期
-            strong_stock['更新日期'] = trading_date_fmt
+            # 2. 合并 + 筛选
+            basic_future.result()
+            basic = ref_data.stock_basic(df_stock['ts_code'])
+            df_stock, strong_stock = screen_strong(df_stock, basic, fina_future.result(), trading_date_fmt)
+            clock.lap('fundamentals + screen', rows=len(strong_stock))
             
             # 3. 细分行业
             codes_list = strong_stock['ts_code'].tolist()
-            if codes_list:
-                industry_map = fetch_detailed_industries(codes_list)
-                strong_stock['细分行业'] = strong_stock['ts_code'].map(industry_map)
-                
-                print("🔧 修补缺失题材...")
-                strong_stock['细分行业'] = strong_stock['细分行业'].fillna('-')
-                mask_missing = strong_stock['细分行业'] == '-'
-                if 'industry' in strong_stock.columns:
-                    strong_stock.loc[mask_missing, '细分行业'] = strong_stock.loc[mask_missing, 'industry']
-            else:
-                strong_stock['细分行业'] = '-'
+            # 顺带给一批非强势股补抓细分行业，供板块强度用
+            codes_list += sector_warmup_codes(df_stock, codes_list)
+            industry_map = fetch_detailed_industries(codes_list) if codes_list else {}
+            print("🔧 修补缺失题材...")
+            strong_stock = fill_industries(strong_stock, industry_map)
+            clock.lap('industries')
             
-            # 4. 处理历史 (传入交易日期)
-            final_stock = process_history_and_change(strong_stock, STOCK_PATH, trading_date_fmt)
+            # 4. 处理历史 (传入交易日期) + 5. 保存
+            save_day(strong_stock, trading_date_fmt, clock)
+            print(f"✅ 交易日数据更新完成！")
             
-            # 5. 保存
-            base_cols = ['ts_code', 'name', '细分行业', 'price_now', 'RPS_50', 'rps_50_chg', 'RPS_120', 'RPS_250', '连续天数']
-            extra_cols = ['pe_ttm', 'mv_亿', 'turnover_rate', 'xueqiu_url', '更新日期', '初次入选']
+            # 6. 全市场输出 (可选)
+            if WRITE_FULL_UNIVERSE:
+                save_full_universe(df_stock, strong_stock, trading_date_fmt)
+                clock.lap('universe write')
             
-            save_cols = [c for c in base_cols + extra_cols if c in final_stock.columns]
-            
-            final_stock[save_cols].round(2).to_csv(STOCK_PATH, index=False)
-            print(f"✅ 交易日数据更新完成！")
+            # 7. 板块强度 (可选)
+            if WRITE_SECTORS:
+                save_sector_strength(df_stock, strong_stock, trading_date_fmt)
+                clock.lap('sector write')
             
         except Exception as e:
             print(f"❌ 处理出错: {e}")
+            report.fail(e)
             import traceback
             traceback.print_exc()
     else:
         print("⚠️ 未获取到行情数据")
+        report.fail("未获取到行情数据")
 
 if __name__ == "__main__":
-    main_job()
+    run_report.start('stock')
+    try:
+        main_job()
+    finally:
+        run_report.finish()
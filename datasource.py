@@ -0,0 +1,319 @@
+import os
+import time
+import json
+import random
+import pickle
+import hashlib
+import datetime
+import threading
+import collections
+import numpy as np
+import pandas as pd
+import run_report
+
+# ================= 配置区 =================
+# 数据源模式：
+#   live      真实 tushare / akshare (默认)
+#   record    真实请求，同时把每次响应录制到本地
+#   replay    只回放录制好的响应，不联网
+#   synthetic 本地合成的全市场 (5000 只个股 / 1500 只 ETF)，用于压测和基准
+DATA_SOURCE = os.getenv('CHILAM_DATA_SOURCE', 'live')
+RECORD_DIR = os.getenv('CHILAM_RECORD_DIR', 'data/cache/recordings')
+
+# 本地替身的网络模拟 (replay / synthetic 生效)
+FAKE_LATENCY_MS = float(os.getenv('CHILAM_FAKE_LATENCY_MS', '0'))
+# 模拟服务端限流：每分钟超过这么多次调用就报错 (0 表示不限)
+FAKE_CALLS_PER_MIN = int(os.getenv('CHILAM_FAKE_CALLS_PER_MIN', '0'))
+# 随机失败率 (0~1)，模拟 akshare 偶发的连接被重置
+FAKE_ERROR_RATE = float(os.getenv('CHILAM_FAKE_ERROR_RATE', '0'))
+
+SYNTHETIC_STOCKS = int(os.getenv('CHILAM_SYNTHETIC_STOCKS', '5000'))
+SYNTHETIC_ETFS = int(os.getenv('CHILAM_SYNTHETIC_ETFS', '1500'))
+
+LOCAL_TOKEN = ''
+MY_TOKEN = os.getenv('TUSHARE_TOKEN', LOCAL_TOKEN)
+
+# ================= 录制 / 回放 =================
+# 日期窗口参数 (start_date / end_date) 多半是按“今天”往前推出来的，每天都不一样
+# 录制文件只按 接口名 + 其余参数 (trade_date / ts_code / fields ...) 定位，窗口参数不进文件名：
+# 录制时同一接口不同窗口的结果并进同一个文件，回放时再按请求的窗口截取
+WINDOW_KWARGS = ('start_date', 'end_date')
+WINDOW_COLS = ('cal_date', 'trade_date')
+
+def _record_path(kind, name, kwargs):
+    key = json.dumps({k: v for k, v in kwargs.items() if k not in WINDOW_KWARGS},
+                     sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.md5(f"{name}|{key}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(RECORD_DIR, kind, f"{name}_{digest}.pkl")
+
+def _windowed(kwargs):
+    return any(kwargs.get(k) for k in WINDOW_KWARGS)
+
+def _clip_window(df, kwargs):
+    """按请求的 start_date / end_date 截取录制里的行 (没有日期列的原样返回)"""
+    col = next((c for c in WINDOW_COLS if c in getattr(df, 'columns', [])), None)
+    if col is None: return df
+    days = df[col].astype(str)
+    mask = np.ones(len(df), dtype=bool)
+    if kwargs.get('start_date'): mask &= (days >= str(kwargs['start_date'])).to_numpy()
+    if kwargs.get('end_date'): mask &= (days <= str(kwargs['end_date'])).to_numpy()
+    return df[mask].reset_index(drop=True)
+
+class RecordingClient:
+    """透明代理：调用真实接口，并把 (接口名, 参数) -> 响应 存成 pickle"""
+
+    def __init__(self, inner, kind):
+        self.inner = inner
+        self.kind = kind
+
+    def __getattr__(self, name):
+        fn = getattr(self.inner, name)
+        def wrapper(**kwargs):
+            df = fn(**kwargs)
+            path = _record_path(self.kind, name, kwargs)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            saved = df
+            if _windowed(kwargs) and isinstance(df, pd.DataFrame) and os.path.exists(path):
+                with open(path, 'rb') as f:
+                    saved = pd.concat([pickle.load(f), df], ignore_index=True).drop_duplicates(ignore_index=True)
+            with open(path, 'wb') as f:
+                pickle.dump(saved, f)
+            return df
+        return wrapper
+
+class ReplayClient:
+    """只读录制文件；没录过的请求直接报错，避免悄悄联网"""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def __getattr__(self, name):
+        def wrapper(**kwargs):
+            path = _record_path(self.kind, name, kwargs)
+            if not os.path.exists(path):
+                raise KeyError(f"没有 {self.kind}.{name}({kwargs}) 的录制数据")
+            with open(path, 'rb') as f:
+                df = pickle.load(f)
+            return _clip_window(df, kwargs) if _windowed(kwargs) else df
+        return wrapper
+
+# ================= 合成市场 =================
+
+class SyntheticMarket:
+    """
+    确定性的合成全市场：同样的参数每次生成同样的数据
+    同时实现 tushare pro 和 akshare 里本项目用到的接口
+    """
+    EXCLUDE_SAMPLES = ['债', '货币', '黄金', '纳指', '恒生']
+    INDUSTRIES = ['半导体', '通信设备', '有色金属', '化肥行业', '电力', '黄金', '软件开发', '医疗器械',
+                  '汽车零部件', '光伏设备', '证券', '银行', '白酒', '化学制药', '消费电子']
+
+    def __init__(self, n_stocks=SYNTHETIC_STOCKS, n_etfs=SYNTHETIC_ETFS, n_days=420, seed=42):
+        rng = np.random.default_rng(seed)
+        today = pd.Timestamp(datetime.date.today())
+        # 工作日 + 今天 (保证个股门禁在周末压测时也能通过)
+        cal = pd.bdate_range(end=today, periods=n_days).union(pd.DatetimeIndex([today]))
+        self.dates = list(cal.strftime('%Y%m%d'))
+        self.date_pos = {d: i for i, d in enumerate(self.dates)}
+
+        self.stock_codes = np.array([f"{600000 + i:06d}.SH" if i % 2 else f"{i:06d}.SZ" for i in range(n_stocks)])
+        self.stock_names = np.array([f"合成股{i}" for i in range(n_stocks)])
+        self.stock_industry = rng.choice(self.INDUSTRIES, n_stocks)
+        steps = rng.normal(0.0003, 0.025, (len(self.dates), n_stocks))
+        self.stock_close = np.round(10 * np.exp(np.cumsum(steps, axis=0)), 2)
+        self.adj = np.cumprod(1 + (rng.random((len(self.dates), n_stocks)) < 0.002) * 0.05, axis=0)
+
+        self.etf_codes = np.array([f"{510000 + i:06d}.SH" if i % 2 else f"{159000 + i:06d}.SZ" for i in range(n_etfs)])
+        names = []
+        for i in range(n_etfs):
+            tag = self.EXCLUDE_SAMPLES[i % len(self.EXCLUDE_SAMPLES)] if i % 4 == 0 else ''
+            names.append(f"{tag}合成{i}ETF")
+        self.etf_names = np.array(names)
+        etf_steps = rng.normal(0.0002, 0.015, (len(self.dates), n_etfs))
+        self.etf_close = np.round(np.exp(np.cumsum(etf_steps, axis=0)), 3)
+
+    # ---------- tushare ----------
+    def trade_cal(self, exchange='', is_open='1', start_date=None, end_date=None, **_):
+        days = [d for d in self.dates if (not start_date or d >= start_date) and (not end_date or d <= end_date)]
+        return pd.DataFrame({'exchange': 'SSE', 'cal_date': days, 'is_open': 1})
+
+    def _row(self, trade_date):
+        return self.date_pos.get(trade_date)
+
+    def daily(self, trade_date=None, fields=None, **_):
+        i = self._row(trade_date)
+        if i is None: return pd.DataFrame(columns=['ts_code', 'close'])
+        return pd.DataFrame({'ts_code': self.stock_codes, 'trade_date': trade_date, 'close': self.stock_close[i]})
+
+    def adj_factor(self, trade_date=None, fields=None, **_):
+        i = self._row(trade_date)
+        if i is None: return pd.DataFrame(columns=['ts_code', 'adj_factor'])
+        return pd.DataFrame({'ts_code': self.stock_codes, 'trade_date': trade_date, 'adj_factor': self.adj[i]})
+
+    def daily_basic(self, trade_date=None, fields=None, **_):
+        i = self._row(trade_date)
+        if i is None: return pd.DataFrame(columns=['ts_code', 'turnover_rate', 'pe_ttm', 'pb', 'circ_mv'])
+        rng = np.random.default_rng(i)
+        n = len(self.stock_codes)
+        return pd.DataFrame({
+            'ts_code': self.stock_codes,
+            'turnover_rate': rng.uniform(0.2, 15, n).round(2),
+            'pe_ttm': np.where(rng.random(n) < 0.1, np.nan, rng.uniform(-30, 200, n).round(2)),
+            'pb': rng.uniform(0.5, 12, n).round(2),
+            'circ_mv': rng.uniform(2e5, 2e7, n).round(2),
+        })
+
+    def stock_basic(self, exchange='', list_status='L', fields=None, **_):
+        return pd.DataFrame({'ts_code': self.stock_codes, 'name': self.stock_names, 'industry': self.stock_industry})
+
+    def fund_daily(self, trade_date=None, **_):
+        i = self._row(trade_date)
+        if i is None: return pd.DataFrame(columns=['ts_code', 'close'])
+        return pd.DataFrame({'ts_code': self.etf_codes, 'trade_date': trade_date, 'close': self.etf_close[i]})
+
+    def fund_basic(self, market='E', **_):
+        return pd.DataFrame({'ts_code': self.etf_codes, 'name': self.etf_names, 'market': market})
+
+    # ---------- akshare ----------
+    def stock_individual_info_em(self, symbol=None, **_):
+        idx = int(hashlib.md5(str(symbol).encode()).hexdigest(), 16) % len(self.INDUSTRIES)
+        return pd.DataFrame({'item': ['股票代码', '行业'], 'value': [symbol, self.INDUSTRIES[idx]]})
+
+    def stock_zh_a_spot_em(self, **_):
+        # 盘中快照：在最新收盘价上按当前分钟加扰动，每次刷新价格都会变
+        rng = np.random.default_rng(int(time.time() // 60))
+        last = self.stock_close[-1] * (1 + rng.normal(0, 0.01, len(self.stock_codes)))
+        return pd.DataFrame({'代码': [c[:6] for c in self.stock_codes], '名称': self.stock_names,
+                             '最新价': np.round(last, 2), '涨跌幅': np.round((last / self.stock_close[-1] - 1) * 100, 2)})
+
+    def stock_info_global_cls(self, **_):
+        now = datetime.datetime.now()
+        rows = []
+        for k in range(300):
+            t = now - datetime.timedelta(minutes=3 * k)
+            ind = self.INDUSTRIES[k % len(self.INDUSTRIES)]
+            rows.append({'标题': f"【合成快讯{k}】{ind}板块异动", '内容': f"{ind}板块午后走强，{self.stock_names[k]}涨停。",
+                         '发布日期': t.strftime('%Y-%m-%d'), '发布时间': t.strftime('%H:%M:%S')})
+        return pd.DataFrame(rows)
+
+class SimulatedNetwork:
+    """给本地替身加上延迟、服务端限流和随机失败，模拟真实网络"""
+
+    def __init__(self, inner, latency_ms=FAKE_LATENCY_MS, calls_per_min=FAKE_CALLS_PER_MIN, error_rate=FAKE_ERROR_RATE):
+        self.inner = inner
+        self.latency = latency_ms / 1000
+        self.calls_per_min = calls_per_min
+        self.error_rate = error_rate
+        self.calls = collections.deque()
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        fn = getattr(self.inner, name)
+        def wrapper(**kwargs):
+            if self.calls_per_min:
+                with self.lock:
+                    now = time.monotonic()
+                    while self.calls and now - self.calls[0] > 60: self.calls.popleft()
+                    if len(self.calls) >= self.calls_per_min:
+                        raise Exception(f"抱歉，您每分钟最多访问该接口{self.calls_per_min}次")
+                    self.calls.append(now)
+            if self.latency: time.sleep(self.latency)
+            if self.error_rate and random.random() < self.error_rate:
+                raise ConnectionError("Connection reset by peer (模拟)")
+            return fn(**kwargs)
+        return wrapper
+
+class InstrumentedClient:
+    """记录每个接口的调用次数、耗时、行数、字节数和失败次数到运行报告"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        fn = getattr(self.inner, name)
+        if not callable(fn): return fn
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                out = fn(*args, **kwargs)
+            except Exception:
+                run_report.current().record_call(name, time.perf_counter() - t0, ok=False)
+                raise
+            rows, nbytes = 0, 0
+            if isinstance(out, pd.DataFrame):
+                rows, nbytes = len(out), int(out.memory_usage(deep=True).sum())
+            run_report.current().record_call(name, time.perf_counter() - t0, rows, nbytes)
+            return out
+        wrapper.__name__ = name
+        return wrapper
+
+class LazyClient:
+    """
+    第一次真正用到接口时才导入 tushare / akshare 并建客户端 (两者各要近 1 秒)，
+    脚本在模块顶层拿 pro / ak 不再付这笔启动成本；初始化耗时记为运行报告里的一个阶段
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self._inner = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._inner is None:
+            with self._lock:
+                if self._inner is None:
+                    t0 = time.perf_counter()
+                    inner = _build(self.kind)
+                    run_report.current().add_stage(f"init/{self.kind}", time.perf_counter() - t0)
+                    self._inner = inner
+        return self._inner
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+# ================= 对外接口 =================
+
+_clients = {}
+_lock = threading.Lock()
+_market = None
+
+def _synthetic_market():
+    global _market
+    if _market is None: _market = SyntheticMarket()
+    return _market
+
+def _live_pro():
+    import tushare as ts
+    try:
+        if MY_TOKEN:
+            ts.set_token(MY_TOKEN)
+            return ts.pro_api()
+        # 尝试匿名初始化 (通常会失败，需配置 Token)
+        return ts.pro_api('')
+    except Exception as e:
+        print(f"❌ Token 设置异常: {e}")
+        return None
+
+def _live_ak():
+    import akshare as ak
+    return ak
+
+def _build(kind):
+    live = {'pro': _live_pro, 'ak': _live_ak}[kind]
+    if DATA_SOURCE == 'live': return live()
+    if DATA_SOURCE == 'record': return RecordingClient(live(), kind)
+    if DATA_SOURCE == 'replay': return SimulatedNetwork(ReplayClient(kind))
+    if DATA_SOURCE == 'synthetic': return SimulatedNetwork(_synthetic_market())
+    raise ValueError(f"未知数据源 CHILAM_DATA_SOURCE={DATA_SOURCE}")
+
+def get_pro():
+    """tushare pro 客户端 (进程内单例，首次调用接口时才初始化)"""
+    with _lock:
+        if 'pro' not in _clients: _clients['pro'] = InstrumentedClient(LazyClient('pro'))
+        return _clients['pro']
+
+def get_ak():
+    """akshare 模块或其本地替身 (进程内单例，首次调用接口时才导入)"""
+    with _lock:
+        if 'ak' not in _clients: _clients['ak'] = InstrumentedClient(LazyClient('ak'))
+        return _clients['ak']
@@ -0,0 +1,374 @@
+import os
+import sys
+import gzip
+import json
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+# ================= 配置区 =================
+# 每日结果的增量日志 (随数据一起提交到 git，代替每天整表重写的 CSV)：
+#   data/deltas/<kind>/<YYYY-MM-DD>.json          当天相对前一天的增量：新进、退出、变化的字段
+#   data/deltas/<kind>/snapshot_<YYYY-MM-DD>.csv  定期压实的整表快照
+#   data/deltas/<kind>/deltas_<YYYY>.jsonl.gz     往年的增量打成一个包，文件数不随年数增长
+# 重建任意一天 = 该日之前最近的快照 + 之后最多 COMPACT_EVERY 个增量
+DELTA_DIR = os.getenv('CHILAM_DELTA_DIR', 'data/deltas')
+COMPACT_EVERY = int(os.getenv('DELTA_COMPACT_EVERY', '20'))
+KEY = 'ts_code'
+
+# ================= 路径 =================
+
+def _dir(kind):
+    return os.path.join(DELTA_DIR, kind)
+
+def _snapshot_path(kind, date):
+    return os.path.join(_dir(kind), f"snapshot_{date}.csv")
+
+def _delta_path(kind, date):
+    return os.path.join(_dir(kind), f"{date}.json")
+
+def _archive_path(kind, year):
+    return os.path.join(_dir(kind), f"deltas_{year}.jsonl.gz")
+
+def _listing(kind):
+    """(快照日期, 散装增量日期, 已打包年份)，均升序"""
+    folder = _dir(kind)
+    if not os.path.isdir(folder): return [], [], []
+    snaps, deltas, years = [], [], []
+    for f in os.listdir(folder):
+        if f.startswith('snapshot_') and f.endswith('.csv'): snaps.append(f[len('snapshot_'):-len('.csv')])
+        elif f.startswith('deltas_') and f.endswith('.jsonl.gz'): years.append(f[len('deltas_'):-len('.jsonl.gz')])
+        elif f.endswith('.json'): deltas.append(f[:-len('.json')])
+    return sorted(snaps), sorted(deltas), sorted(years)
+
+def dates(kind):
+    """日志里有记录的所有日期 (升序)"""
+    snaps, deltas, years = _listing(kind)
+    archived = [d for y in years for d in _read_archive(kind, y)]
+    return sorted(set(snaps) | set(deltas) | set(archived))
+
+def last_modified(kind):
+    """日志文件的最新修改时间，没有日志时返回 0"""
+    folder = _dir(kind)
+    if not os.path.isdir(folder): return 0
+    return max((os.path.getmtime(os.path.join(folder, f)) for f in os.listdir(folder)), default=0)
+
+# ================= 增量编码 =================
+
+def _py(v):
+    """转成 JSON 能写的 Python 值，NaN 写成 null"""
+    if isinstance(v, np.generic): v = v.item()
+    if isinstance(v, float) and np.isnan(v): return None
+    return v
+
+def diff(prev, cur):
+    """
+    cur 相对 prev 的增量：
+      const   全表同值的列 (如 更新日期)，不再逐行记录
+      added   新进的整行，removed 退出的代码，changed 留下的代码里值有变化的字段
+      order   当天的代码顺序，保证重建结果和原表逐行一致
+    """
+    cur = cur.reset_index(drop=True)
+    columns = list(cur.columns)
+    const = {c: _py(cur[c].iloc[0]) for c in columns
+             if c != KEY and len(cur) and cur[c].nunique(dropna=False) == 1}
+    prev_idx = prev.drop_duplicates(KEY, keep='last').set_index(KEY) if prev is not None else pd.DataFrame()
+    cur_idx = cur.drop_duplicates(KEY, keep='last').set_index(KEY)
+    kept = cur_idx.index.intersection(prev_idx.index)
+
+    changed = {}
+    for c in columns:
+        if c == KEY or c in const: continue
+        new = cur_idx.loc[kept, c]
+        if c in prev_idx.columns:
+            old = prev_idx[c].reindex(kept)
+            moved = ~((new == old) | (new.isna() & old.isna()))
+            # 读回 CSV 后整数可能变成浮点，数值相等即视为未变
+            if pd.api.types.is_numeric_dtype(new) and pd.api.types.is_numeric_dtype(old):
+                moved &= ~np.isclose(new.astype(float), old.astype(float), equal_nan=True)
+            new = new[moved]
+        for code, v in new.items():
+            changed.setdefault(code, {})[c] = _py(v)
+
+    added = cur_idx.loc[cur_idx.index.difference(prev_idx.index, sort=False)].reset_index()
+    return {
+        'columns': columns,
+        'const': const,
+        'removed': [c for c in prev_idx.index if c not in cur_idx.index],
+        'added': [[_py(v) for v in row] for row in added[columns].itertuples(index=False)],
+        'changed': changed,
+        'order': cur[KEY].tolist(),
+    }
+
+def apply(prev, delta):
+    """在 prev 上套用一天的增量，得到当天的整表 (按 order 的位置直接拼列，不走逐行索引)"""
+    columns, order = delta['columns'], delta['order']
+    n = len(order)
+    row_of = {code: i for i, code in enumerate(order)}
+    if prev is not None and len(prev):
+        prev = prev.drop_duplicates(KEY, keep='last')
+        prev_pos = pd.Index(prev[KEY]).get_indexer(order)
+    else:
+        prev_pos = np.full(n, -1)
+    kept = prev_pos >= 0
+
+    out = {}
+    for c in columns:
+        if c == KEY:
+            out[c] = np.array(order, dtype=object)
+        elif c in delta['const']:
+            out[c] = np.full(n, delta['const'][c], dtype=object)
+        else:
+            col = np.full(n, None, dtype=object)
+            if kept.any() and c in prev.columns:
+                col[kept] = prev[c].to_numpy(dtype=object)[prev_pos[kept]]
+            out[c] = col
+    key_at = columns.index(KEY)
+    for row in delta['added']:
+        i = row_of[row[key_at]]
+        for c, v in zip(columns, row):
+            if c != KEY and c not in delta['const']: out[c][i] = v
+    for code, fields in delta['changed'].items():
+        i = row_of[code]
+        for c, v in fields.items(): out[c][i] = v
+    return pd.DataFrame(out).infer_objects()
+
+# ================= 读写 =================
+
+def _read_delta(kind, date):
+    with open(_delta_path(kind, date), encoding='utf-8') as f:
+        return json.load(f)
+
+def _read_archive(kind, year):
+    """某一年打包的增量：{日期: 增量}"""
+    path = _archive_path(kind, year)
+    if not os.path.exists(path): return {}
+    out = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            rec = json.loads(line)
+            out[rec.pop('date')] = rec
+    return out
+
+def _write_json(path, obj):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def load(kind, date=None):
+    """
+    重建某天 (YYYY-MM-DD，默认最新一天) 的整表；日志里没有该日及之前的记录时返回 None
+    只读最近的一份快照和它之后的增量，往年的包只有要重建往年时才打开
+    """
+    snaps, loose, years = _listing(kind)
+    snaps = [d for d in snaps if date is None or d <= date]
+    start = snaps[-1] if snaps else None
+    df = pd.read_csv(_snapshot_path(kind, start)) if start else None
+
+    todo = {d: None for d in loose if (start is None or d > start) and (date is None or d <= date)}
+    first_year = start[:4] if start else None
+    for y in years:
+        if (first_year is None or y >= first_year) and (date is None or y <= date[:4]):
+            for d, delta in _read_archive(kind, y).items():
+                if (start is None or d > start) and (date is None or d <= date): todo[d] = delta
+    for d in sorted(todo):
+        df = apply(df, todo[d] if todo[d] is not None else _read_delta(kind, d))
+    return df
+
+def _prev_date(kind, date, snaps, loose, years):
+    """date 之前最近的有记录的一天；散装文件里没有时才往回翻往年的包"""
+    prev = max((d for d in snaps + loose if d < date), default=None)
+    for y in reversed(years):
+        if prev is not None and prev[:4] >= y: break
+        prev = max([d for d in _read_archive(kind, y) if d < date] + ([prev] if prev else []), default=None)
+    return prev
+
+def record(kind, date, df):
+    """
+    记下 date 这天的整表：写当天增量，距上次快照满 COMPACT_EVERY 天再压实一份快照
+    同一天重跑会覆盖当天的记录
+    """
+    os.makedirs(_dir(kind), exist_ok=True)
+    snaps, loose, years = _listing(kind)
+    prev = _prev_date(kind, date, snaps, loose, years)
+    if prev is None:
+        df.to_csv(_snapshot_path(kind, date), index=False)
+        print(f"🗜️ [{kind}] 首份快照 {date} ({len(df)} 行)")
+        return
+
+    delta = diff(load(kind, prev), df)
+    _write_json(_delta_path(kind, date), delta)
+    last_snap = max((d for d in snaps if d < date), default=None)
+    since = [d for d in loose if d < date and (last_snap is None or d > last_snap)]
+    # 每年第一天也压实一次，重建今年的任何一天都不用打开往年的包
+    if date in snaps or last_snap is None or last_snap[:4] < date[:4] or len(since) + 1 >= COMPACT_EVERY:
+        df.to_csv(_snapshot_path(kind, date), index=False)
+        print(f"🗜️ [{kind}] 压实快照 {date} ({len(df)} 行)")
+    print(f"🧩 [{kind}] {date} 增量：新进 {len(delta['added'])}，退出 {len(delta['removed'])}，"
+          f"变化 {len(delta['changed'])} 只")
+    archive_old_years(kind, date[:4])
+
+def archive_old_years(kind, current_year):
+    """把往年的散装增量合进当年的包，工作区里的文件数只和今年的交易日数有关"""
+    _, loose, _ = _listing(kind)
+    by_year = {}
+    for d in loose:
+        if d[:4] < current_year: by_year.setdefault(d[:4], []).append(d)
+    for year, days in by_year.items():
+        records = _read_archive(kind, year)
+        for d in days: records[d] = _read_delta(kind, d)
+        path = _archive_path(kind, year)
+        tmp_path = path + '.tmp'
+        # mtime=0 让同样的内容压出同样的字节，重复打包不会在 git 里产生变更
+        with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+            for d in sorted(records):
+                gz.write((json.dumps(dict(records[d], date=d), ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8'))
+        os.replace(tmp_path, path)
+        for d in days: os.remove(_delta_path(kind, d))
+        print(f"📦 [{kind}] {year} 年 {len(days)} 个增量已打包")
+
+_csv_locks = {}
+_csv_locks_guard = threading.Lock()
+
+def _fresh(kind, path):
+    stamp = last_modified(kind)
+    return os.path.exists(path) and (not stamp or os.path.getmtime(path) >= stamp), stamp
+
+def ensure_csv(kind, path):
+    """
+    CSV 不在 git 里：不存在或比日志旧时用日志重建一份
+    看板每次重跑都会调用：只在日志更新过时重建，同一路径加锁只建一次，先写临时文件再替换，读的一方不会看到半截文件
+    返回 True 表示 path 现在可用
+    """
+    fresh, stamp = _fresh(kind, path)
+    if fresh: return True
+    if not stamp: return os.path.exists(path)
+    with _csv_locks_guard:
+        lock = _csv_locks.setdefault(path, threading.Lock())
+    with lock:
+        # 等锁期间别的会话可能已经建好了
+        if _fresh(kind, path)[0]: return True
+        try:
+            df = load(kind)
+            if df is None: return os.path.exists(path)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = path + '.tmp'
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"⚠️ 从增量日志重建 {path} 失败: {e}")
+            return os.path.exists(path)
+
+# ================= 按天分区 / 轨迹索引 (本地缓存，不进 git) =================
+# 看板回看历史：每天物化成一个 Parquet 分区，只在第一次看到这天时从日志重建
+# 每只代码的 RPS 轨迹存成按 (代码, 日期) 排序的长表，按代码二分即可切出一段
+INDEX_DIR = os.getenv('CHILAM_DELTA_INDEX_DIR', 'data/cache/deltas_index')
+TRAJECTORY_COLS = ['RPS_50']
+
+def _source_mtime(kind, date):
+    """这一天在日志里的来源文件 (增量 / 快照 / 年包) 的修改时间"""
+    for path in (_delta_path(kind, date), _snapshot_path(kind, date), _archive_path(kind, date[:4])):
+        if os.path.exists(path): return os.path.getmtime(path)
+    return None
+
+def day_partition(kind, date):
+    """某天整表的 Parquet 路径，没有或比来源旧时先物化；日志里没有这天返回 None"""
+    src = _source_mtime(kind, date)
+    if src is None: return None
+    path = os.path.join(INDEX_DIR, kind, 'days', f"{date}.parquet")
+    if os.path.exists(path) and os.path.getmtime(path) >= src: return path
+    df = load(kind, date)
+    if df is None: return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+def iter_days(kind, start=None):
+    """从 start (含) 起按日期顺序重放日志，逐天产出 (日期, 整表)，每天只套一次增量"""
+    todo = [d for d in dates(kind) if start is None or d >= start]
+    if not todo: return
+    df = load(kind, todo[0])
+    yield todo[0], df
+    _, loose, _ = _listing(kind)
+    loose, archives = set(loose), {}
+    for d in todo[1:]:
+        if d in loose: delta = _read_delta(kind, d)
+        else:
+            year = d[:4]
+            if year not in archives: archives[year] = _read_archive(kind, year)
+            delta = archives[year].get(d)
+        df = apply(df, delta) if delta is not None else pd.read_csv(_snapshot_path(kind, d))
+        yield d, df
+
+def trajectory_path(kind):
+    return os.path.join(INDEX_DIR, kind, 'trajectory.parquet')
+
+def update_trajectory_index(kind, cols=TRAJECTORY_COLS):
+    """增量维护轨迹索引：只重放索引里最后一天 (可能被重跑覆盖) 之后的日志"""
+    path = trajectory_path(kind)
+    old = pd.read_parquet(path) if os.path.exists(path) else None
+    if old is not None and os.path.getmtime(path) >= last_modified(kind): return path
+    last = old['date'].max() if old is not None and len(old) else None
+    frames = [old[old['date'] < last]] if last else []
+    for d, df in iter_days(kind, last):
+        part = df[[KEY] + [c for c in cols if c in df.columns]].copy()
+        part.insert(1, 'date', d)
+        frames.append(part)
+    if not frames: return None
+    idx = pd.concat(frames, ignore_index=True).sort_values([KEY, 'date'], ignore_index=True)
+    for c in cols:
+        if c in idx.columns: idx[c] = pd.to_numeric(idx[c], errors='coerce').astype('float32')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    idx.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+class TrajectoryIndex:
+    """只读的轨迹索引：代码列有序，查一只代码是两次二分，不随历史天数线性增长"""
+
+    def __init__(self, path):
+        df = pd.read_parquet(path)
+        self.codes = df[KEY].to_numpy(dtype=object)
+        self.dates = df['date'].to_numpy(dtype=object)
+        self.values = {c: df[c].to_numpy() for c in df.columns if c not in (KEY, 'date')}
+
+    def series(self, codes, col='RPS_50', end=None, n=60):
+        """每只代码截至 end (含) 的最近 n 个值，顺序与 codes 一致"""
+        codes = np.asarray(codes, dtype=object)
+        lo = np.searchsorted(self.codes, codes, 'left')
+        hi = np.searchsorted(self.codes, codes, 'right')
+        vals = self.values[col]
+        out = []
+        for a, b in zip(lo, hi):
+            if end is not None: b = a + np.searchsorted(self.dates[a:b], end, 'right')
+            out.append(vals[max(a, b - n):b].tolist())
+        return out
+
+# ================= 命令行 =================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="每日结果增量日志")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('show', help="重建并打印某天的整表")
+    p.add_argument('kind', choices=['stocks', 'etfs'])
+    p.add_argument('date', nargs='?', help="YYYY-MM-DD，默认最新一天")
+    p = sub.add_parser('seed', help="用现有 CSV 生成首份快照")
+    p.add_argument('kind', choices=['stocks', 'etfs'])
+    p.add_argument('csv')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'show':
+        df = load(args.kind, args.date)
+        print("⚠️ 没有该日的记录" if df is None else df.to_string(index=False))
+    else:
+        df = pd.read_csv(args.csv)
+        record(args.kind, str(df['更新日期'].iloc[0]), df)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
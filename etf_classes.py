@@ -0,0 +1,77 @@
+import os
+import re
+import hashlib
+import pandas as pd
+import ref_data
+
+# ================= 配置区 =================
+# 场内基金按资产类别分类：名称里出现哪个类别的关键词就归哪类 (出现多个时以最靠前的为准)，都没有的算 A股
+ASSET_CLASSES = {
+    '债券': ['债', '国开', '政金', '短融'],
+    '货币': ['货币', '理财', '添益', '日利', '快线', '保证金'],
+    '商品': ['黄金', '上海金', '白银', '豆粕', '期货', '能源化工', '原油', '石油'],
+    '跨境': ['标普', '纳指', '纳斯达克', '道琼斯', '美国', '美股', '德国', '法国', '欧洲', '英国',
+             '日经', '日本', '东证', '韩国', '中韩', '沙特', '东南亚', '亚太', '印度', '越南', '巴西',
+             '恒生', '港股', '香港', 'H股', '中概', '海外', '全球', 'QDII'],
+}
+DEFAULT_CLASS = 'A股'
+# 带这些词的仍是 A股 (长词优先匹配，如 黄金股 是金矿公司股票，不是黄金现货)
+EQUITY_WORDS = ['黄金股']
+CATEGORIES = [DEFAULT_CLASS, *ASSET_CLASSES]
+# 看板 ETF 页默认勾选、回测默认候选池的资产类别；每晚的筛选本身覆盖所有类别
+# 逗号分隔的环境变量可改，如 ETF_KEEP_CLASSES=A股,跨境
+KEEP_CLASSES = os.getenv('ETF_KEEP_CLASSES', DEFAULT_CLASS).split(',')
+
+# 分类结果落盘，只有新基金或改了名的基金才重新分类；关键词一改 (版本号变化) 就整表重分
+CLASSES_PATH = os.path.join(ref_data.REF_DIR, 'etf_classes.parquet')
+
+_WORD_CLASS = {**{w: cls for cls, words in ASSET_CLASSES.items() for w in words},
+               **{w: DEFAULT_CLASS for w in EQUITY_WORDS}}
+# 所有关键词编译成一个正则，长词在前，避免被短词抢先匹配
+_PATTERN = re.compile('(' + '|'.join(map(re.escape, sorted(_WORD_CLASS, key=len, reverse=True))) + ')')
+VERSION = hashlib.md5(repr(sorted(_WORD_CLASS.items())).encode('utf-8')).hexdigest()[:8]
+
+# ================= 分类 =================
+
+def classify(names):
+    """名称序列 -> 资产类别 (Categorical)，一次正则扫描，不逐行跑 Python 函数"""
+    names = pd.Series(names, dtype=object).fillna('')
+    word = names.str.extract(_PATTERN, expand=False)
+    return pd.Categorical(word.map(_WORD_CLASS).fillna(DEFAULT_CLASS), categories=CATEGORIES)
+
+def _load(path):
+    if not os.path.exists(path): return None
+    try:
+        df = pd.read_parquet(path)
+        return df if (df['version'] == VERSION).all() else None
+    except Exception as e:
+        print(f"⚠️ ETF 分类缓存读取失败，将重新分类: {e}")
+        return None
+
+def asset_classes(basic, path=CLASSES_PATH):
+    """
+    basic: fund_basic (ts_code, name) -> 同顺序的资产类别 (Categorical)
+    缓存里代码和名称都对得上的直接沿用，其余 (新基金/改名) 才跑分类，结果写回缓存
+    """
+    cached = _load(path)
+    codes, names = basic['ts_code'].astype(object), basic['name'].astype(object)
+    out = pd.Series(pd.Categorical([None] * len(basic), categories=CATEGORIES), index=basic.index)
+    if cached is not None:
+        hit = cached.drop_duplicates('ts_code', keep='last').set_index('ts_code').reindex(codes)
+        # 名称为空的两边都当成 ''，否则 None != None 会让这些基金每次都重新分类
+        same = (hit['name'].fillna('').to_numpy() == names.fillna('').to_numpy())
+        out[same] = hit['asset_class'].to_numpy()[same]
+    todo = out.isna().to_numpy()
+    if todo.any():
+        out[todo] = classify(names[todo])
+        print(f"🏷️ ETF 资产分类：新增/改名 {int(todo.sum())} 只")
+        table = pd.DataFrame({'ts_code': codes.to_numpy(), 'name': names.to_numpy(), 'asset_class': out.to_numpy()})
+        if cached is not None:
+            table = pd.concat([cached[~cached['ts_code'].isin(table['ts_code'])].drop(columns=['version']), table],
+                              ignore_index=True)
+        table['asset_class'] = pd.Categorical(table['asset_class'], categories=CATEGORIES)
+        table['version'] = VERSION
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        table.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    return out
@@ -0,0 +1,210 @@
+import os
+import time
+import random
+import threading
+import functools
+import collections
+import concurrent.futures
+import run_report
+
+# ================= 配置区 =================
+# Tushare 每分钟调用额度 (按自己账号积分对应的频次填写)
+CALLS_PER_MINUTE = int(os.getenv('TUSHARE_CALLS_PER_MIN', '200'))
+# 单次调用失败后的最大重试次数，以及退避基数 (秒)
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+# 并发请求的线程数上限
+MAX_WORKERS = 8
+
+# 自适应并发 (用于没有明确额度的 akshare 爬取)：起步并发和上限
+ADAPTIVE_INIT_WORKERS = int(os.getenv('AKSHARE_INIT_WORKERS', '4'))
+ADAPTIVE_MAX_WORKERS = int(os.getenv('AKSHARE_MAX_WORKERS', '16'))
+# 延迟比历史最好水平恶化超过这个倍数就视为对端开始排队
+LATENCY_FACTOR = 2.0
+# 熔断：连续失败次数，或最近窗口内错误率超过阈值
+BREAKER_CONSECUTIVE = 10
+BREAKER_WINDOW = 30
+BREAKER_ERROR_RATE = 0.5
+# 失败项在同一次运行里补抓的轮数和每轮前的冷却时间 (秒)
+RETRY_ROUNDS = 2
+RETRY_COOLDOWN = float(os.getenv('AKSHARE_RETRY_COOLDOWN', '5'))
+
+# ================= 令牌桶 =================
+
+class TokenBucket:
+    """线程安全的令牌桶：每分钟补充 rate_per_min 个令牌，最多攒 burst 个"""
+
+    def __init__(self, rate_per_min, burst=None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = burst or max(1, min(MAX_WORKERS, rate_per_min))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            # 在锁外等待，其它线程可以继续补充/抢令牌
+            time.sleep(wait)
+
+_bucket = TokenBucket(CALLS_PER_MINUTE)
+
+# ================= 调度接口 =================
+
+def call(fn, *args, **kwargs):
+    """限速 + 指数退避重试地调用一次接口，重试用尽后抛出最后一次异常"""
+    for attempt in range(MAX_RETRIES + 1):
+        _bucket.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES: raise
+            run_report.current().record_retry(getattr(fn, '__name__', 'unknown'))
+            wait = BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE)
+            print(f"   ⏳ 接口异常，{wait:.1f}s 后第 {attempt + 1} 次重试: {e}")
+            time.sleep(wait)
+
+def gather(jobs, max_workers=MAX_WORKERS):
+    """并发执行一组无参函数，按传入顺序返回结果 (任一失败则抛出)"""
+    jobs = list(jobs)
+    if not jobs: return []
+    if len(jobs) == 1: return [jobs[0]()]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = [executor.submit(job) for job in jobs]
+        return [f.result() for f in futures]
+
+def fetch_all(requests):
+    """并发、限速地发出一组 (接口函数, 参数字典) 请求，按顺序返回结果"""
+    return gather([functools.partial(call, fn, **kwargs) for fn, kwargs in requests])
+
+# ================= 自适应并发 =================
+
+class AdaptiveLimiter:
+    """
+    AIMD 并发控制：
+      - 健康时每连续成功 limit 次，并发 +1
+      - 出错时并发减半，延迟明显变差时 -1 (两次收缩之间至少间隔一个冷却期)
+    """
+
+    def __init__(self, initial=ADAPTIVE_INIT_WORKERS, lo=1, hi=ADAPTIVE_MAX_WORKERS, cooldown=1.0):
+        self.lo, self.hi = lo, max(lo, hi)
+        self.limit = min(max(initial, lo), self.hi)
+        self.peak = self.limit
+        self.cooldown = cooldown
+        self.ewma = None
+        self.best = None
+        self.streak = 0
+        self.last_cut = 0.0
+        self.lock = threading.Lock()
+
+    def on_success(self, seconds):
+        with self.lock:
+            self.ewma = seconds if self.ewma is None else 0.8 * self.ewma + 0.2 * seconds
+            self.best = self.ewma if self.best is None else min(self.best, self.ewma)
+            if self.ewma > self.best * LATENCY_FACTOR:
+                self._shrink(self.limit - 1)
+                return
+            self.streak += 1
+            if self.streak >= self.limit and self.limit < self.hi:
+                self.limit += 1
+                self.peak = max(self.peak, self.limit)
+                self.streak = 0
+
+    def on_error(self):
+        with self.lock:
+            self._shrink(self.limit // 2)
+
+    def _shrink(self, target):
+        self.streak = 0
+        now = time.monotonic()
+        if now - self.last_cut < self.cooldown: return
+        self.limit = max(self.lo, target)
+        self.last_cut = now
+
+class CircuitBreaker:
+    """连续失败或最近窗口错误率过高时跳闸，跳闸后不再派发新请求"""
+
+    def __init__(self, max_consecutive=BREAKER_CONSECUTIVE, window=BREAKER_WINDOW, max_error_rate=BREAKER_ERROR_RATE):
+        self.max_consecutive = max_consecutive
+        self.max_error_rate = max_error_rate
+        self.recent = collections.deque(maxlen=window)
+        self.consecutive = 0
+        self.reason = None
+
+    @property
+    def tripped(self):
+        return self.reason is not None
+
+    def record(self, ok):
+        self.recent.append(ok)
+        self.consecutive = 0 if ok else self.consecutive + 1
+        if self.tripped: return
+        if self.consecutive >= self.max_consecutive:
+            self.reason = f"连续失败 {self.consecutive} 次"
+        elif len(self.recent) == self.recent.maxlen:
+            rate = 1 - sum(self.recent) / len(self.recent)
+            if rate > self.max_error_rate:
+                self.reason = f"最近 {len(self.recent)} 次错误率 {rate:.0%}"
+
+def _adaptive_pass(fn, items, limiter, breaker, results, progress):
+    """一轮派发：在途请求数不超过 limiter.limit，返回失败 (含未派发) 的项"""
+    failed = []
+    pending = collections.deque(items)
+    inflight = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=limiter.hi) as executor:
+        while pending or inflight:
+            while pending and len(inflight) < limiter.limit and not breaker.tripped:
+                item = pending.popleft()
+                inflight[executor.submit(_timed_call, fn, item)] = item
+            if not inflight: break
+            done, _ = concurrent.futures.wait(inflight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                item = inflight.pop(future)
+                ok, value, seconds = future.result()
+                breaker.record(ok)
+                if ok:
+                    limiter.on_success(seconds)
+                    results[item] = value
+                else:
+                    limiter.on_error()
+                    failed.append(item)
+                if progress: progress(len(results))
+    # 跳闸后剩下没派发的也算失败，留给下一轮 / 下一次运行
+    return failed + list(pending)
+
+def _timed_call(fn, item):
+    t0 = time.perf_counter()
+    try:
+        return True, fn(item), time.perf_counter() - t0
+    except Exception:
+        return False, None, time.perf_counter() - t0
+
+def adaptive_map(fn, items, progress=None, retry_rounds=RETRY_ROUNDS, retry_cooldown=RETRY_COOLDOWN):
+    """
+    用自适应并发对每个 item 调用 fn(item)，fn 抛异常视为失败 (限流 / 断连)，
+    失败项冷却后在同一次运行里降速补抓。
+    返回 (results, failed, breaker_reason)：results 为 {item: 返回值}，
+    failed 为最终仍失败的项，breaker_reason 为熔断原因 (未熔断时为 None)
+    """
+    results = {}
+    breaker = CircuitBreaker()
+    limiter = AdaptiveLimiter()
+    failed = _adaptive_pass(fn, list(items), limiter, breaker, results, progress)
+    peak = limiter.peak
+    for round_no in range(1, retry_rounds + 1):
+        if not failed or breaker.tripped: break
+        print(f"   🔁 {len(failed)} 项失败，{retry_cooldown:g}s 后第 {round_no} 轮补抓...")
+        time.sleep(retry_cooldown)
+        # 补抓从保守的并发起步，再按健康状况慢慢放开
+        limiter = AdaptiveLimiter(initial=max(1, limiter.limit // 2))
+        failed = _adaptive_pass(fn, failed, limiter, breaker, results, progress)
+        peak = max(peak, limiter.peak)
+    print(f"   📶 自适应并发峰值 {peak}，成功 {len(results)} 项，失败 {len(failed)} 项")
+    return results, failed, breaker.reason
@@ -0,0 +1,51 @@
+import os
+import pandas as pd
+
+# ================= 配置区 =================
+# 本地行情仓库：按交易日分区的 Parquet 文件，每天一个文件
+# data/cache/history/<kind>/<YYYYMMDD>.parquet
+HISTORY_DIR = os.getenv('CHILAM_HISTORY_DIR', 'data/cache/history')
+
+# kind -> 需要落盘的原始列 (只存原始值，复权价在读取时现算)
+STORE_COLUMNS = {
+    'stock': ['ts_code', 'close', 'adj_factor'],
+    'etf': ['ts_code', 'close'],
+}
+
+# ================= 读写接口 =================
+
+def _partition_path(kind, date_str):
+    return os.path.join(HISTORY_DIR, kind, f"{date_str}.parquet")
+
+def has_snapshot(kind, date_str):
+    return os.path.exists(_partition_path(kind, date_str))
+
+def load_snapshot(kind, date_str):
+    """读取某日快照，不存在或损坏时返回 None (调用方再去联网补)"""
+    path = _partition_path(kind, date_str)
+    if not os.path.exists(path): return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"⚠️ 本地行情 {kind}/{date_str} 读取失败，将重新下载: {e}")
+        return None
+
+def save_snapshot(kind, date_str, df):
+    """写入某日快照。空数据不落盘，避免把“数据未出”缓存成永久空洞"""
+    if df is None or df.empty: return
+    path = _partition_path(kind, date_str)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 先写临时文件再替换，防止中途被杀留下半个文件
+    tmp_path = path + '.tmp'
+    try:
+        df[STORE_COLUMNS[kind]].to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ 本地行情 {kind}/{date_str} 写入失败: {e}")
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+
+def cached_dates(kind):
+    """已落盘的交易日列表 (升序)"""
+    folder = os.path.join(HISTORY_DIR, kind)
+    if not os.path.isdir(folder): return []
+    return sorted(f[:-len('.parquet')] for f in os.listdir(folder) if f.endswith('.parquet'))
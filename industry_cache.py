@@ -0,0 +1,90 @@
+import os
+import json
+import time
+from collections import OrderedDict
+
+# ================= 配置区 =================
+CACHE_PATH = os.getenv('CHILAM_INDUSTRY_CACHE', 'data/cache/industry_cache.json')
+# 细分行业几乎不变，成功结果缓存 30 天
+TTL_DAYS = float(os.getenv('INDUSTRY_TTL_DAYS', '30'))
+# 抓取失败 ("-") 只短暂缓存，避免同一晚反复撞限流，又能很快重试
+NEGATIVE_TTL_HOURS = float(os.getenv('INDUSTRY_NEGATIVE_TTL_HOURS', '6'))
+# 最多保留的条目数，超出按最近最少使用 (LRU) 淘汰
+MAX_ENTRIES = int(os.getenv('INDUSTRY_CACHE_MAX', '8000'))
+
+MISSING = "-"
+
+class IndustryCache:
+    """
+    ts_code -> 细分行业 的磁盘缓存 (带 TTL、失败短缓存和 LRU 淘汰)
+    另记每只代码上次尝试抓取的时间 (成功失败都记)，夜间补抓按它排先后，久没试过的优先
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_days=TTL_DAYS,
+                 negative_ttl_hours=NEGATIVE_TTL_HOURS, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.max_entries = max_entries
+        # 顺序即使用顺序：越靠后越新
+        self.entries = OrderedDict()
+        self.attempts = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path): return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            # 旧格式整个文件就是 entries
+            entries, attempts = (data['entries'], data.get('attempts', {})) if 'entries' in data else (data, {})
+            items = sorted(entries.items(), key=lambda kv: kv[1].get('used', 0))
+            self.entries = OrderedDict(items)
+            self.attempts = {code: e['fetched'] for code, e in items}
+            self.attempts.update(attempts)
+        except Exception as e:
+            print(f"⚠️ 行业缓存读取失败，将重新抓取: {e}")
+            self.entries = OrderedDict()
+            self.attempts = {}
+
+    def get(self, code, now=None):
+        """命中且未过期返回行业 (失败短缓存返回 "-")，否则返回 None"""
+        entry = self.entries.get(code)
+        if entry is None: return None
+        now = now or time.time()
+        ttl = self.negative_ttl if entry['value'] == MISSING else self.ttl
+        if now - entry['fetched'] > ttl:
+            return None
+        entry['used'] = now
+        self.entries.move_to_end(code)
+        return entry['value']
+
+    def put(self, code, value, now=None):
+        now = now or time.time()
+        self.entries[code] = {'value': value or MISSING, 'fetched': now, 'used': now}
+        self.entries.move_to_end(code)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.attempted([code], now)
+
+    def attempted(self, codes, now=None):
+        """记下这些代码刚尝试抓过 (失败的不进 entries，但也要记)"""
+        now = now or time.time()
+        self.attempts.update(dict.fromkeys(codes, now))
+        if len(self.attempts) > self.max_entries:
+            keep = sorted(self.attempts.items(), key=lambda kv: kv[1])[-self.max_entries:]
+            self.attempts = dict(keep)
+
+    def last_attempt(self, code):
+        """上次尝试抓取的时间，从没试过返回 0"""
+        return self.attempts.get(code, 0)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries, 'attempts': self.attempts}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ 行业缓存写入失败: {e}")
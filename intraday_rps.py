@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import argparse
+import functools
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+import daily_rps_pro
+import fetch_scheduler
+import ref_data
+from rps_backfill import rank_pct
+
+# ================= 配置区 =================
+# 盘中实时 RPS：历史锚点 (T-50/T-120/T-250) 的复权基准只在开盘前算一次放内存，
+# 之后每次刷新只拉一次全市场实时快照，向量化算涨幅和截面排名
+RPS_N = daily_rps_pro.RPS_N
+THRESHOLD = daily_rps_pro.THRESHOLD
+# 两次拉取实时快照的最小间隔 (秒)，多个看板会话共用同一份结果
+LIVE_REFRESH_SEC = int(os.getenv('LIVE_REFRESH_SEC', '30'))
+
+# ================= 历史基准 =================
+
+class LiveBases:
+    """
+    一个交易日内不变的部分：代码顺序 + 各窗口锚点日的复权价 + 最近一个已收盘交易日的复权因子
+    (float64 数组，和代码一一对齐)；实时不复权价乘上复权因子即可和锚点直接比
+    """
+
+    def __init__(self, trade_date, codes, adj, bases, names=None, industries=None):
+        self.trade_date = trade_date
+        self.codes = pd.Index(codes)
+        # 实时行情接口只给 6 位代码
+        self.code6 = pd.Index(self.codes.str[:6])
+        self.adj = np.asarray(adj, dtype=np.float64)
+        self.windows = [n for n in RPS_N if n in bases]
+        self.matrix = np.vstack([bases[n] for n in self.windows]) if self.windows else np.empty((0, len(codes)))
+        self.names = names
+        self.industries = industries
+        self.built_on = datetime.datetime.now().strftime('%Y%m%d')
+
+    def __len__(self):
+        return len(self.codes)
+
+def build_bases(dates=None):
+    """用和 calculate_rps_logic 相同的锚点日 (本地行情仓库优先) 算出今天盘中要用的基准"""
+    today = datetime.datetime.now().strftime('%Y%m%d')
+    dates = dates or daily_rps_pro.get_trading_dates(today)
+    if not dates: return None
+    # 今天的复权因子盘后才有，用上一个已收盘交易日的因子折算
+    ref = dates['prev'] if dates['now'] == today and dates.get('prev') else dates['now']
+    anchors = [dates[n] for n in RPS_N if n in dates]
+    snaps = dict(zip([ref] + anchors, fetch_scheduler.gather(
+        [functools.partial(daily_rps_pro.get_snapshot, d) for d in [ref] + anchors])))
+
+    df_ref = snaps[ref]
+    if df_ref.empty: return None
+    df_ref = df_ref.drop_duplicates('ts_code').set_index('ts_code')
+    adj_ref = df_ref['close_val'] / df_ref['display_val']
+
+    bases = {}
+    for n in RPS_N:
+        if n not in dates or snaps[dates[n]].empty: continue
+        past = snaps[dates[n]].drop_duplicates('ts_code').set_index('ts_code')['close_val']
+        bases[n] = past.reindex(adj_ref.index).to_numpy(dtype=np.float64)
+
+    basic = ref_data.stock_basic(adj_ref.index).set_index('ts_code')
+    basic = basic.reindex(adj_ref.index)
+    return LiveBases(dates['now'], adj_ref.index, adj_ref.to_numpy(), bases,
+                     basic['name'].to_numpy() if 'name' in basic.columns else None,
+                     basic['industry'].to_numpy() if 'industry' in basic.columns else None)
+
+# ================= 实时排名 =================
+
+def spot_prices(bases, spot):
+    """把实时快照 (代码/最新价) 按基准的代码顺序对齐，停牌、未匹配的为 NaN"""
+    price = np.full(len(bases), np.nan)
+    pos = bases.code6.get_indexer(spot['代码'].astype(str).str[:6])
+    last = pd.to_numeric(spot['最新价'], errors='coerce').to_numpy(dtype=np.float64)
+    ok = pos >= 0
+    price[pos[ok]] = last[ok]
+    price[price <= 0] = np.nan
+    return price
+
+def compute_live_rps(bases, price):
+    """一次矩阵运算算出所有窗口的涨幅，逐行截面排名，返回和日终结果同名的列"""
+    df = pd.DataFrame({'ts_code': bases.codes})
+    if bases.names is not None: df['name'] = bases.names
+    if bases.industries is not None: df['industry'] = bases.industries
+    df['price_now'] = price
+    if not bases.windows: return df
+    # 和 calculate_rps_logic 同样的算式，排名沿用回填引擎的 float32 rank_pct
+    base_now = price * bases.adj
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = (base_now[None, :] - bases.matrix) / bases.matrix
+    rps = rank_pct(ret)
+    for i, n in enumerate(bases.windows):
+        df[f'RPS_{n}'] = rps[i]
+    # 和日终筛选一致：三个窗口都要超过阈值，缺任何一个窗口都不算强势
+    if len(bases.windows) == len(RPS_N):
+        df['strong'] = (rps > THRESHOLD).all(axis=0)
+    else:
+        df['strong'] = False
+    return df
+
+class LiveRPS:
+    """
+    进程内的盘中排名服务：基准每个交易日建一次，实时快照按 LIVE_REFRESH_SEC 节流
+    看板的多个会话同时刷新时只会有一个去拉快照，其余直接拿上一次的结果
+    """
+
+    def __init__(self, refresh_sec=LIVE_REFRESH_SEC, ak=None):
+        self.refresh_sec = refresh_sec
+        self.ak = ak or daily_rps_pro.ak
+        self.bases = None
+        self.result = None
+        self.updated = 0.0
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def _ensure_bases(self):
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        # 跨日后 (或第一次) 重建，锚点日随交易日后移
+        if self.bases is None or self.bases.built_on != today:
+            t0 = time.perf_counter()
+            bases = build_bases()
+            if bases is None: raise RuntimeError("无法构建历史基准 (交易日历或行情缺失)")
+            self.bases = bases
+            self.timings['bases'] = time.perf_counter() - t0
+
+    def snapshot(self, force=False):
+        """返回 (排名 DataFrame, 更新时间戳)；距上次拉取不足 refresh_sec 时直接复用"""
+        with self.lock:
+            if not force and self.result is not None and time.time() - self.updated < self.refresh_sec:
+                return self.result, self.updated
+            self._ensure_bases()
+            t0 = time.perf_counter()
+            spot = self.ak.stock_zh_a_spot_em()
+            t1 = time.perf_counter()
+            self.result = compute_live_rps(self.bases, spot_prices(self.bases, spot))
+            self.timings.update(spot=t1 - t0, rank=time.perf_counter() - t1)
+            self.updated = time.time()
+            return self.result, self.updated
+
+    def strong(self, force=False):
+        df, updated = self.snapshot(force)
+        return df[df['strong']].sort_values('RPS_50', ascending=False, ignore_index=True), updated
+
+# ================= 命令行 =================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="盘中实时 RPS (临时排名，收盘后以 18:00 结果为准)")
+    parser.add_argument('--interval', type=int, default=LIVE_REFRESH_SEC, help="刷新间隔 (秒)")
+    parser.add_argument('--ticks', type=int, default=0, help="刷新多少次后退出，0 表示一直跑")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    live = LiveRPS(refresh_sec=args.interval)
+    k = 0
+    while True:
+        strong, updated = live.strong(force=True)
+        t = live.timings
+        print(f"⚡ {datetime.datetime.fromtimestamp(updated):%H:%M:%S} 强势 {len(strong)} 只 | "
+              f"快照 {t['spot'] * 1000:.0f} ms，排名 {t['rank'] * 1000:.1f} ms" +
+              (f"，基准 {t.pop('bases'):.1f}s" if 'bases' in t else ""))
+        print(strong.head(args.top).to_string(index=False, float_format='%.2f'))
+        k += 1
+        if args.ticks and k >= args.ticks: break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,16 @@
+import pandas as pd
+
+# ================= 配置区 =================
+XUEQIU_BASE = "https://xueqiu.com/S/"
+
+# ================= 外部链接 =================
+
+def xueqiu_urls(codes):
+    """
+    向量化生成雪球链接：Tushare 格式 510050.SH -> https://xueqiu.com/S/SH510050
+    个股 / ETF / 看板共用，没有交易所后缀的代码给空串
+    """
+    codes = pd.Series(codes).astype(str)
+    parts = codes.str.split('.', n=1)
+    urls = XUEQIU_BASE + parts.str[1].str.upper() + parts.str[0]
+    return urls.where(codes.str.contains('.', regex=False), "")
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import bisect
+import hashlib
+import argparse
+import datetime
+import threading
+import pandas as pd
+import datasource
+
+# ================= 配置区 =================
+# 按发布日期分区的追加写 JSONL：data/cache/news/<YYYYMMDD>.jsonl
+NEWS_DIR = "data/cache/news"
+# 只保留最近多少天：更早的日文件在写入时删掉，内存索引里的旧文档同时淘汰
+RETENTION_DAYS = int(os.getenv('NEWS_RETENTION_DAYS', '60'))
+# 后台拉取间隔 (秒)
+INGEST_INTERVAL = int(os.getenv('NEWS_INGEST_INTERVAL', '300'))
+
+FIELDS = ['标题', '内容', '发布日期', '发布时间']
+
+# ================= 分词 =================
+
+def _grams(text):
+    """单字 + 相邻二字：中文不分词也能检索，英文/数字同样适用 (如 600519)"""
+    chars = [c for c in text.lower() if not c.isspace()]
+    grams = set(chars)
+    grams.update(a + b for a, b in zip(chars, chars[1:]))
+    return grams
+
+def _query_grams(term):
+    chars = [c for c in term if not c.isspace()]
+    if len(chars) == 1: return chars
+    return [a + b for a, b in zip(chars, chars[1:])]
+
+def news_id(title, content):
+    return hashlib.sha1(f"{title}|{content}".encode('utf-8')).hexdigest()[:16]
+
+def _day(doc):
+    """文档归属的日期 (YYYYMMDD)：按发布日期，没有的按入库日期"""
+    return (doc['发布日期'] or doc.get('入库时间', '')).replace('-', '')[:8] or 'unknown'
+
+# ================= 存储 + 倒排索引 =================
+
+class NewsStore:
+    """
+    只追加的本地新闻库：
+      - 以 标题+内容 的哈希去重，重复拉取的同一条新闻只存一次
+      - 内存里维护 gram -> 文档位置 的倒排索引，关键词检索不扫全表
+    文档位置按入库顺序递增，越大越新；过期文档从最旧的一端淘汰，已发出的位置不会改变
+    """
+
+    def __init__(self, root=NEWS_DIR, retention_days=RETENTION_DAYS):
+        self.root = root
+        self.retention_days = retention_days
+        self.docs = []
+        self.texts = []
+        self.ids = set()
+        self.index = {}
+        # 已淘汰的文档数：位置 p 的文档是 docs[p - base]
+        self.base = 0
+        self.since = self._cutoff()
+        self.version = 0
+        self.pruned = False
+        self.lock = threading.Lock()
+        self._load()
+
+    def _cutoff(self):
+        return (datetime.date.today() - datetime.timedelta(days=self.retention_days)).strftime('%Y%m%d')
+
+    def _load(self):
+        if not os.path.isdir(self.root): return
+        files = sorted(f for f in os.listdir(self.root) if f.endswith('.jsonl') and f[:8] >= self.since)
+        docs = []
+        for name in files:
+            with open(os.path.join(self.root, name), encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line: docs.append(json.loads(line))
+        docs.sort(key=lambda d: (_day(d), d['发布时间']))
+        for doc in docs:
+            if doc['id'] not in self.ids and _day(doc) >= self.since: self._add(doc)
+
+    def _add(self, doc):
+        pos = self.base + len(self.docs)
+        text = f"{doc['标题']}\n{doc['内容']}"
+        self.docs.append(doc)
+        self.texts.append(text.lower())
+        self.ids.add(doc['id'])
+        for g in _grams(text):
+            self.index.setdefault(g, []).append(pos)
+
+    def __len__(self):
+        return len(self.docs)
+
+    # ---------- 过期淘汰 ----------
+    def _evict(self):
+        """淘汰开头连续的过期文档，倒排表里同时删掉这些位置 (调用方持锁)"""
+        n = 0
+        while n < len(self.docs) and _day(self.docs[n]) < self.since: n += 1
+        if not n: return 0
+        self.ids.difference_update(d['id'] for d in self.docs[:n])
+        del self.docs[:n], self.texts[:n]
+        self.base += n
+        for g in list(self.index):
+            postings = self.index[g]
+            k = bisect.bisect_left(postings, self.base)
+            if k == len(postings): del self.index[g]
+            elif k: del postings[:k]
+        return n
+
+    def _prune_files(self):
+        """删掉保留期之前的日文件"""
+        if not os.path.isdir(self.root): return
+        for name in os.listdir(self.root):
+            if name.endswith('.jsonl') and name[:8].isdigit() and name[:8] < self.since:
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError as e:
+                    print(f"⚠️ [新闻] 删除过期文件失败 {name}: {e}")
+
+    # ---------- 写入 ----------
+    def ingest(self, df):
+        """把一批快讯去重后追加入库，返回新增条数"""
+        if df is None or df.empty: return 0
+        fresh = []
+        for row in df.to_dict('records'):
+            doc = {k: str(row.get(k, '') or '') for k in FIELDS}
+            doc['id'] = news_id(doc['标题'], doc['内容'])
+            if doc['id'] in self.ids: continue
+            fresh.append(doc)
+        if not fresh: return 0
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for doc in fresh: doc['入库时间'] = now
+        fresh.sort(key=lambda d: (_day(d), d['发布时间']))
+        by_day = {}
+        with self.lock:
+            # 跨天后先把过期的淘汰掉，保留期之前的快讯也不再入库
+            since = self._cutoff()
+            rolled = since != self.since
+            if rolled:
+                self.since = since
+                self._evict()
+            added = 0
+            for doc in fresh:
+                # 同一批内部也可能重复
+                if doc['id'] in self.ids or _day(doc) < self.since: continue
+                self._add(doc)
+                by_day.setdefault(_day(doc), []).append(doc)
+                added += 1
+            self.version += 1
+        os.makedirs(self.root, exist_ok=True)
+        for day, items in by_day.items():
+            with open(os.path.join(self.root, f"{day}.jsonl"), 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(d, ensure_ascii=False) + '\n' for d in items))
+        if rolled or not self.pruned:
+            self._prune_files()
+            self.pruned = True
+        return added
+
+    # ---------- 查询 ----------
+    def latest(self, n=30):
+        with self.lock:
+            end = self.base + len(self.docs)
+            return list(range(end - 1, max(self.base - 1, end - 1 - n), -1))
+
+    def search(self, query, limit=200):
+        """空格分隔的多个关键词取交集，返回文档位置 (新的在前)"""
+        terms = [t for t in query.lower().split() if t]
+        if not terms: return self.latest(limit)
+        with self.lock:
+            hits = None
+            for term in terms:
+                postings = [self.index.get(g) for g in _query_grams(term)]
+                if any(p is None for p in postings): return []
+                postings.sort(key=len)
+                cand = set(postings[0])
+                for p in postings[1:]:
+                    cand.intersection_update(p)
+                    if not cand: return []
+                # 二字命中不保证连续，最后用原文确认一次
+                cand = {i for i in cand if term in self.texts[i - self.base]}
+                hits = cand if hits is None else hits & cand
+                if not hits: return []
+            return sorted(hits, reverse=True)[:limit]
+
+    def frame(self, positions):
+        """按给定顺序取出文档，转成和原快讯接口一致的 DataFrame"""
+        with self.lock:
+            # 检索之后才淘汰掉的位置直接跳过
+            rows = [self.docs[i - self.base] for i in positions if i >= self.base]
+        return pd.DataFrame(rows, columns=FIELDS + ['id']).reset_index(drop=True)
+
+# ================= 后台拉取 =================
+
+def fetch_latest():
+    return datasource.get_ak().stock_info_global_cls()
+
+class Ingester(threading.Thread):
+    """守护线程：每隔 interval 秒拉一次快讯并增量入库，页面请求只读本地库"""
+
+    def __init__(self, store, interval=INGEST_INTERVAL):
+        super().__init__(daemon=True, name="news-ingester")
+        self.store = store
+        self.interval = interval
+        self.last_error = None
+        self.last_run = None
+
+    def run_once(self):
+        try:
+            added = self.store.ingest(fetch_latest())
+            self.last_error = None
+            return added
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ [新闻] 拉取失败: {e}")
+            return 0
+        finally:
+            self.last_run = datetime.datetime.now()
+
+    def run(self):
+        # 创建方可能已经同步拉过一次 (冷启动库为空时)
+        if self.last_run is None: self.run_once()
+        while True:
+            time.sleep(self.interval)
+            self.run_once()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="增量拉取财联社快讯入本地新闻库")
+    parser.add_argument('--loop', action='store_true', help=f"常驻，每 {INGEST_INTERVAL}s 拉一次")
+    args = parser.parse_args(argv)
+    store = NewsStore()
+    print(f"📰 本地新闻库已有 {len(store)} 条")
+    ingester = Ingester(store)
+    while True:
+        print(f"   新增 {ingester.run_once()} 条，共 {len(store)} 条")
+        if not args.loop: break
+        time.sleep(INGEST_INTERVAL)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import datetime
+import argparse
+import concurrent.futures
+import pandas as pd
+import run_report
+
+# ================= 配置区 =================
+# 每次运行的耗时记录 (并行/顺序两种模式各自一行)；并行和顺序的对比见 benchmarks/bench_pipeline.py
+TIMING_PATH = "data/cache/pipeline_runs.csv"
+
+# ================= 统一入口 =================
+# 个股和 ETF 两条流水线在同一个进程里跑：
+#   - tushare/akshare 只导入一次，pro 只初始化一次
+#   - 交易日历只拉一次，两边共用
+#   - 两个 main_job 并行，个股抓行业时 ETF 可以同时做 fund_basic 过滤
+
+def _timed(label, fn, *args):
+    t0 = time.perf_counter()
+    try:
+        fn(*args)
+    finally:
+        elapsed = time.perf_counter() - t0
+        print(f"⏱️ [{label}] 用时 {elapsed:.1f}s")
+    return elapsed
+
+def _record(mode, wall, stock, etf):
+    os.makedirs(os.path.dirname(TIMING_PATH), exist_ok=True)
+    row = pd.DataFrame([{
+        'run_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'mode': mode, 'wall': round(wall, 2), 'stock': round(stock, 2), 'etf': round(etf, 2),
+    }])
+    row.to_csv(TIMING_PATH, mode='a', header=not os.path.exists(TIMING_PATH), index=False)
+
+def run(sequential=False):
+    t0 = time.perf_counter()
+    import daily_rps_pro
+    import daily_etf_pro
+    # 两个脚本通过 datasource.get_pro() 拿到的是同一个客户端 (首次调用接口时才初始化)
+    print(f"📦 依赖加载 {time.perf_counter() - t0:.1f}s")
+    run_report.current().add_stage('init/import', time.perf_counter() - t0)
+
+    today = datetime.datetime.now().strftime('%Y%m%d')
+    dates = daily_rps_pro.get_trading_dates(today)
+    if not dates:
+        print("❌ 无法获取交易日历，退出")
+        run_report.current().fail("无法获取交易日历")
+        return
+    run_report.current().trade_date = dates['now']
+
+    if sequential:
+        stock = _timed("个股", daily_rps_pro.main_job, dates)
+        etf = _timed("ETF", daily_etf_pro.main_job, dates)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            f_stock = executor.submit(_timed, "个股", daily_rps_pro.main_job, dates)
+            f_etf = executor.submit(_timed, "ETF", daily_etf_pro.main_job, dates)
+            stock, etf = f_stock.result(), f_etf.result()
+
+    wall = time.perf_counter() - t0
+    mode = 'sequential' if sequential else 'parallel'
+    # 两条流水线各自的用时之和只是顺序执行的粗略估计 (并行时两边互相抢限流和 CPU，各自都会变慢)
+    print(f"🏁 总用时 {wall:.1f}s ({mode})，个股 {stock:.1f}s + ETF {etf:.1f}s = 两段合计 {stock + etf:.1f}s")
+    _record(mode, wall, stock, etf)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="个股 + ETF 统一流水线")
+    parser.add_argument('--sequential', action='store_true', help="按旧方式先个股后 ETF 顺序执行 (用于测基线)")
+    args = parser.parse_args(argv)
+    run_report.start('pipeline')
+    try:
+        run(sequential=args.sequential)
+    finally:
+        run_report.finish()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import datetime
+import threading
+import pandas as pd
+import fetch_scheduler
+import datasource
+
+# ================= 配置区 =================
+# 参考数据层：很少变化的接口结果落在本地，每个接口按自己的策略刷新，个股和 ETF 两条流水线共用
+# data/cache/ref/<接口>.parquet + meta.json (各接口的拉取时间、日历覆盖区间)
+REF_DIR = os.getenv('CHILAM_REF_DIR', 'data/cache/ref')
+# 上市列表每周整表刷新；出现列表里没有的代码 (新股/新基金) 时提前刷新
+LISTING_TTL_DAYS = float(os.getenv('REF_LISTING_TTL_DAYS', '7'))
+# 每日指标按交易日落盘，保留最近这么多天 (覆盖补跑上限和“今天未出用昨天”的回退)
+DAILY_BASIC_KEEP = int(os.getenv('REF_DAILY_BASIC_KEEP', '40'))
+
+# 上市列表：接口 -> (请求参数, 落盘的列)
+LISTINGS = {
+    'stock_basic': ({'exchange': '', 'list_status': 'L', 'fields': 'ts_code,name,industry'}, ['ts_code', 'name', 'industry']),
+    'fund_basic': ({'market': 'E'}, ['ts_code', 'name']),
+}
+
+_locks = {name: threading.Lock() for name in ['trade_cal', 'daily_basic', *LISTINGS]}
+_meta_lock = threading.Lock()
+# 进程内副本：pipeline 里个股和 ETF 各读一次，只读一次盘
+_frames = {}
+
+# ================= 本地读写 =================
+
+def _path(name):
+    return os.path.join(REF_DIR, f"{name}.parquet")
+
+def _read_meta():
+    path = os.path.join(REF_DIR, 'meta.json')
+    if not os.path.exists(path): return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 参考数据元信息读取失败，将重新拉取: {e}")
+        return {}
+
+def _update_meta(name, **fields):
+    with _meta_lock:
+        meta = _read_meta()
+        meta.setdefault(name, {}).update(fields)
+        os.makedirs(REF_DIR, exist_ok=True)
+        path = os.path.join(REF_DIR, 'meta.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=1)
+        os.replace(path + '.tmp', path)
+
+def _load(name, path=None):
+    """读本地表，不存在或损坏时返回 None"""
+    path = path or _path(name)
+    if path in _frames: return _frames[path]
+    if not os.path.exists(path): return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as e:
+        print(f"⚠️ 参考数据 {name} 读取失败，将重新拉取: {e}")
+        return None
+    _frames[path] = df
+    return df
+
+def _save(name, df, path=None):
+    path = path or _path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 先写临时文件再替换，防止中途被杀留下半个文件
+    df.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    _frames[path] = df
+
+def _shift(date_str, days):
+    return (datetime.datetime.strptime(date_str, '%Y%m%d') + datetime.timedelta(days=days)).strftime('%Y%m%d')
+
+# ================= 交易日历 =================
+
+def trade_dates(start_date, end_date):
+    """
+    [start_date, end_date] 内的交易日 (升序)
+    本地日历记着已覆盖的区间，只请求两端没覆盖的部分 (平时每天只补最新几天)
+    """
+    with _locks['trade_cal']:
+        cal = _load('trade_cal')
+        span = _read_meta().get('trade_cal', {})
+        lo, hi = span.get('lo'), span.get('hi')
+        if cal is None or lo is None:
+            cal, gaps = pd.DataFrame({'cal_date': pd.Series(dtype=str)}), [(start_date, end_date)]
+        else:
+            gaps = ([(start_date, _shift(lo, -1))] if start_date < lo else []) + \
+                   ([(_shift(hi, 1), end_date)] if end_date > hi else [])
+        if gaps:
+            pro = datasource.get_pro()
+            parts = [fetch_scheduler.call(pro.trade_cal, exchange='', is_open='1', start_date=a, end_date=b)[['cal_date']]
+                     for a, b in gaps]
+            cal = pd.concat([cal] + parts, ignore_index=True).astype(str).drop_duplicates().sort_values('cal_date', ignore_index=True)
+            _save('trade_cal', cal)
+            _update_meta('trade_cal', lo=min(filter(None, [lo, start_date])), hi=max(filter(None, [hi, end_date])),
+                         fetched=time.time())
+            print(f"📅 交易日历补齐 {', '.join(f'{a}~{b}' for a, b in gaps)}")
+        days = cal['cal_date']
+        return days[(days >= start_date) & (days <= end_date)].tolist()
+
+# ================= 上市列表 =================
+
+def listing(name, codes=None, now=None):
+    """
+    上市列表 (stock_basic / fund_basic)：超过 LISTING_TTL_DAYS 或 codes 里出现本地没有的代码时整表刷新
+    刷新后仍然查不到的代码记进 missing (退市整理、非上市状态)，之后不会再因为它们反复刷新
+    """
+    kwargs, cols = LISTINGS[name]
+    with _locks[name]:
+        df = _load(name)
+        meta = _read_meta().get(name, {})
+        now = now or time.time()
+        missing = set(meta.get('missing', []))
+        # codes 可能是 Series / Index，不能直接做真值判断
+        codes = set(codes) if codes is not None else set()
+        unknown = codes - set(df['ts_code']) - missing if df is not None else set()
+        if df is None: reason = "本地没有"
+        elif now - meta.get('fetched', 0) > LISTING_TTL_DAYS * 86400: reason = f"超过 {LISTING_TTL_DAYS:g} 天"
+        elif unknown: reason = f"出现 {len(unknown)} 个新代码"
+        else: return df.copy()
+
+        print(f"📇 刷新 {name} ({reason})...")
+        try:
+            fresh = fetch_scheduler.call(getattr(datasource.get_pro(), name), **kwargs)
+        except Exception as e:
+            if df is None: raise
+            print(f"⚠️ {name} 刷新失败，沿用本地列表: {e}")
+            return df.copy()
+        if fresh is None or fresh.empty:
+            if df is None: return pd.DataFrame(columns=cols)
+            return df.copy()
+        fresh = fresh[[c for c in cols if c in fresh.columns]].drop_duplicates('ts_code').reset_index(drop=True)
+        _save(name, fresh)
+        known = set(fresh['ts_code'])
+        # 定期刷新时清空 missing，让之前查不到的代码有机会重新被收录
+        carry = missing if reason.startswith("出现") else set()
+        _update_meta(name, fetched=now, missing=sorted((carry | codes) - known))
+        return fresh.copy()
+
+def stock_basic(codes=None):
+    """个股列表 ts_code,name,industry"""
+    return listing('stock_basic', codes)
+
+def fund_basic(codes=None):
+    """场内基金列表 ts_code,name"""
+    return listing('fund_basic', codes)
+
+# ================= 每日指标 =================
+
+def daily_basic(trade_date, fields):
+    """
+    某交易日的每日指标：本地有该日分区 (且列够用) 直接读，否则请求并落盘
+    空结果不落盘 (数据还没出，下次还要再问)
+    """
+    cols = fields.split(',')
+    path = os.path.join(REF_DIR, 'daily_basic', f"{trade_date}.parquet")
+    with _locks['daily_basic']:
+        df = _load('daily_basic', path)
+        if df is not None and set(cols) <= set(df.columns):
+            print(f"   ♻️ {trade_date} 每日指标命中本地")
+            return df[cols].copy()
+    df = fetch_scheduler.call(datasource.get_pro().daily_basic, trade_date=trade_date, fields=fields)
+    if df is None or df.empty: return pd.DataFrame(columns=cols)
+    with _locks['daily_basic']:
+        _save('daily_basic', df, path)
+        folder = os.path.dirname(path)
+        for old in sorted(f for f in os.listdir(folder) if f.endswith('.parquet'))[:-DAILY_BASIC_KEEP]:
+            os.remove(os.path.join(folder, old))
+            _frames.pop(os.path.join(folder, old), None)
+    return df.copy()
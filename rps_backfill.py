@@ -0,0 +1,151 @@
+import os
+import sys
+import argparse
+import datetime
+import functools
+import numpy as np
+import pandas as pd
+import history_store
+
+# ================= 配置区 =================
+RPS_N = [50, 120, 250]
+# 回填结果：日期 × 代码 的 RPS 矩阵 (float32)，体积较大，只放本地缓存
+BACKFILL_PATH = os.getenv('CHILAM_BACKFILL_PATH', 'data/cache/rps_backfill.npz')
+# 排名时每批处理的交易日数，控制 argsort 的峰值内存
+RANK_CHUNK = 256
+
+# ================= 行情矩阵 =================
+
+def load_close_matrix(kind='stock', start=None, end=None):
+    """
+    从本地行情仓库读出 日期 × 代码 的复权收盘价矩阵 (float32)
+    返回 (dates, codes, close)，缺失 (停牌/未上市) 为 NaN
+    行按交易日历排，本地没有快照的交易日整行为 NaN：平移 n 行才等于 n 个交易日
+    (每晚例行运行只落今天和几个锚点日，仓库是稀疏的)
+    """
+    import ref_data
+    cached = [d for d in history_store.cached_dates(kind)
+              if (start is None or d >= start) and (end is None or d <= end)]
+    if not cached: return [], pd.Index([]), np.full((0, 0), np.nan, dtype=np.float32)
+    dates = ref_data.trade_dates(start or cached[0], end or cached[-1])
+    pos = {d: i for i, d in enumerate(dates)}
+    extra = [d for d in cached if d not in pos]
+    if extra:
+        print(f"⚠️ {len(extra)} 个本地快照不在交易日历里，忽略: {', '.join(extra[:5])}")
+    frames = []
+    for d in cached:
+        if d not in pos: continue
+        df = history_store.load_snapshot(kind, d)
+        if df is None or df.empty: continue
+        val = df['close'] * df['adj_factor'] if 'adj_factor' in df.columns else df['close']
+        frames.append((pos[d], df['ts_code'].to_numpy(), val.to_numpy(dtype=np.float32)))
+    if len(frames) < len(dates):
+        print(f"⚠️ 本地只有 {len(frames)}/{len(dates)} 个交易日的行情，缺的日子记 NaN (可用 --fetch-years 补齐)")
+
+    codes = pd.Index(sorted(set().union(*(f[1] for f in frames)))) if frames else pd.Index([])
+    close = np.full((len(dates), len(codes)), np.nan, dtype=np.float32)
+    for i, day_codes, vals in frames:
+        close[i, codes.get_indexer(day_codes)] = vals
+    return list(dates), codes, close
+
+# ================= 向量化计算 =================
+
+def compute_returns(close, n):
+    """N 日涨幅：整列平移 n 行后相除，前 n 行为 NaN"""
+    ret = np.full_like(close, np.nan)
+    if n < len(close):
+        ret[n:] = close[n:] / close[:-n] - 1
+    return ret
+
+def rank_pct(values):
+    """
+    逐行 (每个交易日) 的截面百分位排名，等价于 pandas rank(pct=True) * 100：
+    并列取平均名次，NaN 不参与排名且保持 NaN
+    """
+    values = np.asarray(values, dtype=np.float32)
+    out = np.full(values.shape, np.nan, dtype=np.float32)
+    n_cols = values.shape[1]
+    if n_cols == 0: return out
+    cols = np.arange(n_cols)
+    for lo in range(0, len(values), RANK_CHUNK):
+        block = values[lo:lo + RANK_CHUNK]
+        order = np.argsort(block, axis=1, kind='stable')  # NaN 排在末尾
+        srt = np.take_along_axis(block, order, axis=1)
+        valid = ~np.isnan(srt)
+        # 找出每段相等值的起止位置，求平均名次
+        new_run = np.ones(srt.shape, dtype=bool)
+        new_run[:, 1:] = srt[:, 1:] != srt[:, :-1]
+        run_start = np.maximum.accumulate(np.where(new_run, cols, 0), axis=1)
+        run_end = np.ones(srt.shape, dtype=bool)
+        run_end[:, :-1] = new_run[:, 1:]
+        run_stop = np.minimum.accumulate(np.where(run_end, cols, n_cols)[:, ::-1], axis=1)[:, ::-1]
+        avg_rank = (run_start + run_stop) / 2 + 1
+        count = valid.sum(axis=1, keepdims=True)
+        pct = np.where(valid, avg_rank / np.maximum(count, 1) * 100, np.nan)
+        np.put_along_axis(out[lo:lo + RANK_CHUNK], order, pct.astype(np.float32), axis=1)
+    return out
+
+def compute_rps_matrix(close, windows=RPS_N):
+    """一次性算出所有交易日、所有窗口的 RPS，返回 {n: 日期 × 代码 矩阵}"""
+    return {n: rank_pct(compute_returns(close, n)) for n in windows}
+
+# ================= 落盘 / 读取 =================
+
+def save_backfill(dates, codes, rps, path=BACKFILL_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    arrays = {f'RPS_{n}': m for n, m in rps.items()}
+    np.savez_compressed(path, dates=np.array(dates), codes=np.array(codes, dtype=str), **arrays)
+
+def load_backfill(path=BACKFILL_PATH):
+    """读取回填结果，返回 (dates, codes, {n: 矩阵})；不存在返回 None"""
+    if not os.path.exists(path): return None
+    with np.load(path) as data:
+        rps = {int(k.split('_')[1]): data[k] for k in data.files if k.startswith('RPS_')}
+        return list(data['dates']), pd.Index(data['codes']), rps
+
+def backfill_frame(dates, codes, rps, date_str):
+    """把某一天的回填结果还原成和 calculate_rps_logic 一样的长表"""
+    i = list(dates).index(date_str)
+    df = pd.DataFrame({'ts_code': codes})
+    for n, m in rps.items():
+        df[f'RPS_{n}'] = m[i]
+    return df
+
+# ================= 补齐历史行情 =================
+
+def ensure_history(years):
+    """按交易日历补齐最近 years 年的个股快照 (已落盘的交易日不会重复下载)"""
+    import daily_rps_pro
+    import fetch_scheduler
+    import ref_data
+    end = datetime.datetime.now().strftime('%Y%m%d')
+    start = (datetime.datetime.now() - datetime.timedelta(days=int(365 * years))).strftime('%Y%m%d')
+    missing = [d for d in ref_data.trade_dates(start, end) if not history_store.has_snapshot('stock', d)]
+    print(f"📥 需补齐 {len(missing)} 个交易日的行情...")
+    fetch_scheduler.gather([functools.partial(daily_rps_pro.get_snapshot, d) for d in missing])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="全历史 RPS 回填")
+    parser.add_argument('--kind', default='stock', choices=['stock', 'etf'])
+    parser.add_argument('--windows', default=','.join(map(str, RPS_N)), help="逗号分隔，如 20,50,120,250")
+    parser.add_argument('--fetch-years', type=float, default=0, help="先从 tushare 补齐最近几年的个股行情")
+    parser.add_argument('--out', default=BACKFILL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.fetch_years and args.kind == 'stock':
+        ensure_history(args.fetch_years)
+
+    t0 = datetime.datetime.now()
+    dates, codes, close = load_close_matrix(args.kind)
+    if not dates:
+        print("⚠️ 本地行情仓库为空，请先用 --fetch-years 补齐")
+        return
+    t1 = datetime.datetime.now()
+    rps = compute_rps_matrix(close, [int(x) for x in args.windows.split(',')])
+    t2 = datetime.datetime.now()
+    save_backfill(dates, codes, rps, args.out)
+    print(f"✅ 回填完成：{len(dates)} 天 × {len(codes)} 只，读取 {(t1 - t0).total_seconds():.1f}s，"
+          f"计算 {(t2 - t1).total_seconds():.1f}s，已保存至 {args.out}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
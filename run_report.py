@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import datetime
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+# ================= 配置区 =================
+# 每次运行追加一行 JSON，和 CSV 放在一起，随数据一起提交
+REPORT_PATH = os.getenv('CHILAM_REPORT_PATH', 'data/run_reports.jsonl')
+
+# ================= 运行报告 =================
+
+def peak_rss_mb():
+    if resource is None: return None
+    # ru_maxrss 在 Linux 上单位是 KB，macOS 上是字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 1024), 1)
+
+class RunReport:
+    """一次运行的结构化记录：各阶段耗时 + 各接口调用统计 + 峰值内存"""
+
+    def __init__(self, job):
+        self.job = job
+        self.started = datetime.datetime.now()
+        self.t0 = time.perf_counter()
+        self.stages = []
+        self.api = {}
+        self.status = 'ok'
+        self.errors = []
+        self.trade_date = None
+        self.lock = threading.Lock()
+
+    def add_stage(self, name, seconds, rows=None):
+        with self.lock:
+            self.stages.append({'name': name, 'seconds': round(seconds, 4), 'rows': rows})
+
+    def record_call(self, endpoint, seconds, rows=0, nbytes=0, ok=True):
+        with self.lock:
+            s = self.api.setdefault(endpoint, {'calls': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0,
+                                               'max_latency': 0.0, 'rows': 0, 'bytes': 0})
+            s['calls'] += 1
+            s['errors'] += 0 if ok else 1
+            s['seconds'] = round(s['seconds'] + seconds, 4)
+            s['max_latency'] = round(max(s['max_latency'], seconds), 4)
+            s['rows'] += rows
+            s['bytes'] += nbytes
+
+    def record_retry(self, endpoint):
+        with self.lock:
+            self.api.setdefault(endpoint, {'calls': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0,
+                                           'max_latency': 0.0, 'rows': 0, 'bytes': 0})['retries'] += 1
+
+    def skip(self, reason):
+        with self.lock:
+            if self.status == 'ok': self.status = 'skipped'
+            self.errors.append(str(reason))
+
+    def degrade(self, message):
+        """部分数据降级 (如熔断后用兜底值)，整体仍算完成"""
+        with self.lock:
+            if self.status == 'ok': self.status = 'degraded'
+            self.errors.append(str(message))
+
+    def fail(self, message):
+        with self.lock:
+            self.status = 'failed'
+            self.errors.append(str(message))
+
+    def to_dict(self):
+        return {
+            'job': self.job,
+            'started': self.started.strftime('%Y-%m-%d %H:%M:%S'),
+            'trade_date': self.trade_date,
+            'status': self.status,
+            'errors': self.errors,
+            'wall': round(time.perf_counter() - self.t0, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': self.stages,
+            'api': self.api,
+        }
+
+    def save(self, path=REPORT_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False) + '\n')
+        print(f"🧾 运行报告已追加至 {path}")
+
+# ================= 模块级接口 =================
+# 同一进程只有一份当前报告 (pipeline 里个股和 ETF 共用，阶段名带 job 前缀区分)
+
+_current = None
+
+def start(job):
+    global _current
+    _current = RunReport(job)
+    return _current
+
+def current():
+    """当前报告；没有调用 start 时返回一个不落盘的临时报告，调用方无需判空"""
+    global _current
+    if _current is None: _current = RunReport('adhoc')
+    return _current
+
+def finish(path=REPORT_PATH):
+    global _current
+    if _current is None: return None
+    report, _current = _current, None
+    report.save(path)
+    return report
+
+def timed(name, fn, *args, **kwargs):
+    """计时执行 fn 并记为一个阶段，返回 DataFrame 时顺带记录行数"""
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    current().add_stage(name, time.perf_counter() - t0, rows=len(out) if hasattr(out, '__len__') else None)
+    return out
+
+class StageClock:
+    """顺序流程的秒表：每次 lap 记录距上一次 lap 的耗时"""
+
+    def __init__(self, job):
+        self.job = job
+        self.last = time.perf_counter()
+
+    def lap(self, stage, rows=None):
+        now = time.perf_counter()
+        current().add_stage(f"{self.job}/{stage}", now - self.last, rows)
+        self.last = now
@@ -0,0 +1,109 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# ================= 配置区 =================
+# 证券主表：ts_code <-> 稳定的整数 id (sid)，个股和 ETF 共用一张表
+# 只追加不改号，同一代码在每次运行里 sid 都一样；流水线中间表都按 sid 对齐，
+# 合并变成数组按下标取值，字符串代码只在输出时带出来
+MASTER_PATH = os.getenv('CHILAM_SECURITY_MASTER', 'data/cache/ref/security_master.parquet')
+
+class SecurityMaster:
+    """ts_code <-> sid (int32，按首次出现的顺序编号)"""
+
+    def __init__(self, path=MASTER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.codes = np.array([], dtype=object)
+        self.index = pd.Index(self.codes)
+        self.load()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def load(self):
+        if not os.path.exists(self.path): return
+        try:
+            df = pd.read_parquet(self.path)
+            self.codes = df.sort_values('sid')['ts_code'].to_numpy(dtype=object)
+            self.index = pd.Index(self.codes)
+        except Exception as e:
+            print(f"⚠️ 证券主表读取失败，将重新编号: {e}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        try:
+            pd.DataFrame({'sid': np.arange(len(self.codes), dtype=np.int32), 'ts_code': self.codes}).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ 证券主表写入失败: {e}")
+
+    def encode(self, codes):
+        """ts_code 序列 -> sid 数组 (int32)，没见过的代码追加编号并落盘"""
+        # 不强转 object：Arrow 字符串直接查表，省掉每次把几千个代码物化成 Python 字符串
+        codes = pd.Index(codes)
+        sids = self.index.get_indexer(codes)
+        if (sids < 0).any():
+            with self._lock:
+                sids = self.index.get_indexer(codes)
+                new = codes[sids < 0].unique()
+                if len(new):
+                    self.codes = np.concatenate([self.codes, new.to_numpy(dtype=object)])
+                    self.index = pd.Index(self.codes)
+                    self.save()
+                sids = self.index.get_indexer(codes)
+        return sids.astype(np.int32)
+
+    def decode(self, sids):
+        """sid 数组 -> ts_code 数组"""
+        return self.codes[np.asarray(sids)]
+
+_master = None
+_master_lock = threading.Lock()
+
+def get():
+    """进程内单例"""
+    global _master
+    with _master_lock:
+        if _master is None: _master = SecurityMaster()
+        return _master
+
+# ================= 按 sid 对齐 =================
+
+def positions(sids, src_sids):
+    """
+    sids 中每个 sid 在 src_sids 里的行号 (找不到为 -1，重复的 sid 以最后一次为准)
+    先按 sid 摆一张下标表再取一次，两次数组索引，不做哈希
+    """
+    sids, src_sids = np.asarray(sids), np.asarray(src_sids)
+    size = int(max(sids.max(initial=-1), src_sids.max(initial=-1))) + 1
+    table = np.full(size, -1, dtype=np.int64)
+    table[src_sids] = np.arange(len(src_sids))
+    return table[sids]
+
+def _take(values, idx):
+    """按行号取值，-1 处补缺失；dtype 规则与 pd.merge 一致 (全部取到时保持原 dtype，否则 int -> float64、bool -> object)"""
+    return pd.api.extensions.take(values, idx, allow_fill=True)
+
+def lookup(sids, src_sids, values):
+    """values 按 src_sids 对齐到 sids，等价于 left merge 取一列"""
+    return np.asarray(_take(values, positions(sids, src_sids)))
+
+def join(df, other, key='ts_code', how='left'):
+    """
+    把 other 的列按 sid 贴到 df 上 (df 需要有 sid 列，other 用 key 列编码)
+    how='inner' 时丢掉 other 里找不到的行，行顺序与 df 一致 (和 pd.merge 相同)
+    列名冲突直接报错 (pd.merge 会加后缀，这里不猜)，列的 dtype (含 Categorical) 与 pd.merge 的结果一致
+    """
+    clash = [c for c in other.columns if c != key and c in df.columns]
+    if clash:
+        raise ValueError(f"join 列名冲突: {clash}")
+    idx = positions(df['sid'].to_numpy(), get().encode(other[key]))
+    if how == 'inner':
+        keep = idx >= 0
+        df, idx = df[keep], idx[keep]
+    # 新列一次性拼上，避免逐列插入
+    cols = {col: _take(other[col].array, idx) for col in other.columns if col != key}
+    return pd.concat([df.reset_index(drop=True), pd.DataFrame(cols)], axis=1)
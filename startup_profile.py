@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# ================= 配置区 =================
+# 冷启动剖析：每个目标在全新的子进程里导入 (python -X importtime)，
+# 按顶层包汇总导入耗时，再逐个计时各功能第一次用到时的初始化 (懒加载的部分)
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+TARGETS = {
+    'app': ['app'],
+    'stock': ['daily_rps_pro'],
+    'etf': ['daily_etf_pro'],
+    'pipeline': ['pipeline', 'daily_rps_pro', 'daily_etf_pro'],
+}
+
+# 功能 -> 第一次用到时执行的初始化代码
+INITS = {
+    'app': {
+        'tushare 客户端 (盘中实时)': "import datasource; datasource.get_pro().inner.load()",
+        'akshare (新闻拉取)': "import datasource; datasource.get_ak().inner.load()",
+        'LLM 依赖 (AI 分析)': "import langchain_openai, langchain_core.prompts, langchain_core.output_parsers",
+    },
+    'stock': {
+        'tushare 客户端': "import datasource; datasource.get_pro().inner.load()",
+        'akshare (细分行业)': "import datasource; datasource.get_ak().inner.load()",
+    },
+    'etf': {
+        'tushare 客户端': "import datasource; datasource.get_pro().inner.load()",
+    },
+    'pipeline': {
+        'tushare 客户端': "import datasource; datasource.get_pro().inner.load()",
+        'akshare (细分行业)': "import datasource; datasource.get_ak().inner.load()",
+    },
+}
+
+PROBE = r'''
+import sys, time, json, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {repo!r})
+out = {{}}
+t0 = time.perf_counter()
+for m in {modules!r}: __import__(m)
+out['import'] = time.perf_counter() - t0
+sys.stderr.write('--- imports done ---\n'); sys.stderr.flush()
+inits = {{}}
+for label, code in {inits!r}.items():
+    t0 = time.perf_counter()
+    try:
+        exec(code, {{}})
+        inits[label] = time.perf_counter() - t0
+    except Exception as e:
+        inits[label] = repr(e)
+out['inits'] = inits
+print('PROFILE ' + json.dumps(out, ensure_ascii=False))
+'''
+
+# ================= 剖析 =================
+
+def parse_importtime(stderr):
+    """-X importtime 的输出 (只看目标模块导入阶段) -> {顶层包: 自身耗时合计 (秒)}"""
+    per_pkg = {}
+    for line in stderr.split('--- imports done ---')[0].splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line: continue
+        self_us, _, name = line.split(':', 1)[1].split('|')
+        pkg = name.strip().split('.')[0]
+        per_pkg[pkg] = per_pkg.get(pkg, 0) + int(self_us) / 1e6
+    return per_pkg
+
+def profile(target):
+    """在干净的子进程里剖析一个目标，返回 {'import': 秒, 'packages': {...}, 'inits': {...}}"""
+    code = PROBE.format(repo=REPO, modules=TARGETS[target], inits=INITS[target])
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO,
+                          capture_output=True, text=True, env=dict(os.environ))
+    line = [x for x in proc.stdout.splitlines() if x.startswith('PROFILE ')]
+    if not line: raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "子进程无输出")
+    result = json.loads(line[-1][len('PROFILE '):])
+    result['packages'] = parse_importtime(proc.stderr)
+    return result
+
+def first_paint():
+    """streamlit 首次渲染强势股页的耗时 (AppTest，不含浏览器)，没装 streamlit 时返回 None"""
+    code = ("import sys, time; sys.path.insert(0, %r)\n"
+            "from streamlit.testing.v1 import AppTest\n"
+            "at = AppTest.from_file(%r, default_timeout=300)\n"
+            "t0 = time.perf_counter(); at.run(); print('PAINT', time.perf_counter() - t0)") % (REPO, os.path.join(REPO, 'app.py'))
+    proc = subprocess.run([sys.executable, '-c', code], cwd=REPO, capture_output=True, text=True)
+    line = [x for x in proc.stdout.splitlines() if x.startswith('PAINT ')]
+    return float(line[-1].split()[1]) if line else None
+
+def report(target, result, top):
+    print(f"🧊 [{target}] 冷启动导入 {result['import']:.2f}s")
+    for pkg, secs in sorted(result['packages'].items(), key=lambda kv: -kv[1])[:top]:
+        print(f"   {pkg:<28} {secs * 1000:8.0f} ms")
+    for label, secs in result['inits'].items():
+        print(f"   ⏳ 首次使用 {label:<24} " + (f"{secs * 1000:8.0f} ms" if isinstance(secs, float) else f"失败: {secs}"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冷启动剖析：各模块导入耗时 + 懒加载功能的初始化耗时")
+    parser.add_argument('targets', nargs='*', help=f"{'/'.join(TARGETS)}，默认全部")
+    parser.add_argument('--top', type=int, default=12, help="每个目标列出最慢的多少个包")
+    parser.add_argument('--paint', action='store_true', help="额外测 streamlit 首次渲染 (需要 streamlit)")
+    args = parser.parse_args(argv)
+    unknown = [t for t in args.targets if t not in TARGETS]
+    if unknown: parser.error(f"未知目标: {', '.join(unknown)}")
+    for target in args.targets or list(TARGETS):
+        report(target, profile(target), args.top)
+    if args.paint:
+        paint = first_paint()
+        print(f"🎨 app 首次渲染 {paint:.2f}s" if paint is not None else "⚠️ 无法测首次渲染 (未安装 streamlit?)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# ================= 强势股筛选引擎 =================
+# 每个数据版本建一次索引，之后每次交互只做二分查找 + 位图求交：
+#   数值列 -> 排好序的 (值, 行号)，区间查询用 searchsorted
+#   行业   -> 每个行业一张 bool 位图
+#   代码/名称 -> 单字 + 双字 (n-gram) 倒排，候选集再做一次精确子串校验
+# 行号即 RPS_50 名次 (建索引前 df 已按 RPS_50 降序排好)，结果天然有序
+
+RANGE_COLS = ['连续天数', 'RPS_50', 'pe_ttm']
+TEXT_COLS = ['ts_code', 'name']
+
+def _grams(text):
+    """单字 + 相邻双字，中文和代码都适用"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+class StockQueryEngine:
+    def __init__(self, df):
+        self.n = len(df)
+        self.sorted_cols = {}
+        for col in RANGE_COLS:
+            if col not in df.columns: continue
+            vals = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            rows = np.flatnonzero(~np.isnan(vals))
+            order = np.argsort(vals[rows], kind='stable')
+            self.sorted_cols[col] = (vals[rows][order], rows[order])
+
+        self.industry_bitmaps = {}
+        if '细分行业' in df.columns:
+            ind = df['细分行业'].astype('category')
+            codes = ind.cat.codes.to_numpy()
+            for i, name in enumerate(ind.cat.categories):
+                self.industry_bitmaps[name] = codes == i
+
+        # 每行的检索文本 (代码和名称分开，避免跨字段拼出假匹配)
+        self.texts = [[str(v) for v in df[c].fillna('')] if c in df.columns else [''] * self.n
+                      for c in TEXT_COLS]
+        self.gram_index = {}
+        for texts in self.texts:
+            for row, text in enumerate(texts):
+                for g in _grams(text):
+                    self.gram_index.setdefault(g, set()).add(row)
+
+    def has(self, col):
+        return col in self.sorted_cols
+
+    def range_mask(self, col, lo=None, hi=None, lo_open=False, hi_open=False):
+        """col 在 [lo, hi] 区间内的行 (lo_open/hi_open 表示开区间)，NaN 不入选"""
+        vals, rows = self.sorted_cols[col]
+        start = 0 if lo is None else np.searchsorted(vals, lo, side='right' if lo_open else 'left')
+        stop = len(vals) if hi is None else np.searchsorted(vals, hi, side='left' if hi_open else 'right')
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows[start:stop]] = True
+        return mask
+
+    def keyword_mask(self, kw):
+        """代码或名称包含 kw (按字面子串匹配)"""
+        mask = np.zeros(self.n, dtype=bool)
+        keys = {kw} if len(kw) == 1 else {kw[i:i + 2] for i in range(len(kw) - 1)}
+        postings = [self.gram_index.get(g) for g in keys]
+        if any(p is None for p in postings): return mask
+        candidates = set.intersection(*postings)
+        hits = [r for r in candidates if any(kw in texts[r] for texts in self.texts)]
+        mask[hits] = True
+        return mask
+
+    def query(self, min_days=None, min_rps=None, max_pe=None, industry=None, keyword=None):
+        """返回满足全部条件的行号 (按 RPS_50 降序)"""
+        mask = np.ones(self.n, dtype=bool)
+        if min_days is not None and self.has('连续天数'):
+            mask &= self.range_mask('连续天数', lo=min_days)
+        if min_rps is not None and self.has('RPS_50'):
+            mask &= self.range_mask('RPS_50', lo=min_rps)
+        if max_pe is not None and self.has('pe_ttm'):
+            mask &= self.range_mask('pe_ttm', lo=0, hi=max_pe, lo_open=True)
+        if industry is not None:
+            bitmap = self.industry_bitmaps.get(industry)
+            if bitmap is None: return np.array([], dtype=int)
+            mask &= bitmap
+        if keyword:
+            mask &= self.keyword_mask(keyword)
+        return np.flatnonzero(mask)